@@ -0,0 +1,26 @@
+"""store failure details on submissions
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "002"
+down_revision: Union[str, None] = "001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("submissions", sa.Column("failed_test_index", sa.Integer, nullable=True))
+    op.add_column("submissions", sa.Column("failed_field", sa.String(100), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("submissions", "failed_field")
+    op.drop_column("submissions", "failed_test_index")
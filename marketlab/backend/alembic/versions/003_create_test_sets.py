@@ -0,0 +1,38 @@
+"""create test_sets and link submissions to them
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "test_sets",
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column("task_id", sa.String(120), nullable=False, index=True),
+        sa.Column("generator_version", sa.Integer, nullable=False),
+        sa.Column("seed", sa.Integer, nullable=False),
+        sa.Column("n", sa.Integer, nullable=False),
+        sa.Column("digest", sa.String(64), nullable=False),
+        sa.Column("payload", sa.Text, nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()
+        ),
+    )
+    op.add_column("submissions", sa.Column("test_set_id", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("submissions", "test_set_id")
+    op.drop_table("test_sets")
@@ -0,0 +1,30 @@
+"""keyset pagination indexes for submission history
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_submissions_created_at_id", "submissions", ["created_at", "id"])
+    op.create_index(
+        "ix_submissions_task_id_created_at_id", "submissions", ["task_id", "created_at", "id"]
+    )
+    # Covered by the composite index's leading column.
+    op.drop_index("ix_submissions_task_id", table_name="submissions")
+
+
+def downgrade() -> None:
+    op.create_index("ix_submissions_task_id", "submissions", ["task_id"])
+    op.drop_index("ix_submissions_task_id_created_at_id", table_name="submissions")
+    op.drop_index("ix_submissions_created_at_id", table_name="submissions")
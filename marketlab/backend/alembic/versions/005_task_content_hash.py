@@ -0,0 +1,34 @@
+"""task content hashes and the app_state table for the registry fingerprint
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Empty hashes never match, so the next startup sync rewrites every task once.
+    op.add_column(
+        "tasks", sa.Column("content_hash", sa.String(64), nullable=False, server_default="")
+    )
+    op.create_table(
+        "app_state",
+        sa.Column("key", sa.String(100), primary_key=True),
+        sa.Column("value", sa.Text, nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("app_state")
+    op.drop_column("tasks", "content_hash")
@@ -0,0 +1,30 @@
+"""submission resource usage: cpu / wall time and peak RSS of the judge run
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("submissions", sa.Column("cpu_time_ms", sa.Float, nullable=True))
+    op.add_column("submissions", sa.Column("wall_time_ms", sa.Float, nullable=True))
+    op.add_column("submissions", sa.Column("max_test_time_ms", sa.Float, nullable=True))
+    op.add_column("submissions", sa.Column("peak_rss_kb", sa.Integer, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("submissions", "peak_rss_kb")
+    op.drop_column("submissions", "max_test_time_ms")
+    op.drop_column("submissions", "wall_time_ms")
+    op.drop_column("submissions", "cpu_time_ms")
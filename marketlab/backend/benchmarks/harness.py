@@ -0,0 +1,109 @@
+"""
+Minimal timing harness for the judge benchmarks.
+
+Each benchmark is a zero-argument callable timed like ``timeit``: the number
+of calls per sample is calibrated so one sample takes ~``min_sample_sec``,
+and the best of ``repeat`` samples is reported as seconds per operation.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True, slots=True)
+class Measurement:
+    name: str
+    seconds_per_op: float
+    ops_per_sample: int
+    samples: int
+
+
+@dataclass(frozen=True, slots=True)
+class Regression:
+    name: str
+    baseline: float
+    current: float
+    ratio: float
+    max_ratio: float
+
+
+def measure(
+    name: str,
+    fn: Callable[[], object],
+    *,
+    ops_per_call: int = 1,
+    repeat: int = 5,
+    min_sample_sec: float = 0.2,
+) -> Measurement:
+    """Time ``fn``; ``ops_per_call`` divides the result when one call does many ops."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_sample_sec or number >= 1_000_000:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_sample_sec / elapsed) + 1))
+
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, time.perf_counter() - start)
+
+    return Measurement(
+        name=name,
+        seconds_per_op=best / (number * ops_per_call),
+        ops_per_sample=number * ops_per_call,
+        samples=repeat,
+    )
+
+
+def write_results(path: Path, results: list[Measurement]) -> None:
+    payload = {"results": [asdict(m) for m in results]}
+    path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+
+def load_baseline(path: Path) -> tuple[float, dict[str, float], dict[str, float]]:
+    """Return (default max ratio, per-metric max ratios, baseline seconds per op)."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    return (
+        float(data.get("max_ratio", 1.5)),
+        {k: float(v) for k, v in data.get("max_ratio_overrides", {}).items()},
+        {k: float(v) for k, v in data["seconds_per_op"].items()},
+    )
+
+
+def write_baseline(path: Path, results: list[Measurement], *, max_ratio: float) -> None:
+    payload = {
+        "max_ratio": max_ratio,
+        "max_ratio_overrides": {},
+        "seconds_per_op": {m.name: m.seconds_per_op for m in results},
+    }
+    path.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+
+def find_regressions(
+    results: list[Measurement],
+    baseline: dict[str, float],
+    *,
+    max_ratio: float,
+    overrides: dict[str, float],
+) -> list[Regression]:
+    out: list[Regression] = []
+    for m in results:
+        base = baseline.get(m.name)
+        if base is None or base <= 0:
+            continue
+        limit = overrides.get(m.name, max_ratio)
+        ratio = m.seconds_per_op / base
+        if ratio > limit:
+            out.append(Regression(m.name, base, m.seconds_per_op, ratio, limit))
+    return out
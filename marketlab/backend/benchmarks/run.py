@@ -0,0 +1,267 @@
+"""
+Judge micro-benchmarks.
+
+Usage (from ``backend/``):
+
+    python -m benchmarks.run                     # compare with baseline.json
+    python -m benchmarks.run --output out.json   # also dump raw results
+    python -m benchmarks.run --update-baseline   # re-record the baseline
+    python -m benchmarks.run --only generate     # subset by name
+
+Exits with status 1 when a metric is slower than its baseline by more than
+the configured ratio.  Baselines are machine specific: record them on the
+machine (or CI runner class) that runs the comparison.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import pickle
+import sys
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks.harness import (
+    Measurement,
+    find_regressions,
+    load_baseline,
+    measure,
+    write_baseline,
+    write_results,
+)
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+TASK_ID = "equilibrium_linear_v1"
+
+SOLUTION = """\
+def solve(params):
+    a = float(params["a"]); b = float(params["b"])
+    c = float(params["c"]); d = float(params["d"])
+    mode = params["mode"]
+    t = float(params.get("t", 0.0))
+    denom = b + d
+    if mode == "none":
+        p = (a - c) / denom
+    elif mode == "tax":
+        p = (a - c + d * t) / denom
+    else:
+        p = (a - c - d * t) / denom
+    q = a - b * p
+    return {"p_eq": p, "q_eq": q}
+"""
+
+
+def _unique_code() -> Callable[[], str]:
+    """Distinct sources defeat the compiled-code and verdict caches."""
+    counter = itertools.count()
+    return lambda: f"{SOLUTION}# {next(counter)}\n"
+
+
+def bench_compile() -> list[Measurement]:
+    from marketlab.infra.judge.runner_inprocess import compile_user_solve
+
+    fresh = _unique_code()
+    return [
+        measure("compile_user_solve.cold", lambda: compile_user_solve(fresh())),
+        measure("compile_user_solve.cached", lambda: compile_user_solve(SOLUTION)),
+    ]
+
+
+def bench_judge() -> list[Measurement]:
+    from marketlab.domain.generator import generate_tests
+    from marketlab.infra.judge.test_set import TestSet
+    from marketlab.usecases.judge_v1 import run_judge_v1
+    from marketlab.usecases.registry import TASK_REGISTRY, expected_results
+
+    spec, oracle = TASK_REGISTRY[TASK_ID]
+    tests = generate_tests(TASK_ID, n=25, seed=0)
+    expected = expected_results(TASK_ID, tests)
+    packed = TestSet.from_tests(spec.input_fields, tests).share()
+
+    def judge(with_expected: bool, judged=tests) -> None:
+        run_judge_v1(
+            spec=spec,
+            oracle=oracle,
+            user_code=SOLUTION,
+            tests=judged,
+            expected=expected if with_expected else None,
+        )
+
+    return [
+        measure("run_judge_v1.per_test", lambda: judge(False), ops_per_call=len(tests)),
+        measure(
+            "run_judge_v1.per_test.precomputed",
+            lambda: judge(True),
+            ops_per_call=len(tests),
+        ),
+        measure(
+            "run_judge_v1.per_test.shared_test_set",
+            lambda: judge(True, pickle.loads(pickle.dumps(packed))),
+            ops_per_call=len(tests),
+        ),
+    ]
+
+
+def bench_generate() -> list[Measurement]:
+    from marketlab.domain.generator import generate_columns, generate_tests
+
+    out = []
+    for n in (25, 1_000, 100_000):
+        seeds = itertools.count()
+        out.append(
+            measure(
+                f"generate_tests.n={n}",
+                lambda n=n, seeds=seeds: generate_tests(TASK_ID, n=n, seed=next(seeds)),
+                repeat=3 if n >= 100_000 else 5,
+            )
+        )
+    seeds = itertools.count()
+    out.append(
+        measure(
+            "generate_columns.n=1000000",
+            lambda: generate_columns(TASK_ID, n=1_000_000, seed=next(seeds)),
+            repeat=3,
+        )
+    )
+    return out
+
+
+def bench_oracle() -> list[Measurement]:
+    from marketlab.domain import LinearDemand, LinearSupply, MarketPolicy, compute_equilibrium
+    from marketlab.domain.kernel import MODE_TAX, equilibrium
+    from marketlab.usecases.solvers import solve_equilibrium_linear
+
+    params = {"a": 120.0, "b": 3.0, "c": -10.0, "d": 2.0, "mode": "tax", "t": 10.0}
+
+    def via_objects() -> None:
+        compute_equilibrium(
+            LinearDemand(a=120.0, b=3.0), LinearSupply(c=-10.0, d=2.0), MarketPolicy("tax", 10.0)
+        )
+
+    return [
+        measure("solve_equilibrium_linear.per_call", lambda: solve_equilibrium_linear(params)),
+        # The validated object API vs the plain-float kernel it wraps.
+        measure("compute_equilibrium.objects.per_call", via_objects),
+        measure(
+            "equilibrium_kernel.per_call",
+            lambda: equilibrium(120.0, 3.0, -10.0, 2.0, MODE_TAX, 10.0),
+        ),
+    ]
+
+
+def bench_metrics() -> list[Measurement]:
+    from marketlab.infra.metrics import MetricsRegistry
+
+    registry = MetricsRegistry()
+    histogram = registry.histogram("bench_seconds", "bench", ("task_id",)).labels(TASK_ID)
+    counter = registry.counter("bench_total", "bench", ("task_id",)).labels(TASK_ID)
+    return [
+        measure("metrics.histogram.observe", lambda: histogram.observe(0.0003)),
+        measure("metrics.counter.inc", counter.inc),
+    ]
+
+
+def bench_submit_endpoint() -> list[Measurement]:
+    import tempfile
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    from marketlab.api.routes.submissions import router as submissions_router
+    from marketlab.infra.db.models import Base
+    from marketlab.infra.db.session import get_async_db
+
+    tmp = tempfile.TemporaryDirectory()
+    path = Path(tmp.name) / "bench.db"
+    Base.metadata.create_all(bind=create_engine(f"sqlite:///{path}"))
+    session_factory = async_sessionmaker(
+        bind=create_async_engine(f"sqlite+aiosqlite:///{path}"),
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+    async def override_get_async_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(submissions_router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # One portal (event loop) for all requests, so pooled aiosqlite connections stay valid.
+    client = TestClient(app).__enter__()
+    fresh = _unique_code()
+
+    def post(code: str) -> None:
+        resp = client.post("/api/v1/submissions", json={"task_id": TASK_ID, "user_code": code})
+        assert resp.status_code == 200, resp.text
+
+    try:
+        post(SOLUTION)  # warm the hidden test set caches
+        return [
+            measure("post_submission.e2e", lambda: post(fresh())),
+            measure("post_submission.e2e.duplicate", lambda: post(SOLUTION)),
+        ]
+    finally:
+        client.__exit__(None, None, None)
+        tmp.cleanup()
+
+
+BENCHMARKS: dict[str, Callable[[], list[Measurement]]] = {
+    "compile": bench_compile,
+    "judge": bench_judge,
+    "generate": bench_generate,
+    "oracle": bench_oracle,
+    "metrics": bench_metrics,
+    "submit": bench_submit_endpoint,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", help="run only benchmark groups whose name contains this")
+    parser.add_argument("--output", type=Path, help="write raw results as JSON")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--max-ratio", type=float, help="override the baseline's allowed slowdown")
+    args = parser.parse_args(argv)
+
+    results: list[Measurement] = []
+    for group, bench in BENCHMARKS.items():
+        if args.only and args.only not in group:
+            continue
+        for m in bench():
+            results.append(m)
+            print(f"{m.name:<40} {m.seconds_per_op * 1e6:>14.3f} us/op")
+
+    if args.output:
+        write_results(args.output, results)
+
+    if args.update_baseline:
+        write_baseline(args.baseline, results, max_ratio=args.max_ratio or 1.5)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline first")
+        return 0
+
+    default_ratio, overrides, baseline = load_baseline(args.baseline)
+    regressions = find_regressions(
+        results,
+        baseline,
+        max_ratio=args.max_ratio or default_ratio,
+        overrides=overrides,
+    )
+    for r in regressions:
+        print(
+            f"REGRESSION {r.name}: {r.current * 1e6:.3f} us vs baseline "
+            f"{r.baseline * 1e6:.3f} us (x{r.ratio:.2f} > x{r.max_ratio:.2f})"
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Admission control for endpoints that run user code.
+
+Every judged request costs a full judge run, so ``admit`` rejects it
+before any work is done:
+
+* 429 when the client (or everybody together) exceeds the request rate;
+* 503 when the judge backlog (queued async submissions plus synchronous
+  ones being judged right now) is above ``judge_max_backlog``, so requests
+  already admitted keep their latency instead of everyone queueing longer.
+
+Both carry ``Retry-After``.  A missing limiter/controller on ``app.state``
+(tests, tools) admits everything.
+"""
+
+from __future__ import annotations
+
+import math
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from fastapi import Depends, HTTPException, Request
+
+from marketlab.api.deps import get_admission, get_judge_queue, get_rate_limiter
+from marketlab.infra.metrics import REGISTRY
+from marketlab.infra.rate_limit import RateLimiter
+from marketlab.usecases.judge_queue import JudgeQueue
+
+SHED = REGISTRY.counter(
+    "marketlab_admission_shed_total", "Requests rejected because the judge backlog was full."
+)
+
+
+class AdmissionController:
+    def __init__(self, *, max_backlog: int, retry_after_sec: int = 1) -> None:
+        self.max_backlog = max_backlog
+        self.retry_after_sec = retry_after_sec
+        self._judging = 0
+
+    @contextmanager
+    def judging(self) -> Iterator[None]:
+        """Count a synchronous judge run towards the backlog while it lasts."""
+        self._judging += 1
+        try:
+            yield
+        finally:
+            self._judging -= 1
+
+    def backlog(self, queue: JudgeQueue | None) -> int:
+        return self._judging + (queue.depth if queue is not None else 0)
+
+
+def _reject(status_code: int, detail: str, retry_after: float) -> HTTPException:
+    seconds = max(1, math.ceil(retry_after)) if math.isfinite(retry_after) else 3600
+    return HTTPException(
+        status_code=status_code, detail=detail, headers={"Retry-After": str(seconds)}
+    )
+
+
+async def admit(
+    request: Request,
+    limiter: RateLimiter | None = Depends(get_rate_limiter),
+    admission: AdmissionController | None = Depends(get_admission),
+    queue: JudgeQueue | None = Depends(get_judge_queue),
+) -> None:
+    """Dependency: raise 429/503 unless the request may start a judge run."""
+    if admission is not None and admission.backlog(queue) >= admission.max_backlog:
+        SHED.inc()
+        raise _reject(503, "Judge is overloaded, try again later", admission.retry_after_sec)
+    if limiter is not None:
+        client = request.client.host if request.client is not None else "unknown"
+        exceeded = await limiter.check(client)
+        if exceeded is not None:
+            status_code = 429 if exceeded.scope == "client" else 503
+            raise _reject(status_code, "Too many submissions, slow down", exceeded.retry_after)
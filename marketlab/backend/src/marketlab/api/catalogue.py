@@ -0,0 +1,109 @@
+"""
+Pre-serialized task catalogue.
+
+Task specs and their public tests are fixed for the life of the process, so
+``GET /api/v1/tasks`` and ``GET /api/v1/tasks/{id}`` are rendered to JSON once
+and served from memory with a strong ETag.  The list comes from the task
+manifest; a task's detail is rendered (and its module imported) on its first
+request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+
+from fastapi import Request, Response
+from pydantic import BaseModel, TypeAdapter
+
+from marketlab.api.schemas import FieldOut, TaskDetail, TaskShort
+from marketlab.domain.generator import generate_tests
+from marketlab.domain.task_loader import TASKS
+from marketlab.infra.settings import settings
+from marketlab.usecases.registry import TASK_REGISTRY
+
+_TASK_LIST = TypeAdapter(list[TaskShort])
+
+
+@dataclass(frozen=True, slots=True)
+class CachedJSON:
+    body: bytes
+    etag: str
+
+    @classmethod
+    def of(cls, body: bytes) -> CachedJSON:
+        return cls(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+@dataclass(frozen=True, slots=True)
+class TaskCatalogue:
+    tasks: CachedJSON
+    details: dict[str, CachedJSON] = field(default_factory=dict)
+
+    def detail(self, task_id: str) -> CachedJSON | None:
+        """The rendered detail of a task, None for an unknown task."""
+        cached = self.details.get(task_id)
+        if cached is None and task_id in TASK_REGISTRY:
+            cached = self.details[task_id] = CachedJSON.of(_dump(_task_detail(task_id)))
+        return cached
+
+
+def _task_detail(task_id: str) -> TaskDetail:
+    spec, _solver = TASK_REGISTRY[task_id]
+    tests = generate_tests(task_id, n=1, seed=0)
+    return TaskDetail(
+        id=spec.id,
+        title=spec.title,
+        topic=spec.topic,
+        input_fields=[
+            FieldOut(name=f.name, type=f.type, description=f.description) for f in spec.input_fields
+        ],
+        output_fields=[
+            FieldOut(name=f.name, type=f.type, description=f.description)
+            for f in spec.output_fields
+        ],
+        public_test=tests[0] if tests else {},
+    )
+
+
+def _dump(model: BaseModel) -> bytes:
+    return model.model_dump_json().encode()
+
+
+def build_task_catalogue() -> TaskCatalogue:
+    tasks = []
+    for task_id in TASKS:
+        entry = TASKS.entry(task_id)
+        tasks.append(TaskShort(id=task_id, title=entry.title, topic=entry.topic))
+    return TaskCatalogue(tasks=CachedJSON.of(_TASK_LIST.dump_json(tasks)))
+
+
+_catalogue: TaskCatalogue | None = None
+
+
+def get_task_catalogue() -> TaskCatalogue:
+    """The catalogue, built on first use; the registry does not change while running."""
+    global _catalogue
+    if _catalogue is None:
+        _catalogue = build_task_catalogue()
+    return _catalogue
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """``If-None-Match`` check (weak comparison, as RFC 9110 prescribes for it)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def cached_json_response(request: Request, cached: CachedJSON) -> Response:
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": f"public, max-age={settings.task_catalogue_max_age_sec}",
+    }
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
@@ -0,0 +1,48 @@
+"""
+Shared FastAPI dependencies that read process-wide state from ``app.state``.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from fastapi import Request
+
+from marketlab.infra.db.write_behind import SubmissionWriteBehind
+from marketlab.infra.judge.runner_pool import JudgeWorkerPool
+from marketlab.infra.rate_limit import RateLimiter
+from marketlab.usecases.judge_queue import JudgeQueue
+from marketlab.usecases.rejudge import RejudgeJobs
+
+if TYPE_CHECKING:
+    from marketlab.api.admission import AdmissionController
+
+
+def get_judge_pool(request: Request) -> JudgeWorkerPool | None:
+    """Judge pool started by ``lifespan``; ``None`` means judge in-process."""
+    return getattr(request.app.state, "judge_pool", None)
+
+
+def get_judge_queue(request: Request) -> JudgeQueue | None:
+    """Background judge queue for ``?async=true`` submissions, if started."""
+    return getattr(request.app.state, "judge_queue", None)
+
+
+def get_submission_writer(request: Request) -> SubmissionWriteBehind | None:
+    """Write-behind buffer for judged submissions; ``None`` writes each one directly."""
+    return getattr(request.app.state, "submission_writer", None)
+
+
+def get_rate_limiter(request: Request) -> RateLimiter | None:
+    """Per-client/global limiter of judged requests; ``None`` disables rate limiting."""
+    return getattr(request.app.state, "rate_limiter", None)
+
+
+def get_admission(request: Request) -> AdmissionController | None:
+    """Judge backlog guard; ``None`` admits regardless of backlog."""
+    return getattr(request.app.state, "admission", None)
+
+
+def get_rejudge_jobs(request: Request) -> RejudgeJobs | None:
+    """Background re-judge runs of this API process, if enabled."""
+    return getattr(request.app.state, "rejudge_jobs", None)
@@ -1,26 +1,126 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from marketlab.api.admission import AdmissionController
+from marketlab.api.catalogue import get_task_catalogue
+from marketlab.api.routes.admin import router as admin_router
 from marketlab.api.routes.health import router as health_router
-from marketlab.api.routes.tasks import router as tasks_router
+from marketlab.api.routes.metrics import router as metrics_router
+from marketlab.api.routes.stress import router as stress_router
 from marketlab.api.routes.submissions import router as submissions_router
-from marketlab.infra.db.models import Base
-from marketlab.infra.db.seed import sync_tasks_to_db
-from marketlab.infra.db.session import engine, SessionLocal
+from marketlab.api.routes.tasks import router as tasks_router
+from marketlab.infra.db.seed import prepare_database
+from marketlab.infra.db.session import AsyncSessionLocal, SessionLocal, async_engine, engine
+from marketlab.infra.db.write_behind import SubmissionWriteBehind
+from marketlab.infra.judge.runner_pool import JudgeWorkerPool, PoolSettings
+from marketlab.infra.metrics import publish
+from marketlab.infra.rate_limit import (
+    BucketLimit,
+    MemoryBucketStore,
+    RateLimiter,
+    SQLBucketStore,
+)
+from marketlab.infra.settings import settings
+from marketlab.usecases.judge_queue import JudgeQueue
+from marketlab.usecases.rejudge import RejudgeJobs
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Runs once on startup: create tables & sync tasks to DB."""
-    Base.metadata.create_all(bind=engine)
-    db = SessionLocal()
+    """
+    Runs once per API process: create tables and sync tasks to DB (unless the
+    ``marketlab.serve`` master already did), start the judge pool and queue.
+    """
+    prepare_database(engine)
+
+    get_task_catalogue()  # render the catalogue before the first request
+
+    pool = None
+    if settings.judge_pool_size > 0:
+        pool = JudgeWorkerPool(
+            PoolSettings(
+                size=settings.judge_pool_size,
+                max_jobs_per_worker=settings.judge_max_jobs_per_worker,
+                memory_limit_mb=settings.judge_memory_limit_mb,
+            )
+        )
+    app.state.judge_pool = pool
+
+    queue = JudgeQueue(
+        AsyncSessionLocal,
+        pool=pool,
+        concurrency=pool.size if pool is not None else 1,
+    )
+    await queue.start()
+    app.state.judge_queue = queue
+
+    writer = None
+    if settings.submission_write_behind:
+        writer = SubmissionWriteBehind(
+            AsyncSessionLocal,
+            batch_size=settings.submission_batch_size,
+            flush_interval_ms=settings.submission_flush_interval_ms,
+            spool_path=settings.submission_spool_path,
+        )
+        await writer.start()
+    app.state.submission_writer = writer
+
+    rejudge_jobs = RejudgeJobs(SessionLocal, pool=pool, batch_size=settings.rejudge_batch_size)
+    app.state.rejudge_jobs = rejudge_jobs
+
+    app.state.rate_limiter = _rate_limiter() if settings.rate_limit_enabled else None
+    app.state.admission = AdmissionController(
+        max_backlog=settings.judge_max_backlog,
+        retry_after_sec=settings.judge_backlog_retry_after_sec,
+    )
+
+    publisher = None
+    if settings.metrics_dir:
+        publisher = asyncio.create_task(_publish_metrics(settings.metrics_publish_interval_sec))
     try:
-        sync_tasks_to_db(db)
+        yield
     finally:
-        db.close()
-    yield
+        if publisher is not None:
+            publisher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await publisher
+        await queue.stop()
+        # Runs stop after their current batch and resume from the checkpoint.
+        await asyncio.to_thread(rejudge_jobs.close)
+        if writer is not None:
+            await writer.close()
+        if pool is not None:
+            pool.close()
+        if settings.metrics_dir:
+            publish(settings.metrics_dir)  # final totals, merged by the remaining processes
+        await async_engine.dispose()
+
+
+async def _publish_metrics(interval_sec: float) -> None:
+    """Keep this process's totals in ``metrics_dir`` fresh for the other processes' scrapes."""
+    while True:
+        await asyncio.to_thread(publish, settings.metrics_dir)
+        await asyncio.sleep(interval_sec)
+
+
+def _rate_limiter() -> RateLimiter:
+    if settings.rate_limit_store == "sql":
+        store: SQLBucketStore | MemoryBucketStore = SQLBucketStore(AsyncSessionLocal)
+    else:
+        store = MemoryBucketStore()
+    return RateLimiter(
+        store,
+        per_client=BucketLimit.per_minute(
+            settings.rate_limit_per_client_per_min, settings.rate_limit_per_client_burst
+        ),
+        total=BucketLimit(
+            rate=settings.rate_limit_global_per_sec, burst=settings.rate_limit_global_burst
+        ),
+    )
 
 
 def create_app() -> FastAPI:
@@ -36,11 +136,15 @@ def create_app() -> FastAPI:
         allow_origins=["http://localhost:5173", "http://localhost:3000"],
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Retry-After"],
     )
 
     app.include_router(health_router)
+    app.include_router(metrics_router)
     app.include_router(tasks_router)
     app.include_router(submissions_router)
+    app.include_router(stress_router)
+    app.include_router(admin_router)
 
     return app
 
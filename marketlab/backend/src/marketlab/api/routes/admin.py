@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+
+from marketlab.api.deps import get_rejudge_jobs
+from marketlab.api.schemas import RejudgeOut
+from marketlab.infra.settings import settings
+from marketlab.usecases.registry import TASK_REGISTRY
+from marketlab.usecases.rejudge import RejudgeJobs, RejudgeStatus
+
+
+def require_admin(x_admin_token: str | None = Header(None)) -> None:
+    """Admin endpoints need ``X-Admin-Token``; without a configured token they do not exist."""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(prefix="/api/v1/admin", tags=["admin"], dependencies=[Depends(require_admin)])
+
+
+def _jobs(jobs: RejudgeJobs | None = Depends(get_rejudge_jobs)) -> RejudgeJobs:
+    if jobs is None:
+        raise HTTPException(status_code=503, detail="Re-judging is not enabled")
+    return jobs
+
+
+def _to_out(status: RejudgeStatus) -> RejudgeOut:
+    progress = status.progress
+    return RejudgeOut(
+        task_id=progress.task_id,
+        state=status.state,
+        scanned=progress.scanned,
+        judged=progress.judged,
+        updated=progress.updated,
+        error=status.error,
+    )
+
+
+@router.post(
+    "/rejudge/{task_id}",
+    response_model=RejudgeOut,
+    status_code=202,
+    responses={409: {"description": "A re-judge of this task is already running"}},
+)
+async def start_rejudge(
+    task_id: str, restart: bool = False, jobs: RejudgeJobs = Depends(_jobs)
+) -> RejudgeOut:
+    """
+    Re-judge every stored submission of a task in the background, e.g. after
+    its oracle or the judge tolerances changed.
+
+    An interrupted run continues from its last checkpoint unless
+    ``?restart=true``; 409 while any process (or the CLI) re-judges the
+    task.  Poll ``GET`` on the same path for progress; for large
+    backlogs prefer ``python -m marketlab.rejudge``, which does not share the
+    judge pool with live traffic.
+    """
+    if task_id not in TASK_REGISTRY:
+        raise HTTPException(status_code=404, detail=f"Task '{task_id}' not found")
+    status = await asyncio.to_thread(jobs.start, task_id, restart=restart)
+    if status is None:
+        raise HTTPException(status_code=409, detail=f"Task '{task_id}' is already being re-judged")
+    return _to_out(status)
+
+
+@router.get("/rejudge/{task_id}", response_model=RejudgeOut)
+async def get_rejudge(
+    task_id: str, response: Response, jobs: RejudgeJobs = Depends(_jobs)
+) -> RejudgeOut:
+    """Progress of the task's re-judge run (or of an unfinished run's checkpoint)."""
+    status = await asyncio.to_thread(jobs.status, task_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"No re-judge of '{task_id}' found")
+    response.headers["Cache-Control"] = "no-store"
+    return _to_out(status)
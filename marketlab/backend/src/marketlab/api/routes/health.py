@@ -4,5 +4,5 @@ router = APIRouter(tags=["system"])
 
 
 @router.get("/health")
-def health() -> dict:
+async def health() -> dict:
     return {"status": "ok"}
@@ -0,0 +1,17 @@
+import asyncio
+
+from fastapi import APIRouter, Response
+
+from marketlab.infra.metrics import CONTENT_TYPE, REGISTRY, read_published
+from marketlab.infra.settings import settings
+
+router = APIRouter(tags=["system"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Prometheus scrape endpoint; with ``metrics_dir`` it covers all API processes."""
+    others = []
+    if settings.metrics_dir:
+        others = await asyncio.to_thread(read_published, settings.metrics_dir)
+    return Response(content=REGISTRY.render(others), media_type=CONTENT_TYPE)
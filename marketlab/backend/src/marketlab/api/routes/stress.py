@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import math
+import threading
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from marketlab.api.admission import AdmissionController, admit
+from marketlab.api.deps import get_admission, get_judge_pool
+from marketlab.api.schemas import CounterexampleOut, StressOut, SubmissionIn
+from marketlab.infra.judge.runner_pool import JudgeWorkerPool
+from marketlab.infra.settings import settings
+from marketlab.usecases.registry import TASK_REGISTRY
+from marketlab.usecases.stress import StressSettings, stress_solution
+
+router = APIRouter(prefix="/api/v1/stress", tags=["stress"])
+
+# A stress run occupies a judge worker for its whole CPU budget; cap how many
+# may run at once so they cannot starve regular submissions.
+_slots = threading.BoundedSemaphore(max(1, settings.stress_max_concurrent))
+
+
+@router.post(
+    "",
+    response_model=StressOut,
+    responses={
+        429: {"description": "Rate limit exceeded; see Retry-After"},
+        503: {"description": "Too many stress runs or judge overloaded"},
+    },
+    dependencies=[Depends(admit)],
+)
+async def stress_test(
+    body: SubmissionIn,
+    pool: JudgeWorkerPool | None = Depends(get_judge_pool),
+    admission: AdmissionController | None = Depends(get_admission),
+) -> StressOut:
+    """
+    Judge user code against thousands of generated edge cases.
+
+    Stops at the first failing case and returns it minimised; nothing is
+    stored.  A run is bounded by ``stress_max_cases`` and
+    ``stress_cpu_budget_sec``; ``budget_exhausted`` tells that the budget ran
+    out before all cases were tried.
+    """
+    if body.task_id not in TASK_REGISTRY:
+        raise HTTPException(status_code=404, detail=f"Task '{body.task_id}' not found")
+    if not _slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=503,
+            detail="Too many stress runs, try again later",
+            headers={"Retry-After": str(math.ceil(settings.stress_cpu_budget_sec))},
+        )
+    try:
+        with admission.judging() if admission is not None else contextlib.nullcontext():
+            report = await asyncio.to_thread(
+                stress_solution,
+                body.task_id,
+                body.user_code,
+                StressSettings(
+                    max_cases=settings.stress_max_cases,
+                    chunk_size=settings.stress_chunk_size,
+                    cpu_budget_sec=settings.stress_cpu_budget_sec,
+                ),
+                pool=pool,
+            )
+    finally:
+        _slots.release()
+
+    ce = report.counterexample
+    return StressOut(
+        verdict=report.verdict,
+        cases=report.cases,
+        seed=report.seed,
+        budget_exhausted=report.budget_exhausted,
+        counterexample=(
+            None
+            if ce is None
+            else CounterexampleOut(
+                params=ce.params,
+                verdict=ce.verdict,
+                message=ce.message,
+                failed_field=ce.failed_field,
+                expected=ce.expected,
+                got=ce.got,
+                profile=ce.profile,
+            )
+        ),
+    )
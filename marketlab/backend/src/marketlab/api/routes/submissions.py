@@ -1,36 +1,172 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import asyncio
+import contextlib
+import json
+import time
+from collections.abc import AsyncIterator
+from typing import Literal
 
-from marketlab.api.schemas import SubmissionIn, SubmissionOut, SubmissionShort
-from marketlab.domain.generator import generate_tests
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from marketlab.api.admission import AdmissionController, admit
+from marketlab.api.deps import (
+    get_admission,
+    get_judge_pool,
+    get_judge_queue,
+    get_submission_writer,
+)
+from marketlab.api.schemas import SubmissionIn, SubmissionOut, SubmissionShort, TestOutcomeOut
+from marketlab.domain.judge.models import JUDGING_VERDICT, PENDING_VERDICT, JudgeReport
 from marketlab.infra.db.models import SubmissionRow
-from marketlab.infra.db.repos import SubmissionRepo
-from marketlab.infra.db.session import get_db
+from marketlab.infra.db.repos import AsyncSubmissionRepo, SubmissionCursor, usage_columns
+from marketlab.infra.db.repos.submission_repo import SUBMISSION_DB_SECONDS
+from marketlab.infra.db.session import get_async_db
+from marketlab.infra.db.write_behind import SubmissionWriteBehind
+from marketlab.infra.judge.runner_pool import JudgeWorkerPool
+from marketlab.usecases.judge_queue import JudgeQueue
 from marketlab.usecases.registry import TASK_REGISTRY
-from marketlab.usecases.submit_solution import SubmitSolutionInput, submit_solution
+from marketlab.usecases.submit_solution import (
+    HIDDEN_TESTS_COUNT,
+    SubmitSolutionInput,
+    submit_solution,
+)
+from marketlab.usecases.test_sets import HIDDEN_TEST_SETS, pick_hidden_seed
 
 router = APIRouter(prefix="/api/v1/submissions", tags=["submissions"])
 
-HIDDEN_TESTS_COUNT = 25
+# Largest history page a client may request.
+MAX_HISTORY_PAGE = 200
+# Response header carrying the cursor of the next history page.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# How often the event stream sends a keep-alive comment while judging is pending.
+EVENTS_KEEPALIVE_SEC = 15.0
+# How often the event stream re-reads a pending submission: it may be judged by
+# another API process, whose queue does not wake this one.
+EVENTS_POLL_SEC = 1.0
+
 
+def _public_verdict(verdict: str) -> str:
+    # Being judged is still pending for clients.
+    return PENDING_VERDICT if verdict == JUDGING_VERDICT else verdict
 
-@router.post("", response_model=SubmissionOut)
-def create_submission(body: SubmissionIn, db: Session = Depends(get_db)) -> SubmissionOut:
-    """Accept user code, run it against generated tests, return verdict and save to DB."""
+
+def _to_out(row: SubmissionRow) -> SubmissionOut:
+    return SubmissionOut(
+        id=row.id,
+        verdict=_public_verdict(row.verdict),
+        passed=row.passed,
+        total=row.total,
+        message=row.message,
+        failed_test_index=row.failed_test_index,
+        failed_field=row.failed_field,
+        created_at=row.created_at,
+        cpu_time_ms=row.cpu_time_ms,
+        wall_time_ms=row.wall_time_ms,
+        max_test_time_ms=row.max_test_time_ms,
+        peak_rss_kb=row.peak_rss_kb,
+    )
+
+
+def _tests_out(report: JudgeReport) -> list[TestOutcomeOut]:
+    return [
+        TestOutcomeOut(
+            index=o.index,
+            verdict=o.verdict,
+            message=o.message,
+            failed_field=o.failed_field,
+            expected=o.expected,
+            got=o.got,
+            time_ms=o.time_ms,
+        )
+        for o in report.tests
+    ]
+
+
+@router.post(
+    "",
+    response_model=SubmissionOut,
+    responses={
+        202: {"model": SubmissionOut, "description": "Accepted for async judging"},
+        429: {"description": "Rate limit exceeded; see Retry-After"},
+        503: {"description": "Judge overloaded; see Retry-After"},
+    },
+    dependencies=[Depends(admit)],
+)
+async def create_submission(
+    body: SubmissionIn,
+    response: Response,
+    run_async: bool = Query(False, alias="async"),
+    report_mode: Literal["short", "full"] = Query("short", alias="report"),
+    db: AsyncSession = Depends(get_async_db),
+    pool: JudgeWorkerPool | None = Depends(get_judge_pool),
+    queue: JudgeQueue | None = Depends(get_judge_queue),
+    writer: SubmissionWriteBehind | None = Depends(get_submission_writer),
+    admission: AdmissionController | None = Depends(get_admission),
+) -> SubmissionOut:
+    """
+    Accept user code, run it against generated tests, return verdict and save to DB.
+
+    With ``?async=true`` the submission is stored as PENDING, queued for the
+    background judge and answered with 202; poll ``GET /{id}`` or stream
+    ``GET /{id}/events`` for the verdict.
+
+    With ``?report=full`` every test is run and the response lists per-test
+    verdicts with expected/actual outputs instead of stopping at the first
+    failure.
+    """
     if body.task_id not in TASK_REGISTRY:
         raise HTTPException(status_code=404, detail=f"Task '{body.task_id}' not found")
+    full_report = report_mode == "full"
+    if run_async and full_report:
+        raise HTTPException(
+            status_code=422, detail="report=full is only available for synchronous submissions"
+        )
 
-    tests = generate_tests(body.task_id, n=HIDDEN_TESTS_COUNT)
+    repo = AsyncSubmissionRepo(db)
+    test_set = await HIDDEN_TEST_SETS.aget(
+        body.task_id, seed=pick_hidden_seed(), n=HIDDEN_TESTS_COUNT, db=db
+    )
 
-    report = submit_solution(
-        SubmitSolutionInput(
+    if run_async:
+        if queue is None:
+            raise HTTPException(status_code=503, detail="Async judging is not enabled")
+        row = SubmissionRow(
             task_id=body.task_id,
             user_code=body.user_code,
-            tests=tests,
+            verdict=PENDING_VERDICT,
+            passed=0,
+            total=len(test_set.tests),
+            message="",
+            test_set_id=test_set.key,
+        )
+        await repo.create(row)
+        with SUBMISSION_DB_SECONDS.labels("commit").time():
+            await db.commit()
+        queue.enqueue(row.id)
+        response.status_code = 202
+        return _to_out(row)
+
+    # Release the connection while judging; the verdict is written in a new transaction.
+    await db.commit()
+    # Judging blocks (in-process run or waiting on a pool worker), so keep it
+    # off the event loop.
+    with admission.judging() if admission is not None else contextlib.nullcontext():
+        report = await asyncio.to_thread(
+            submit_solution,
+            SubmitSolutionInput(
+                task_id=body.task_id,
+                user_code=body.user_code,
+                tests=test_set.packed,
+                expected=test_set.expected,
+                test_set_digest=test_set.digest,
+            ),
+            pool=pool,
+            full_report=full_report,
         )
-    )
 
     # Persist to database.
     row = SubmissionRow(
@@ -40,44 +176,110 @@ def create_submission(body: SubmissionIn, db: Session = Depends(get_db)) -> Subm
         passed=report.passed,
         total=report.total,
         message=report.message,
-    )
-    repo = SubmissionRepo(db)
-    repo.create(row)
-    db.commit()
-
-    return SubmissionOut(
-        id=row.id,
-        verdict=report.verdict,
-        passed=report.passed,
-        total=report.total,
-        message=report.message,
         failed_test_index=report.failed_test_index,
         failed_field=report.failed_field,
-        created_at=row.created_at,
+        test_set_id=test_set.key,
+        **usage_columns(report),
     )
+    if writer is not None:
+        writer.add(row)
+    else:
+        await repo.create(row)
+        with SUBMISSION_DB_SECONDS.labels("commit").time():
+            await db.commit()
+
+    out = _to_out(row)
+    if full_report:
+        out.tests = _tests_out(report)
+    return out
 
 
 @router.get("", response_model=list[SubmissionShort])
-def list_submissions(
+async def list_submissions(
+    response: Response,
     task_id: str | None = None,
-    limit: int = 50,
-    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=MAX_HISTORY_PAGE),
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_db),
 ) -> list[SubmissionShort]:
-    """Return submission history, optionally filtered by task_id."""
-    repo = SubmissionRepo(db)
+    """
+    Return submission history, newest first, optionally filtered by task_id.
+
+    When more entries exist the response carries an ``X-Next-Cursor`` header;
+    pass its value back as ``?cursor=`` to fetch the next page.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            after = SubmissionCursor.decode(cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    # One extra row tells whether there is a next page.
+    repo = AsyncSubmissionRepo(db)
     if task_id:
-        rows = repo.list_by_task(task_id, limit=limit)
+        rows = await repo.list_by_task(task_id, limit=limit + 1, after=after)
     else:
-        rows = repo.list_recent(limit=limit)
+        rows = await repo.list_recent(limit=limit + 1, after=after)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = SubmissionCursor.after(rows[-1]).encode()
 
     return [
         SubmissionShort(
             id=r.id,
             task_id=r.task_id,
-            verdict=r.verdict,
+            verdict=_public_verdict(r.verdict),
             passed=r.passed,
             total=r.total,
             created_at=r.created_at,
         )
         for r in rows
     ]
+
+
+@router.get("/{submission_id}", response_model=SubmissionOut)
+async def get_submission(
+    submission_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    writer: SubmissionWriteBehind | None = Depends(get_submission_writer),
+) -> SubmissionOut:
+    """Return one submission; ``verdict`` is PENDING until the judge has finished."""
+    row = writer.get_pending(submission_id) if writer is not None else None
+    if row is None:
+        row = await AsyncSubmissionRepo(db).get_by_id(submission_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Submission '{submission_id}' not found")
+    return _to_out(row)
+
+
+@router.get("/{submission_id}/events")
+async def stream_submission(
+    submission_id: str,
+    queue: JudgeQueue | None = Depends(get_judge_queue),
+) -> StreamingResponse:
+    """Server-Sent Events stream that emits one ``verdict`` event with the final result."""
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Async judging is not enabled")
+    row = await queue.load(submission_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Submission '{submission_id}' not found")
+
+    async def events() -> AsyncIterator[str]:
+        current = row
+        keepalive_at = 0.0
+        while current is not None and current.verdict in (PENDING_VERDICT, JUDGING_VERDICT):
+            if time.monotonic() >= keepalive_at:
+                yield ": pending\n\n"
+                keepalive_at = time.monotonic() + EVENTS_KEEPALIVE_SEC
+            await queue.wait_for(submission_id, timeout=EVENTS_POLL_SEC)
+            current = await queue.load(submission_id)
+        if current is not None:
+            payload = json.dumps(_to_out(current).model_dump(mode="json"))
+            yield f"event: verdict\ndata: {payload}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
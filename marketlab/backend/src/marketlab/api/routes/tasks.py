@@ -1,52 +1,25 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 
-from marketlab.api.schemas import FieldOut, TaskDetail, TaskShort
-from marketlab.domain.generator import generate_tests
-from marketlab.usecases.registry import TASK_REGISTRY
+from marketlab.api.catalogue import cached_json_response, get_task_catalogue
+from marketlab.api.schemas import TaskDetail, TaskShort
 
 router = APIRouter(prefix="/api/v1/tasks", tags=["tasks"])
 
+_NOT_MODIFIED = {304: {"description": "Unchanged since the ETag in If-None-Match"}}
 
-@router.get("", response_model=list[TaskShort])
-def list_tasks() -> list[TaskShort]:
+
+@router.get("", response_model=list[TaskShort], responses=_NOT_MODIFIED)
+async def list_tasks(request: Request) -> Response:
     """Return the catalogue of all available tasks."""
-    out: list[TaskShort] = []
-    for task_id, (spec, _solver) in TASK_REGISTRY.items():
-        out.append(
-            TaskShort(
-                id=spec.id,
-                title=spec.title,
-                topic=spec.topic,
-            )
-        )
-    return out
-
-
-@router.get("/{task_id}", response_model=TaskDetail)
-def get_task(task_id: str) -> TaskDetail:
+    return cached_json_response(request, get_task_catalogue().tasks)
+
+
+@router.get("/{task_id}", response_model=TaskDetail, responses=_NOT_MODIFIED)
+async def get_task(task_id: str, request: Request) -> Response:
     """Return full task specification + one public test."""
-    entry = TASK_REGISTRY.get(task_id)
-    if entry is None:
+    cached = get_task_catalogue().detail(task_id)
+    if cached is None:
         raise HTTPException(status_code=404, detail=f"Task '{task_id}' not found")
-
-    spec, _solver = entry
-
-    tests = generate_tests(task_id, n=1, seed=0)
-    public_test = tests[0] if tests else {}
-
-    return TaskDetail(
-        id=spec.id,
-        title=spec.title,
-        topic=spec.topic,
-        input_fields=[
-            FieldOut(name=f.name, type=f.type, description=f.description)
-            for f in spec.input_fields
-        ],
-        output_fields=[
-            FieldOut(name=f.name, type=f.type, description=f.description)
-            for f in spec.output_fields
-        ],
-        public_test=public_test,
-    )
+    return cached_json_response(request, cached)
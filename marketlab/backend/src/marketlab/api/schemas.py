@@ -44,6 +44,17 @@ class SubmissionIn(BaseModel):
     user_code: str = Field(..., min_length=1, max_length=50_000)
 
 
+class TestOutcomeOut(BaseModel):
+    """One test of a full report; inputs of hidden tests stay hidden."""
+    index: int
+    verdict: str
+    message: str = ""
+    failed_field: str | None = None
+    expected: dict[str, float] | None = None
+    got: dict[str, float] | None = None
+    time_ms: float = 0.0
+
+
 class SubmissionOut(BaseModel):
     id: str | None = None
     verdict: str
@@ -53,6 +64,12 @@ class SubmissionOut(BaseModel):
     failed_test_index: int | None = None
     failed_field: str | None = None
     created_at: datetime | None = None
+    # Resource usage of the judge run (unset while pending).
+    cpu_time_ms: float | None = None
+    wall_time_ms: float | None = None
+    max_test_time_ms: float | None = None
+    peak_rss_kb: int | None = None
+    tests: list[TestOutcomeOut] | None = None  # only with ?report=full
 
 
 class SubmissionShort(BaseModel):
@@ -63,3 +80,32 @@ class SubmissionShort(BaseModel):
     passed: int
     total: int
     created_at: datetime
+
+
+class CounterexampleOut(BaseModel):
+    """Minimised failing input of a stress run; unlike hidden tests it is shown in full."""
+    params: dict
+    verdict: str
+    message: str = ""
+    failed_field: str | None = None
+    expected: dict[str, float] | None = None
+    got: dict[str, float] | None = None
+    profile: str = ""
+
+
+class StressOut(BaseModel):
+    verdict: str
+    cases: int
+    seed: int
+    budget_exhausted: bool = False
+    counterexample: CounterexampleOut | None = None
+
+
+class RejudgeOut(BaseModel):
+    """Progress of re-judging a task's stored submissions."""
+    task_id: str
+    state: str  # running | done | stopped | failed
+    scanned: int
+    judged: int
+    updated: int
+    error: str | None = None
@@ -25,7 +25,9 @@ from .models import (
 )
 from .equilibrium import (
     Equilibrium,
+    EquilibriumBatch,
     compute_equilibrium,
+    compute_equilibrium_batch,
 )
 
 __all__ = [
@@ -39,5 +41,7 @@ __all__ = [
     "MarketPolicy",
     # services
     "Equilibrium",
+    "EquilibriumBatch",
     "compute_equilibrium",
+    "compute_equilibrium_batch",
 ]
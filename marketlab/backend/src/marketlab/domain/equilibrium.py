@@ -1,6 +1,9 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from .errors import NoEquilibriumError
+
+import numpy as np
+
+from .kernel import MODE_CODES, equilibrium_batch, equilibrium_unchecked, mode_codes
 from .models import LinearDemand, LinearSupply, MarketPolicy
 
 
@@ -27,26 +30,64 @@ def compute_equilibrium(
         Qd(P) = a - bP
         Qs(Pp) = c + d*Pp
     """
-    a, b = demand.a, demand.b
-    c, d = supply.c, supply.d
-    t = policy.t
-
-    # Solve: a - bP = c + d*(P - t)  for tax
-    #        a - bP = c + d*(P + t)  for subsidy
-    #        a - bP = c + d*P        for none
-    if policy.mode == "none":
-        denom = b + d
-        p = (a - c) / denom
-    elif policy.mode == "tax":
-        denom = b + d
-        p = (a - c + d * t) / denom
-    else:  # subsidy
-        denom = b + d
-        p = (a - c - d * t) / denom
-
-    q = demand.quantity(p)
-
-    if p <= 0 or q <= 0:
-        raise NoEquilibriumError("Equilibrium must satisfy P*>0 and Q*>0 for this task family.")
-
+    # The objects are validated on construction; solve on their plain fields.
+    p, q = equilibrium_unchecked(
+        demand.a, demand.b, supply.c, supply.d, MODE_CODES[policy.mode], policy.t
+    )
     return Equilibrium(p=p, q=q)
+
+
+@dataclass(frozen=True, slots=True)
+class EquilibriumBatch:
+    """
+    Column-wise equilibria.
+
+    ``params_ok`` is False where building the domain objects would raise
+    InvalidParameterError, ``has_equilibrium`` is False where
+    compute_equilibrium would raise NoEquilibriumError.  ``p``/``q`` are NaN
+    on rows that are not ``valid``.
+    """
+
+    p: np.ndarray
+    q: np.ndarray
+    params_ok: np.ndarray
+    has_equilibrium: np.ndarray
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.params_ok & self.has_equilibrium
+
+
+def compute_equilibrium_batch(
+    a: np.ndarray,
+    b: np.ndarray,
+    c: np.ndarray,
+    d: np.ndarray,
+    mode: np.ndarray,
+    t: np.ndarray,
+) -> EquilibriumBatch:
+    """
+    Vectorised compute_equilibrium over equally sized 1-D arrays.
+
+    ``mode`` holds the strings 'none' | 'tax' | 'subsidy', or their kernel
+    codes (an integer array, see ``kernel.mode_codes``).  Valid rows give
+    bit-identical results to the scalar path (see ``kernel``).
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    c = np.asarray(c, dtype=np.float64)
+    d = np.asarray(d, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)
+    mode = np.asarray(mode)
+    if mode.dtype.kind not in "iu":
+        mode = mode_codes(mode)
+
+    p, q, params_ok, has_equilibrium = equilibrium_batch(a, b, c, d, mode, t)
+    valid = params_ok & has_equilibrium
+    nan = np.float64("nan")
+    return EquilibriumBatch(
+        p=np.where(valid, p, nan),
+        q=np.where(valid, q, nan),
+        params_ok=params_ok,
+        has_equilibrium=has_equilibrium,
+    )
@@ -1,85 +1,74 @@
+"""
+Test generation per task.
+
+A test set is the first ``n`` tests of the sequence of ``(task_id, seed)``.
+Test ``i`` of that sequence depends on nothing else, so ``generate_test``
+produces it in O(1) and ``start`` slices can be generated in parallel and
+concatenated into exactly the full set.
+"""
+
 from __future__ import annotations
 
-import random
+import hashlib
 from typing import Any
 
-from marketlab.usecases.registry import TASK_REGISTRY
-
+from marketlab.domain.sampling import GeneratorSpec, columns_to_tests, sample_columns
+from marketlab.domain.task_loader import TASKS
+from marketlab.domain.tasks import Columns
 
-def generate_tests(
-    task_id: str,
-    *,
-    n: int = 25,
-    seed: int | None = None,
-) -> list[dict[str, Any]]:
 
-    gen = _GENERATORS.get(task_id)
-    if gen is None:
+def generator_spec(task_id: str) -> GeneratorSpec:
+    if task_id not in TASKS:
         raise ValueError(f"No test generator registered for task '{task_id}'")
+    return TASKS[task_id].generator
 
-    spec, oracle = TASK_REGISTRY[task_id]
 
-    return gen(oracle=oracle, n=n, seed=seed)
+def _task_seed(task_id: str, seed: int | None) -> int | None:
+    # Tasks sharing a seed still get unrelated sequences.
+    if seed is None:
+        return None
+    digest = hashlib.sha256(f"{task_id}:{seed}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
 
 
-def _gen_equilibrium_linear(
-    *,
-    oracle,
-    n: int,
-    seed: int | None,
-) -> list[dict[str, Any]]:
-    rng = random.Random(seed)
-
-    public_test: dict[str, Any] = {
-        "a": 120.0,
-        "b": 3.0,
-        "c": -10.0,
-        "d": 2.0,
-        "mode": "tax",
-        "t": 10.0,
-    }
+def generate_columns(
+    task_id: str, *, n: int = 25, seed: int | None = None, start: int = 0
+) -> Columns:
+    """
+    Tests ``start`` .. ``start + n - 1`` as NumPy columns (field name ->
+    array); the fast path for large sets.
+    """
+    return sample_columns(generator_spec(task_id), n=n, seed=_task_seed(task_id, seed), start=start)
 
-    tests: list[dict[str, Any]] = [public_test]
-    modes = ("none", "tax", "subsidy")
 
-    forced_modes = list(modes)
-    rng.shuffle(forced_modes)
-
-    attempts = 0
-    max_attempts = n * 20
-
-    while len(tests) < n and attempts < max_attempts:
-        attempts += 1
-
-        if forced_modes:
-            mode = forced_modes.pop()
-        else:
-            mode = rng.choice(modes)
-
-        a = round(rng.uniform(20, 300), 2)
-        b = round(rng.uniform(0.5, 10), 2)
-        d = round(rng.uniform(0.5, 10), 2)
-        c = round(rng.uniform(-100, a * 0.4), 2)
-
-        if mode == "none":
-            t = 0.0
-        else:
-            t = round(rng.uniform(1, 30), 2)
+def generate_tests(
+    task_id: str,
+    *,
+    n: int = 25,
+    seed: int | None = None,
+    start: int = 0,
+) -> list[dict[str, Any]]:
+    spec = generator_spec(task_id)
+    cols = sample_columns(spec, n=n, seed=_task_seed(task_id, seed), start=start)
+    # Input field order of the public example, whatever order the fields are drawn in.
+    order = spec.public_tests[0] if spec.public_tests else cols
+    return columns_to_tests({name: cols[name] for name in order})
 
-        params: dict[str, Any] = {
-            "a": a, "b": b, "c": c, "d": d, "mode": mode, "t": t,
-        }
 
-        try:
-            oracle(params)
-        except Exception:
-            continue
+def generate_test(task_id: str, index: int, *, seed: int) -> dict[str, Any]:
+    """Test ``index`` of the seed's set, without generating the tests before it."""
+    tests = generate_tests(task_id, n=1, seed=seed, start=index)
+    if not tests:
+        raise ValueError(f"Generator of task '{task_id}' found no feasible test #{index}")
+    return tests[0]
 
-        tests.append(params)
 
-    return tests
+def generator_version(task_id: str) -> int:
+    generator_spec(task_id)
+    return TASKS[task_id].generator_version
 
 
-_GENERATORS = {
-    "equilibrium_linear_v1": _gen_equilibrium_linear,
-}
+def stress_profiles(task_id: str) -> tuple[tuple[str, GeneratorSpec], ...]:
+    """Named generator specs for stress judging; the regular generator if none are declared."""
+    generator = generator_spec(task_id)
+    return TASKS[task_id].stress_profiles or (("random", generator),)
@@ -1,3 +1,21 @@
-from .models import JudgeReport, Verdict
+from .models import (
+    JUDGING_VERDICT,
+    PENDING_VERDICT,
+    Counterexample,
+    JudgeReport,
+    ResourceUsage,
+    StressReport,
+    TestOutcome,
+    Verdict,
+)
 
-__all__ = ["JudgeReport", "Verdict"]
+__all__ = [
+    "JUDGING_VERDICT",
+    "PENDING_VERDICT",
+    "Counterexample",
+    "JudgeReport",
+    "ResourceUsage",
+    "StressReport",
+    "TestOutcome",
+    "Verdict",
+]
@@ -3,7 +3,37 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Literal
 
-Verdict = Literal["AC", "WA", "RE", "TLE"]
+Verdict = Literal["AC", "WA", "RE", "TLE", "MLE"]
+
+# Stored on a submission that has been accepted but not judged yet.
+PENDING_VERDICT = "PENDING"
+# Stored while one judge queue consumer has claimed the submission; shown as PENDING.
+JUDGING_VERDICT = "JUDGING"
+
+
+@dataclass(frozen=True, slots=True)
+class ResourceUsage:
+    """What judging one submission cost in the judge process."""
+
+    cpu_time_ms: float
+    wall_time_ms: float
+    max_test_time_ms: float  # slowest single solve() call
+    peak_rss_kb: int | None = None  # None where the OS does not report it
+
+
+@dataclass(frozen=True, slots=True)
+class TestOutcome:
+    """Result of one test in a full-report run."""
+
+    __test__ = False  # not a pytest test class
+
+    index: int
+    verdict: Verdict
+    message: str = ""
+    failed_field: str | None = None
+    expected: dict[str, float] | None = None
+    got: dict[str, float] | None = None
+    time_ms: float = 0.0  # wall time of the solve() call
 
 
 @dataclass(frozen=True, slots=True)
@@ -14,3 +44,30 @@ class JudgeReport:
     message: str = ""
     failed_test_index: int | None = None
     failed_field: str | None = None
+    # Per-test outcomes; only filled in full-report mode.
+    tests: tuple[TestOutcome, ...] = ()
+    usage: ResourceUsage | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class Counterexample:
+    """Smallest failing input found by a stress run."""
+
+    params: dict[str, object]
+    verdict: Verdict
+    message: str = ""
+    failed_field: str | None = None
+    expected: dict[str, float] | None = None
+    got: dict[str, float] | None = None
+    profile: str = ""  # stress family the original failing case came from
+    shrink_steps: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class StressReport:
+    # AC when no counterexample was found within the case limit / CPU budget.
+    verdict: Verdict
+    cases: int
+    seed: int
+    budget_exhausted: bool = False
+    counterexample: Counterexample | None = None
@@ -0,0 +1,119 @@
+"""
+Low-level equilibrium kernel on plain floats.
+
+The object API (``LinearDemand`` / ``LinearSupply`` / ``MarketPolicy`` +
+``compute_equilibrium``) validates by constructing frozen dataclasses,
+which dominates the cost of one oracle call.  The functions here do the
+same checks and the same arithmetic on plain floats, with the policy mode
+resolved once to a small integer (``MODE_CODES``) so no call compares
+strings.  The scalar and batch paths evaluate the same expressions, so
+their results (including NaN/inf inputs and which rows raise) agree bit
+for bit:
+
+    P* = (a - c [+ d*t for tax | - d*t for subsidy]) / (b + d),  Q* = a - b * P*
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from .errors import InvalidParameterError, NoEquilibriumError
+
+MODE_NONE = 0
+MODE_TAX = 1
+MODE_SUBSIDY = 2
+# Any other code is an invalid mode; ``mode_code`` returns this one.
+MODE_INVALID = -1
+
+MODE_CODES: dict[str, int] = {"none": MODE_NONE, "tax": MODE_TAX, "subsidy": MODE_SUBSIDY}
+
+_NO_EQUILIBRIUM = "Equilibrium must satisfy P*>0 and Q*>0 for this task family."
+
+
+def mode_code(mode: str) -> int:
+    return MODE_CODES.get(mode, MODE_INVALID)
+
+
+def mode_codes(mode: np.ndarray) -> np.ndarray:
+    """Vectorised ``mode_code`` over an array of mode strings."""
+    mode = np.asarray(mode)
+    codes = np.full(mode.shape, MODE_INVALID, dtype=np.int8)
+    for name, code in MODE_CODES.items():
+        codes[mode == name] = code
+    return codes
+
+
+def equilibrium_unchecked(
+    a: float, b: float, c: float, d: float, mode: int, t: float
+) -> tuple[float, float]:
+    """``(P*, Q*)`` for parameters already known to be valid; raises NoEquilibriumError."""
+    if mode == MODE_TAX:
+        p = (a - c + d * t) / (b + d)
+    elif mode == MODE_SUBSIDY:
+        p = (a - c - d * t) / (b + d)
+    else:
+        p = (a - c) / (b + d)
+    q = a - b * p
+    if p <= 0 or q <= 0:
+        raise NoEquilibriumError(_NO_EQUILIBRIUM)
+    return p, q
+
+
+def equilibrium(a: float, b: float, c: float, d: float, mode: int, t: float) -> tuple[float, float]:
+    """
+    ``(P*, Q*)``, validating like the object API.
+
+    Raises InvalidParameterError / NoEquilibriumError exactly where building
+    the domain objects / compute_equilibrium would.
+    """
+    # Same checks, messages and order as LinearDemand / LinearSupply / MarketPolicy.
+    if a <= 0:
+        raise InvalidParameterError("Demand parameter 'a' must be > 0.")
+    if b <= 0:
+        raise InvalidParameterError("Demand parameter 'b' must be > 0.")
+    if d <= 0:
+        raise InvalidParameterError("Supply parameter 'd' must be > 0.")
+    if not 0 <= mode <= MODE_SUBSIDY:
+        raise InvalidParameterError("Policy mode must be 'none', 'tax', or 'subsidy'.")
+    if t < 0:
+        raise InvalidParameterError("Policy parameter 't' must be >= 0.")
+    if mode == MODE_NONE and t != 0:
+        raise InvalidParameterError("For mode='none', parameter 't' must be 0.")
+    return equilibrium_unchecked(a, b, c, d, mode, t)
+
+
+def equilibrium_batch(
+    a: np.ndarray,
+    b: np.ndarray,
+    c: np.ndarray,
+    d: np.ndarray,
+    mode: np.ndarray,
+    t: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Column-wise ``equilibrium`` over float64 arrays and mode codes.
+
+    Returns ``(p, q, params_ok, has_equilibrium)``: ``params_ok`` is False
+    where ``equilibrium`` would raise InvalidParameterError,
+    ``has_equilibrium`` where it would raise NoEquilibriumError.  ``p`` and
+    ``q`` are raw (not masked) on invalid rows.
+    """
+    # Negated comparisons, like the scalar checks, so NaN rows behave alike.
+    params_ok = (
+        ~(a <= 0)
+        & ~(b <= 0)
+        & ~(d <= 0)
+        & (mode >= 0)
+        & (mode <= MODE_SUBSIDY)
+        & ~(t < 0)
+        & ~((mode == MODE_NONE) & (t != 0))
+    )
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        base = a - c
+        wedge = d * t
+        numerator = np.where(
+            mode == MODE_TAX, base + wedge, np.where(mode == MODE_SUBSIDY, base - wedge, base)
+        )
+        p = numerator / (b + d)
+        q = a - b * p
+    return p, q, params_ok, ~((p <= 0) | (q <= 0))
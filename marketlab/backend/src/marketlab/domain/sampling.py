@@ -0,0 +1,318 @@
+"""
+Declarative, vectorised test generation.
+
+A task describes its inputs as a ``GeneratorSpec``: one distribution per
+input field (later fields may depend on earlier ones) and feasibility
+constraints given as column-wise predicates.  The engine draws whole blocks
+of candidates with NumPy, keeps the rows every constraint accepts and
+guarantees that each value of the ``cover`` field appears at least once.
+
+Randomness is counter-based: test ``i`` of a seed is drawn from its own
+SplitMix64 stream keyed by ``(seed, i)`` (and by the candidate number when
+constraints reject a candidate), never from a shared sequential generator.
+Any test index is therefore produced in O(1), and a large set generated in
+shards, in any order or in parallel, is bit-identical to the same set
+generated in one go.
+
+Everything stays column-oriented until ``columns_to_tests``, so large sets
+(stress runs, big hidden sets) cost a few array operations per block.
+"""
+
+from __future__ import annotations
+
+import secrets
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from marketlab.domain.tasks import Columns, Params
+
+# Column-wise function of the fields drawn so far (bounds, conditions, constraints).
+ColumnFn = Callable[[Columns], np.ndarray]
+Bound = float | ColumnFn
+
+# Smallest candidate block worth a round of NumPy calls.
+MIN_BLOCK_SIZE = 256
+# Give up on a test (returning fewer tests) once this many of its candidates were rejected.
+MAX_DRAWS_PER_TEST = 20
+
+_GAMMA = np.uint64(0x9E3779B97F4A7C15)  # SplitMix64 increment
+_ATTEMPT = np.uint64(0xD1B54A32D192ED03)  # separates the candidate streams of a test
+_COVER = np.uint64(0x8CB92BA72F3D8DD7)  # separates the cover order from the test streams
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    """SplitMix64 finaliser over a uint64 array (arithmetic wraps mod 2**64)."""
+    x = x ^ (x >> np.uint64(30))
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return x
+
+
+class CounterRNG:
+    """
+    The ``np.random.Generator`` calls distributions make, with one stream
+    per row: value ``k`` of a row is ``mix(row key + k * gamma)``, so a row
+    never depends on the other rows of the block.
+    """
+
+    __slots__ = ("_keys", "_calls")
+
+    def __init__(self, keys: np.ndarray) -> None:
+        self._keys = keys
+        self._calls = 0
+
+    def _bits(self, size: int) -> np.ndarray:
+        if size != len(self._keys):
+            raise ValueError(f"Expected {len(self._keys)} values per draw, got size={size}")
+        self._calls += 1
+        return _mix64(self._keys + np.uint64(self._calls * int(_GAMMA) % 2**64))
+
+    def random(self, size: int) -> np.ndarray:
+        """Floats in [0, 1) with 53 random bits."""
+        return (self._bits(size) >> np.uint64(11)) * 2.0**-53
+
+    def uniform(self, low: Any, high: Any, size: int) -> np.ndarray:
+        return low + (high - low) * self.random(size)
+
+    def integers(self, low: int, high: int, size: int) -> np.ndarray:
+        return low + (self.random(size) * (high - low)).astype(np.int64)
+
+
+@dataclass(frozen=True, slots=True)
+class Uniform:
+    low: Bound
+    high: Bound
+    decimals: int | None = None
+
+    def sample(self, rng: CounterRNG, size: int, cols: Columns) -> np.ndarray:
+        low = self.low(cols) if callable(self.low) else self.low
+        high = self.high(cols) if callable(self.high) else self.high
+        values = rng.uniform(low, high, size)
+        return values if self.decimals is None else np.round(values, self.decimals)
+
+
+@dataclass(frozen=True, slots=True)
+class Choice:
+    values: tuple[Any, ...]
+
+    def sample(self, rng: CounterRNG, size: int, cols: Columns) -> np.ndarray:
+        return np.asarray(self.values)[rng.integers(0, len(self.values), size)]
+
+
+@dataclass(frozen=True, slots=True)
+class Const:
+    value: Any
+
+    def sample(self, rng: CounterRNG, size: int, cols: Columns) -> np.ndarray:
+        return np.full(size, self.value)
+
+
+@dataclass(frozen=True, slots=True)
+class Where:
+    """``then`` where ``condition`` holds, ``otherwise`` elsewhere."""
+
+    condition: ColumnFn
+    then: Distribution
+    otherwise: Distribution
+
+    def sample(self, rng: CounterRNG, size: int, cols: Columns) -> np.ndarray:
+        return np.where(
+            self.condition(cols),
+            self.then.sample(rng, size, cols),
+            self.otherwise.sample(rng, size, cols),
+        )
+
+
+Distribution = Uniform | Choice | Const | Where
+
+
+@dataclass(frozen=True, slots=True)
+class Constraint:
+    name: str
+    holds: ColumnFn  # boolean mask over a block of candidates
+
+
+@dataclass(frozen=True, slots=True)
+class GeneratorSpec:
+    params: tuple[tuple[str, Distribution], ...]
+    constraints: tuple[Constraint, ...] = ()
+    # Field whose every Choice value must occur in a generated set (if n allows).
+    cover: str | None = None
+    # Fixed tests placed first; the first one is shown to users as the example.
+    public_tests: tuple[Params, ...] = ()
+
+    @property
+    def fields(self) -> tuple[str, ...]:
+        return tuple(name for name, _dist in self.params)
+
+
+def _sample_block(
+    spec: GeneratorSpec, rng: CounterRNG, size: int, cover: np.ndarray | None
+) -> Columns:
+    """``cover``: per row, the index of the cover value forced on it, or -1."""
+    cols: Columns = {}
+    for name, dist in spec.params:
+        cols[name] = dist.sample(rng, size, cols)
+        if cover is not None and name == spec.cover:
+            # Drawn anyway, so later fields use the same stream positions in every row.
+            forced = np.flatnonzero(cover >= 0)
+            cols[name][forced] = np.asarray(_cover_values(spec))[cover[forced]]
+    return cols
+
+
+def _feasible(spec: GeneratorSpec, cols: Columns, size: int) -> np.ndarray:
+    mask = np.ones(size, dtype=bool)
+    for constraint in spec.constraints:
+        mask &= constraint.holds(cols)
+    return mask
+
+
+def _draw(spec: GeneratorSpec, row_keys: np.ndarray, cover: np.ndarray | None = None) -> Columns:
+    """
+    The first feasible candidate of every row (``cover`` as in ``_sample_block``).
+
+    Candidate ``k`` of a row comes from its own stream (row key, k), so
+    which rows share a block, and how many candidates of a row are tried at
+    once, changes nothing but the speed.  Rows without a feasible candidate
+    among the first MAX_DRAWS_PER_TEST are dropped.
+    """
+    out: Columns = {}
+    filled = np.zeros(len(row_keys), dtype=bool)
+    pending = np.arange(len(row_keys))
+    tried = 0
+    while pending.size and tried < MAX_DRAWS_PER_TEST:
+        # Few rows left: try several candidates of each in one block.
+        per_row = min(-(-MIN_BLOCK_SIZE // pending.size), MAX_DRAWS_PER_TEST - tried)
+        size = pending.size * per_row
+        attempts = np.arange(tried, tried + per_row, dtype=np.uint64) * _ATTEMPT
+        rng = CounterRNG(_mix64((row_keys[pending, None] ^ attempts).ravel()))
+        block_cover = None if cover is None else np.repeat(cover[pending], per_row)
+        cols = _sample_block(spec, rng, size, block_cover)
+        ok = _feasible(spec, cols, size)
+        if per_row == 1:
+            picks = np.flatnonzero(ok)
+        else:
+            ok = ok.reshape(pending.size, per_row)
+            ok, picks = ok.any(axis=1), ok.argmax(axis=1)
+            picks = (np.arange(pending.size) * per_row + picks)[ok]
+        accepted = pending[ok]
+        for name, col in cols.items():
+            if name not in out:
+                out[name] = np.empty(len(row_keys), dtype=col.dtype)
+            out[name][accepted] = col[picks]
+        filled[accepted] = True
+        pending = pending[~ok]
+        tried += per_row
+    if pending.size:
+        return {name: col[filled] for name, col in out.items()}
+    return out
+
+
+def _cover_values(spec: GeneratorSpec) -> tuple[Any, ...]:
+    if spec.cover is None:
+        return ()
+    dist = dict(spec.params)[spec.cover]
+    if not isinstance(dist, Choice):
+        raise TypeError(f"Cover field '{spec.cover}' must be drawn from a Choice")
+    return dist.values
+
+
+def _concat(blocks: list[Columns], fields: tuple[str, ...]) -> Columns:
+    if not blocks:
+        return {name: np.empty(0) for name in fields}
+    if len(blocks) == 1:
+        return blocks[0]
+    return {name: np.concatenate([b[name] for b in blocks]) for name in fields}
+
+
+def _stream_key(seed: int | None) -> np.uint64:
+    """64-bit key of a seed's test sequence; a fresh random one for ``seed=None``."""
+    raw = secrets.randbits(64) if seed is None else seed % 2**64
+    return _mix64(np.array([raw], dtype=np.uint64))[0]
+
+
+def _row_keys(key: np.uint64, index: np.ndarray) -> np.ndarray:
+    return _mix64(index.astype(np.uint64) * _GAMMA + key)
+
+
+def sample_columns(
+    spec: GeneratorSpec, *, n: int, seed: int | None = None, start: int = 0
+) -> Columns:
+    """
+    Tests ``start`` .. ``start + n - 1`` of the seed's sequence as NumPy columns.
+
+    The sequence opens with the public tests, then one generated test per
+    cover value (in a seed-dependent order), then free ones.  Each test
+    depends on nothing but ``(seed, index)``: a slice costs only its own
+    rows and shards concatenate to exactly the unsharded set.
+    """
+    public = spec.public_tests[start : start + n]
+    blocks: list[Columns] = []
+    if public:
+        blocks.append({name: np.asarray([t[name] for t in public]) for name in spec.fields})
+
+    # Generated tests are numbered from 0 after the public ones.
+    first = max(start - len(spec.public_tests), 0)
+    stop = start + n - len(spec.public_tests)
+    if stop > first:
+        key = _stream_key(seed)
+        index = np.arange(first, stop)
+        cover = None
+        values = _cover_values(spec)
+        if first < len(values):
+            # The first generated tests take the cover values in a seed-dependent order.
+            order = np.argsort(_row_keys(key ^ _COVER, np.arange(len(values))))
+            cover = np.full(len(index), -1, dtype=np.intp)
+            head = index[index < len(values)]
+            cover[: len(head)] = order[head]
+        blocks.append(_draw(spec, _row_keys(key, index), cover))
+    return _concat(blocks, spec.fields)
+
+
+def _admit(dist: Distribution, value: Any, cols: Columns) -> tuple[bool, Any]:
+    """Whether ``dist`` can draw ``value`` in this row, and the value (a Const's own)."""
+    if isinstance(dist, Const):
+        return True, dist.value
+    if isinstance(dist, Choice):
+        return value in dist.values, value
+    if isinstance(dist, Where):
+        branch = dist.then if np.all(dist.condition(cols)) else dist.otherwise
+        return _admit(branch, value, cols)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False, value
+    low = dist.low(cols) if callable(dist.low) else dist.low
+    high = dist.high(cols) if callable(dist.high) else dist.high
+    return bool(np.all(low <= value) and np.all(value <= high)), value
+
+
+def conform(spec: GeneratorSpec, params: Params) -> Params | None:
+    """
+    ``params`` as a test of ``spec``: fields the spec fixes (a ``Const``,
+    also under a ``Where``) take their value, so a changed field drags the
+    fields depending on it along.  None if a field lies outside its
+    distribution's range or a constraint rejects the row.
+    """
+    cols: Columns = {}
+    out = dict(params)
+    for name, dist in spec.params:
+        if name not in params:
+            return None
+        ok, out[name] = _admit(dist, params[name], cols)
+        if not ok:
+            return None
+        cols[name] = np.asarray([out[name]])
+    if not _feasible(spec, cols, 1).all():
+        return None
+    return out
+
+
+def columns_to_tests(cols: Columns) -> list[Params]:
+    """Row-oriented tests with plain Python values."""
+    names = list(cols)
+    lists = [np.asarray(cols[name]).tolist() for name in names]
+    return [dict(zip(names, row, strict=True)) for row in zip(*lists, strict=True)]
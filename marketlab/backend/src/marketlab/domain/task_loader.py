@@ -0,0 +1,131 @@
+"""
+Lazily loaded task definitions.
+
+Every task lives in its own module (see ``marketlab.tasks``) that defines
+``TASK: TaskDefinition`` with the spec, the oracle and the test generator.
+``TASK_MANIFEST`` maps task ids to those modules and to the title and topic
+of each task, so listing the tasks (the catalogue, the ``tasks`` table)
+costs nothing; a task module (and whatever its solver imports) is only
+imported the first time that task is looked up.
+"""
+
+from __future__ import annotations
+
+import importlib
+import threading
+from collections.abc import Callable, Iterator, MutableMapping
+from dataclasses import dataclass
+
+from marketlab.domain.sampling import GeneratorSpec
+from marketlab.domain.tasks import BatchResult, Columns, Params, Result, TaskSpec
+
+Oracle = Callable[[Params], Result]
+BatchOracle = Callable[[Columns], BatchResult]
+
+
+@dataclass(frozen=True, slots=True)
+class TaskDefinition:
+    spec: TaskSpec
+    solve: Oracle
+    generator: GeneratorSpec
+    # Column-wise oracle; without one the scalar oracle is called per test.
+    solve_batch: BatchOracle | None = None
+    # Bump whenever the generator can produce different tests for the same
+    # seed; cached/persisted test sets are keyed by it.
+    generator_version: int = 1
+    # Named adversarial generators for stress judging.
+    stress_profiles: tuple[tuple[str, GeneratorSpec], ...] = ()
+    # Kind of case a test is (e.g. mode and parameter region); judging runs
+    # the kinds that failed most often in the past first.
+    test_class: Callable[[Params], str] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class TaskEntry:
+    """What is known of a task without importing it; must match its spec."""
+
+    module: str | None  # defines TASK; None for tasks registered in code
+    title: str
+    topic: str
+
+
+# task_id -> module defining TASK, and the spec's title and topic.
+TASK_MANIFEST: dict[str, TaskEntry] = {
+    "equilibrium_linear_v1": TaskEntry(
+        module="marketlab.tasks.equilibrium_linear",
+        title="Равновесие на конкурентном рынке (линейные спрос/предложение) с режимами",
+        topic="equilibrium",
+    ),
+}
+
+
+class TaskLoader(MutableMapping[str, TaskDefinition]):
+    """
+    ``task_id -> TaskDefinition``, importing task modules on first access.
+
+    Membership, iteration, ``len`` and ``entry`` only read the manifest.
+    Assigning a definition registers (or overrides) a task without a module.
+    """
+
+    def __init__(self, manifest: dict[str, TaskEntry]) -> None:
+        self._manifest = dict(manifest)
+        self._loaded: dict[str, TaskDefinition] = {}
+        self._order = list(self._manifest)
+        self._lock = threading.Lock()
+
+    def __getitem__(self, task_id: str) -> TaskDefinition:
+        task = self._loaded.get(task_id)
+        if task is not None:
+            return task
+        entry = self._manifest.get(task_id)
+        if entry is None or entry.module is None:
+            raise KeyError(task_id)
+        module_name = entry.module
+        with self._lock:
+            task = self._loaded.get(task_id)
+            if task is None:
+                task = importlib.import_module(module_name).TASK
+                if task.spec.id != task_id:
+                    raise ValueError(
+                        f"{module_name} defines task '{task.spec.id}', not '{task_id}'"
+                    )
+                self._loaded[task_id] = task
+        return task
+
+    def __setitem__(self, task_id: str, task: TaskDefinition) -> None:
+        with self._lock:
+            if task_id not in self._loaded and task_id not in self._manifest:
+                self._order.append(task_id)
+            self._loaded[task_id] = task
+
+    def __delitem__(self, task_id: str) -> None:
+        with self._lock:
+            if task_id not in self._loaded and task_id not in self._manifest:
+                raise KeyError(task_id)
+            self._loaded.pop(task_id, None)
+            self._manifest.pop(task_id, None)
+            self._order.remove(task_id)
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in self._manifest or task_id in self._loaded
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._order))
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def entry(self, task_id: str) -> TaskEntry:
+        """Title and topic of a task, without importing its module."""
+        task = self._loaded.get(task_id)
+        if task is not None:
+            module = self._manifest[task_id].module if task_id in self._manifest else None
+            return TaskEntry(module=module, title=task.spec.title, topic=task.spec.topic)
+        return self._manifest[task_id]
+
+    def loaded(self) -> frozenset[str]:
+        """Ids of the tasks whose definitions are in memory."""
+        return frozenset(self._loaded)
+
+
+TASKS = TaskLoader(TASK_MANIFEST)
@@ -1,10 +1,13 @@
-from .types import FieldSpec, Params, Result, TaskTopic
+from .types import BatchResult, Columns, FieldSpec, Params, Result, TaskTopic, tests_to_columns
 from .spec import TaskSpec
 
 __all__ = [
+    "BatchResult",
+    "Columns",
     "FieldSpec",
     "Params",
     "Result",
     "TaskTopic",
     "TaskSpec",
+    "tests_to_columns",
 ]
@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Literal
 
+import numpy as np
+
 TaskTopic = Literal[
     "equilibrium",
     "taxes_subsidies",
@@ -25,3 +27,39 @@ class FieldSpec:
 
 Params = dict[str, Any]
 Result = dict[str, float]
+
+# Column-oriented batch of params: input field name -> one value per test.
+Columns = dict[str, Any]
+
+
+@dataclass(frozen=True, slots=True)
+class BatchResult:
+    """
+    Column-oriented oracle output.
+
+    ``values`` maps each output field to an array with one entry per test;
+    ``valid`` is False where the scalar oracle would raise for that test.
+    """
+    values: dict[str, np.ndarray]
+    valid: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def row(self, i: int) -> Result | None:
+        if not self.valid[i]:
+            return None
+        return {name: float(col[i]) for name, col in self.values.items()}
+
+    def rows(self) -> list[Result | None]:
+        names = list(self.values)
+        columns = [self.values[name].tolist() for name in names]
+        return [
+            dict(zip(names, values, strict=True)) if ok else None
+            for ok, *values in zip(self.valid.tolist(), *columns, strict=True)
+        ]
+
+
+def tests_to_columns(tests: list[Params], fields: tuple[FieldSpec, ...]) -> Columns:
+    """Transpose row-oriented tests into columns; missing values become None."""
+    return {f.name: [params.get(f.name) for params in tests] for f in fields}
@@ -5,7 +5,7 @@ from __future__ import annotations
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, Float, Integer, String, Text, func
+from sqlalchemy import DateTime, Float, Index, Integer, String, Text, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -26,23 +26,76 @@ class TaskRow(Base):
     topic: Mapped[str] = mapped_column(String(100), nullable=False)
     difficulty: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
     description: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    # sha256 of the synced fields; the startup sync rewrites a row only when it changes.
+    content_hash: Mapped[str] = mapped_column(
+        String(64), nullable=False, default="", server_default=""
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
 
 
+class AppStateRow(Base):
+    """Small key/value facts about the deployment (e.g. the synced registry fingerprint)."""
+
+    __tablename__ = "app_state"
+
+    key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    value: Mapped[str] = mapped_column(Text, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, onupdate=_utcnow
+    )
+
+
 class SubmissionRow(Base):
     __tablename__ = "submissions"
+    # Fetch server defaults (created_at) on INSERT: async sessions cannot lazy-load them.
+    __mapper_args__ = {"eager_defaults": True}
+    # Keyset pagination of the history, newest first (see SubmissionRepo).
+    __table_args__ = (
+        Index("ix_submissions_created_at_id", "created_at", "id"),
+        Index("ix_submissions_task_id_created_at_id", "task_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4())
     )
-    task_id: Mapped[str] = mapped_column(String(120), nullable=False, index=True)
+    task_id: Mapped[str] = mapped_column(String(120), nullable=False)
     user_code: Mapped[str] = mapped_column(Text, nullable=False)
-    verdict: Mapped[str] = mapped_column(String(10), nullable=False)  # AC|WA|RE|TLE
+    verdict: Mapped[str] = mapped_column(String(10), nullable=False)  # AC|WA|RE|TLE|MLE|PENDING|JUDGING
     passed: Mapped[int] = mapped_column(Integer, nullable=False)
     total: Mapped[int] = mapped_column(Integer, nullable=False)
     message: Mapped[str] = mapped_column(Text, nullable=False, default="")
+    failed_test_index: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    failed_field: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    test_set_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Resource usage of the judge run; NULL while pending and for older rows.
+    cpu_time_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    wall_time_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    max_test_time_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    peak_rss_kb: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # When a judge queue moved the row to JUDGING; older claims count as abandoned.
+    claimed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Set client-side with microseconds so the (created_at, id) history order is
+    # stable and exact on every backend (SQLite's CURRENT_TIMESTAMP has 1 s resolution).
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, default=_utcnow, server_default=func.now()
+    )
+
+
+class TestSetRow(Base):
+    """Hidden tests + oracle answers for one (task, generator version, seed, n)."""
+
+    __test__ = False  # not a pytest test class
+    __tablename__ = "test_sets"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256 of the generation key
+    task_id: Mapped[str] = mapped_column(String(120), nullable=False, index=True)
+    generator_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    seed: Mapped[int] = mapped_column(Integer, nullable=False)
+    n: Mapped[int] = mapped_column(Integer, nullable=False)
+    digest: Mapped[str] = mapped_column(String(64), nullable=False)  # sha256 of payload
+    payload: Mapped[str] = mapped_column(Text, nullable=False)  # JSON {"tests": [...], "expected": [...]}
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
@@ -59,3 +112,13 @@ class UserRow(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
+
+
+class RateLimitBucketRow(Base):
+    """Token bucket of the SQL rate-limit store (see infra/rate_limit.py)."""
+
+    __tablename__ = "rate_limit_buckets"
+
+    key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    tokens: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)  # unix time, seconds
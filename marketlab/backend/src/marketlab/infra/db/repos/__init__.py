@@ -1,4 +1,23 @@
-from .task_repo import TaskRepo
-from .submission_repo import SubmissionRepo
+from .task_repo import AsyncTaskRepo, TaskRepo
+from .submission_repo import (
+    AsyncSubmissionRepo,
+    SubmissionCursor,
+    StoredResult,
+    SubmissionRepo,
+    SubmissionSummary,
+    usage_columns,
+)
+from .test_set_repo import AsyncTestSetRepo, TestSetRepo
 
-__all__ = ["TaskRepo", "SubmissionRepo"]
+__all__ = [
+    "TaskRepo",
+    "SubmissionRepo",
+    "TestSetRepo",
+    "AsyncTaskRepo",
+    "AsyncSubmissionRepo",
+    "AsyncTestSetRepo",
+    "SubmissionCursor",
+    "SubmissionSummary",
+    "StoredResult",
+    "usage_columns",
+]
@@ -1,9 +1,169 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+import base64
+import binascii
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Select, Update, delete, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from marketlab.infra.db.models import SubmissionRow
+from marketlab.domain.judge.models import JUDGING_VERDICT, PENDING_VERDICT, JudgeReport
+from marketlab.infra.db.models import AppStateRow, SubmissionRow
+from marketlab.infra.metrics import REGISTRY
+
+# Timed here (create) and by callers around the commit that persists a verdict.
+SUBMISSION_DB_SECONDS = REGISTRY.histogram(
+    "marketlab_submission_db_seconds", "Writing a submission row.", ("op",)
+)
+
+
+def usage_columns(report: JudgeReport) -> dict[str, float | int | None]:
+    """``SubmissionRow`` resource-usage columns for a judge report."""
+    usage = report.usage
+    return {
+        "cpu_time_ms": usage.cpu_time_ms if usage is not None else None,
+        "wall_time_ms": usage.wall_time_ms if usage is not None else None,
+        "max_test_time_ms": usage.max_test_time_ms if usage is not None else None,
+        "peak_rss_kb": usage.peak_rss_kb if usage is not None else None,
+    }
+
+
+@dataclass(frozen=True, slots=True)
+class SubmissionSummary:
+    """History entry: every submission column except the (large) ``user_code``."""
+
+    id: str
+    task_id: str
+    verdict: str
+    passed: int
+    total: int
+    created_at: datetime
+
+
+@dataclass(frozen=True, slots=True)
+class SubmissionCursor:
+    """Keyset position in submissions ordered by ``(created_at, id)``."""
+
+    created_at: datetime
+    id: str
+
+    def encode(self) -> str:
+        raw = f"{self.created_at.isoformat()}|{self.id}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> SubmissionCursor:
+        """Parse an ``encode()``d cursor; raises ``ValueError`` if it is malformed."""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+            created_at, submission_id = raw.split("|", 1)
+            return cls(created_at=datetime.fromisoformat(created_at), id=submission_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+            raise ValueError(f"Invalid cursor: {token!r}") from exc
+
+    @classmethod
+    def after(cls, summary: SubmissionSummary | StoredResult) -> SubmissionCursor:
+        return cls(created_at=summary.created_at, id=summary.id)
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResult:
+    """What re-judging needs of a submission: its code, test set and stored result."""
+
+    id: str
+    user_code: str
+    test_set_id: str | None
+    verdict: str
+    passed: int
+    total: int
+    message: str
+    failed_test_index: int | None
+    failed_field: str | None
+    created_at: datetime
+
+
+# Statements are shared by the sync and async repositories.
+
+_SUMMARY_COLUMNS = (
+    SubmissionRow.id,
+    SubmissionRow.task_id,
+    SubmissionRow.verdict,
+    SubmissionRow.passed,
+    SubmissionRow.total,
+    SubmissionRow.created_at,
+)
+
+
+def _history_stmt(
+    task_id: str | None, limit: int, after: SubmissionCursor | None
+) -> Select[tuple[str, str, str, int, int, datetime]]:
+    # Served by ix_submissions_created_at_id / ix_submissions_task_id_created_at_id:
+    # the cursor seeks into the index, so a page costs O(limit) at any depth.
+    stmt = select(*_SUMMARY_COLUMNS)
+    if task_id is not None:
+        stmt = stmt.where(SubmissionRow.task_id == task_id)
+    if after is not None:
+        stmt = stmt.where(
+            tuple_(SubmissionRow.created_at, SubmissionRow.id) < tuple_(after.created_at, after.id)
+        )
+    return stmt.order_by(SubmissionRow.created_at.desc(), SubmissionRow.id.desc()).limit(limit)
+
+
+_STORED_RESULT_COLUMNS = (
+    SubmissionRow.id,
+    SubmissionRow.user_code,
+    SubmissionRow.test_set_id,
+    SubmissionRow.verdict,
+    SubmissionRow.passed,
+    SubmissionRow.total,
+    SubmissionRow.message,
+    SubmissionRow.failed_test_index,
+    SubmissionRow.failed_field,
+    SubmissionRow.created_at,
+)
+
+
+def _judged_stmt(task_id: str, limit: int, after: SubmissionCursor | None) -> Select[Any]:
+    # Oldest first, seeking into ix_submissions_task_id_created_at_id like the history.
+    stmt = select(*_STORED_RESULT_COLUMNS).where(
+        SubmissionRow.task_id == task_id,
+        SubmissionRow.verdict.not_in((PENDING_VERDICT, JUDGING_VERDICT)),
+    )
+    if after is not None:
+        stmt = stmt.where(
+            tuple_(SubmissionRow.created_at, SubmissionRow.id) > tuple_(after.created_at, after.id)
+        )
+    return stmt.order_by(SubmissionRow.created_at, SubmissionRow.id).limit(limit)
+
+
+def _claim_stmt(submission_id: str) -> Update:
+    # Only one consumer (of any process) can move a row out of PENDING.
+    return (
+        update(SubmissionRow)
+        .where(SubmissionRow.id == submission_id, SubmissionRow.verdict == PENDING_VERDICT)
+        .values(verdict=JUDGING_VERDICT, claimed_at=datetime.now(UTC))
+    )
+
+
+def _rejudge_state_key(task_id: str) -> str:
+    return f"rejudge:{task_id}"
+
+
+def _rejudge_lease_key(task_id: str) -> str:
+    return f"rejudge-lease:{task_id}"
+
+
+def _pending_ids_stmt() -> Select[tuple[str]]:
+    return (
+        select(SubmissionRow.id)
+        .where(SubmissionRow.verdict == PENDING_VERDICT)
+        .order_by(SubmissionRow.created_at)
+    )
 
 
 class SubmissionRepo:
@@ -11,26 +171,159 @@ class SubmissionRepo:
         self._db = db
 
     def create(self, row: SubmissionRow) -> SubmissionRow:
-        self._db.add(row)
-        self._db.flush()
+        with SUBMISSION_DB_SECONDS.labels("create").time():
+            self._db.add(row)
+            self._db.flush()
         return row
 
     def get_by_id(self, submission_id: str) -> SubmissionRow | None:
         return self._db.get(SubmissionRow, submission_id)
 
-    def list_by_task(self, task_id: str, *, limit: int = 50) -> list[SubmissionRow]:
+    def list_by_task(
+        self, task_id: str, *, limit: int = 50, after: SubmissionCursor | None = None
+    ) -> list[SubmissionSummary]:
+        """Newest submissions for ``task_id``, strictly older than ``after``."""
+        rows = self._db.execute(_history_stmt(task_id, limit, after))
+        return [SubmissionSummary(*r) for r in rows]
+
+    def list_recent(
+        self, *, limit: int = 50, after: SubmissionCursor | None = None
+    ) -> list[SubmissionSummary]:
+        """Newest submissions across tasks, strictly older than ``after``."""
+        rows = self._db.execute(_history_stmt(None, limit, after))
+        return [SubmissionSummary(*r) for r in rows]
+
+    def list_pending_ids(self) -> list[str]:
+        """Ids of submissions still waiting for the judge, oldest first."""
+        return list(self._db.scalars(_pending_ids_stmt()).all())
+
+    def release_claims(self, *, ttl_sec: float) -> int:
+        """
+        Put submissions claimed more than ``ttl_sec`` ago and still JUDGING
+        (the process judging them stopped) back to PENDING.  Younger claims
+        may belong to a live process, of this host or another.
+        """
+        expired = datetime.now(UTC) - timedelta(seconds=ttl_sec)
+        stmt = (
+            update(SubmissionRow)
+            .where(
+                SubmissionRow.verdict == JUDGING_VERDICT,
+                or_(SubmissionRow.claimed_at.is_(None), SubmissionRow.claimed_at < expired),
+            )
+            .values(verdict=PENDING_VERDICT, claimed_at=None)
+            # SQLite returns naive datetimes, which Python cannot compare to ``expired``.
+            .execution_options(synchronize_session="fetch")
+        )
+        return self._db.execute(stmt).rowcount
+
+    def list_judged(
+        self, task_id: str, *, limit: int, after: SubmissionCursor | None = None
+    ) -> list[StoredResult]:
+        """
+        Judged (non-PENDING) submissions for ``task_id``, oldest first,
+        strictly after ``after``.  Rows are streamed (a server-side cursor
+        on PostgreSQL) rather than buffered by the driver.
+        """
+        stmt = _judged_stmt(task_id, limit, after).execution_options(yield_per=min(limit, 1000))
+        return [StoredResult(*r) for r in self._db.execute(stmt)]
+
+    def update_results(self, values: Sequence[dict[str, Any]]) -> None:
+        """Update submissions by ``id`` in one executemany ``UPDATE``."""
+        if values:
+            self._db.execute(update(SubmissionRow), list(values))
+
+    def get_rejudge_checkpoint(self, task_id: str) -> str | None:
+        """Saved progress of an unfinished re-judge of ``task_id``, if any."""
+        row = self._db.get(AppStateRow, _rejudge_state_key(task_id))
+        return row.value if row is not None else None
+
+    def set_rejudge_checkpoint(self, task_id: str, value: str) -> None:
+        self._db.merge(AppStateRow(key=_rejudge_state_key(task_id), value=value))
+        self._db.flush()
+
+    def clear_rejudge_checkpoint(self, task_id: str) -> None:
+        row = self._db.get(AppStateRow, _rejudge_state_key(task_id))
+        if row is not None:
+            self._db.delete(row)
+            self._db.flush()
+
+    def acquire_rejudge_lease(self, task_id: str, owner: str, *, ttl_sec: float) -> bool:
+        """
+        Make ``owner`` the only process re-judging ``task_id``.  A lease not
+        renewed for ``ttl_sec`` (its holder died) is taken over.
+        """
+        key = _rejudge_lease_key(task_id)
+        try:
+            with self._db.begin_nested():
+                self._db.add(AppStateRow(key=key, value=owner))
+            return True
+        except IntegrityError:
+            pass
+        expired = datetime.now(UTC) - timedelta(seconds=ttl_sec)
         stmt = (
-            select(SubmissionRow)
-            .where(SubmissionRow.task_id == task_id)
-            .order_by(SubmissionRow.created_at.desc())
-            .limit(limit)
+            update(AppStateRow)
+            .where(AppStateRow.key == key, AppStateRow.updated_at < expired)
+            .values(value=owner, updated_at=datetime.now(UTC))
         )
-        return list(self._db.scalars(stmt).all())
+        return self._db.execute(stmt).rowcount == 1
 
-    def list_recent(self, *, limit: int = 50) -> list[SubmissionRow]:
+    def renew_rejudge_lease(self, task_id: str, owner: str) -> bool:
+        """Extend ``owner``'s lease; False if it expired and another process took it."""
         stmt = (
-            select(SubmissionRow)
-            .order_by(SubmissionRow.created_at.desc())
-            .limit(limit)
+            update(AppStateRow)
+            .where(AppStateRow.key == _rejudge_lease_key(task_id), AppStateRow.value == owner)
+            .values(updated_at=datetime.now(UTC))
+        )
+        return self._db.execute(stmt).rowcount == 1
+
+    def release_rejudge_lease(self, task_id: str, owner: str) -> None:
+        stmt = delete(AppStateRow).where(
+            AppStateRow.key == _rejudge_lease_key(task_id), AppStateRow.value == owner
         )
-        return list(self._db.scalars(stmt).all())
+        self._db.execute(stmt)
+
+    def rejudge_lease_held(self, task_id: str, *, ttl_sec: float) -> bool:
+        """Whether some process holds a live lease on ``task_id``."""
+        row = self._db.get(AppStateRow, _rejudge_lease_key(task_id))
+        if row is None:
+            return False
+        renewed = row.updated_at
+        if renewed.tzinfo is None:  # SQLite drops the zone
+            renewed = renewed.replace(tzinfo=UTC)
+        return datetime.now(UTC) - renewed < timedelta(seconds=ttl_sec)
+
+
+class AsyncSubmissionRepo:
+    def __init__(self, db: AsyncSession) -> None:
+        self._db = db
+
+    async def create(self, row: SubmissionRow) -> SubmissionRow:
+        with SUBMISSION_DB_SECONDS.labels("create").time():
+            self._db.add(row)
+            await self._db.flush()
+        return row
+
+    async def get_by_id(self, submission_id: str) -> SubmissionRow | None:
+        return await self._db.get(SubmissionRow, submission_id)
+
+    async def list_by_task(
+        self, task_id: str, *, limit: int = 50, after: SubmissionCursor | None = None
+    ) -> list[SubmissionSummary]:
+        """Newest submissions for ``task_id``, strictly older than ``after``."""
+        rows = await self._db.execute(_history_stmt(task_id, limit, after))
+        return [SubmissionSummary(*r) for r in rows]
+
+    async def list_recent(
+        self, *, limit: int = 50, after: SubmissionCursor | None = None
+    ) -> list[SubmissionSummary]:
+        """Newest submissions across tasks, strictly older than ``after``."""
+        rows = await self._db.execute(_history_stmt(None, limit, after))
+        return [SubmissionSummary(*r) for r in rows]
+
+    async def list_pending_ids(self) -> list[str]:
+        """Ids of submissions still waiting for the judge, oldest first."""
+        return list((await self._db.scalars(_pending_ids_stmt())).all())
+
+    async def claim(self, submission_id: str) -> bool:
+        """Move a PENDING submission to JUDGING; False if someone else got it first."""
+        return (await self._db.execute(_claim_stmt(submission_id))).rowcount == 1
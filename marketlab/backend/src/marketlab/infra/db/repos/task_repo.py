@@ -1,9 +1,28 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
+from typing import Any
+
 from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from marketlab.infra.db.models import TaskRow
+from marketlab.infra.db.models import AppStateRow, TaskRow
+
+REGISTRY_FINGERPRINT_KEY = "task_registry_fingerprint"
+
+# Columns the registry owns; created_at is left alone on update.
+_SYNCED_COLUMNS = ("title", "topic", "difficulty", "description", "content_hash")
+
+
+def _dialect_insert(db: Session) -> Any:
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise NotImplementedError(f"Bulk upsert does not support {dialect!r}")
 
 
 class TaskRepo:
@@ -18,7 +37,7 @@ class TaskRepo:
         return self._db.get(TaskRow, task_id)
 
     def upsert(self, row: TaskRow) -> TaskRow:
-        """Insert or update a task (used to sync registry → DB on startup)."""
+        """Insert or update a single task."""
         existing = self.get_by_id(row.id)
         if existing is None:
             self._db.add(row)
@@ -27,5 +46,45 @@ class TaskRepo:
             existing.topic = row.topic
             existing.difficulty = row.difficulty
             existing.description = row.description
+            existing.content_hash = row.content_hash
         self._db.flush()
         return row
+
+    def upsert_many(self, rows: Sequence[dict[str, Any]]) -> int:
+        """
+        Insert or update tasks in one ``INSERT ... ON CONFLICT DO UPDATE``.
+
+        Existing rows are only rewritten when their ``content_hash`` differs.
+        Returns the number of rows inserted or updated.
+        """
+        if not rows:
+            return 0
+        insert = _dialect_insert(self._db)
+        stmt = insert(TaskRow).values(list(rows))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TaskRow.id],
+            set_={name: stmt.excluded[name] for name in _SYNCED_COLUMNS},
+            where=TaskRow.content_hash != stmt.excluded.content_hash,
+        )
+        return self._db.execute(stmt).rowcount
+
+    def get_registry_fingerprint(self) -> str | None:
+        """Fingerprint of the task registry as of the last sync, if any."""
+        row = self._db.get(AppStateRow, REGISTRY_FINGERPRINT_KEY)
+        return row.value if row is not None else None
+
+    def set_registry_fingerprint(self, fingerprint: str) -> None:
+        self._db.merge(AppStateRow(key=REGISTRY_FINGERPRINT_KEY, value=fingerprint))
+        self._db.flush()
+
+
+class AsyncTaskRepo:
+    def __init__(self, db: AsyncSession) -> None:
+        self._db = db
+
+    async def list_all(self) -> list[TaskRow]:
+        stmt = select(TaskRow).order_by(TaskRow.difficulty, TaskRow.id)
+        return list((await self._db.scalars(stmt)).all())
+
+    async def get_by_id(self, task_id: str) -> TaskRow | None:
+        return await self._db.get(TaskRow, task_id)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from marketlab.infra.db.models import AppStateRow, TestSetRow
+
+# app_state key of a token that changes whenever stored answers are rewritten.
+_VERSION_KEY = "test_sets:version"
+
+
+class TestSetRepo:
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, db: Session) -> None:
+        self._db = db
+
+    def get_by_id(self, test_set_id: str) -> TestSetRow | None:
+        return self._db.get(TestSetRow, test_set_id)
+
+    def add_if_absent(self, row: TestSetRow) -> None:
+        """Insert a test set; another worker having stored the same id first is fine."""
+        try:
+            with self._db.begin_nested():
+                self._db.add(row)
+        except IntegrityError:
+            pass
+
+    def get_version(self) -> str | None:
+        """Token of the last rewrite of stored answers (None if never rewritten)."""
+        row = self._db.get(AppStateRow, _VERSION_KEY)
+        return row.value if row is not None else None
+
+    def bump_version(self) -> str:
+        """Record that stored answers changed; other processes' caches drop their copies."""
+        version = uuid.uuid4().hex
+        self._db.merge(AppStateRow(key=_VERSION_KEY, value=version))
+        self._db.flush()
+        return version
+
+
+class AsyncTestSetRepo:
+    __test__ = False  # not a pytest test class
+
+    def __init__(self, db: AsyncSession) -> None:
+        self._db = db
+
+    async def get_by_id(self, test_set_id: str) -> TestSetRow | None:
+        return await self._db.get(TestSetRow, test_set_id)
+
+    async def add_if_absent(self, row: TestSetRow) -> None:
+        """Insert a test set; another worker having stored the same id first is fine."""
+        try:
+            async with self._db.begin_nested():
+                self._db.add(row)
+        except IntegrityError:
+            pass
+
+    async def get_version(self) -> str | None:
+        row = await self._db.get(AppStateRow, _VERSION_KEY)
+        return row.value if row is not None else None
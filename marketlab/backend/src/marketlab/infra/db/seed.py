@@ -1,20 +1,100 @@
 from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import Any
+
+from sqlalchemy import Engine, text
 from sqlalchemy.orm import Session
-from marketlab.infra.db.models import TaskRow
-from marketlab.infra.db.repos import TaskRepo
-from marketlab.usecases.registry import TASK_REGISTRY
+
+from marketlab.domain.task_loader import TASKS
+from marketlab.infra.db.models import Base
+from marketlab.infra.db.repos import SubmissionRepo, TaskRepo
+from marketlab.infra.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Key of the Postgres advisory lock that serialises startup schema/seed sync
+# across processes and hosts booting at the same time.
+STARTUP_LOCK_KEY = 0x4D4C_0001
+
+# Set once this process (or the server master it was forked from) has run
+# prepare_database(); forked API workers inherit it and skip the sync.
+_prepared = False
+
+
+def registry_task_rows() -> list[dict[str, Any]]:
+    """
+    ``tasks`` rows for every registered task, each with its ``content_hash``;
+    read from the task manifest, without importing the task modules.
+    """
+    rows = []
+    for task_id in TASKS:
+        entry = TASKS.entry(task_id)
+        values: dict[str, Any] = {
+            "id": task_id,
+            "title": entry.title,
+            "topic": entry.topic,
+            "difficulty": 1,
+            "description": "",
+        }
+        encoded = json.dumps(values, sort_keys=True, ensure_ascii=False).encode()
+        rows.append({**values, "content_hash": hashlib.sha256(encoded).hexdigest()})
+    return rows
+
+
+def registry_fingerprint(rows: list[dict[str, Any]]) -> str:
+    """One hash over all task rows; equal fingerprints mean nothing to sync."""
+    digest = hashlib.sha256()
+    for row in sorted(rows, key=lambda r: r["id"]):
+        digest.update(f"{row['id']}:{row['content_hash']}\n".encode())
+    return digest.hexdigest()
+
 
 #Отвечает за синхронизацию задач из реестра в кода с БД при каждом запуске
-def sync_tasks_to_db(db: Session) -> None:
-    """Insert or update all tasks from TASK_REGISTRY into the DB."""
+def sync_tasks_to_db(db: Session) -> int:
+    """
+    Bring the ``tasks`` table in line with TASK_REGISTRY.
+
+    Skipped with one SELECT when the stored registry fingerprint matches;
+    otherwise all tasks go out in one bulk upsert that only rewrites rows
+    whose content changed.  Returns the number of rows written.
+    """
     repo = TaskRepo(db)
-    for task_id, (spec, _solver) in TASK_REGISTRY.items():
-        row = TaskRow(
-            id=spec.id,
-            title=spec.title,
-            topic=spec.topic,
-            difficulty=1,
-            description="",
-        )
-        repo.upsert(row)
+    rows = registry_task_rows()
+    fingerprint = registry_fingerprint(rows)
+    if repo.get_registry_fingerprint() == fingerprint:
+        return 0
+    written = repo.upsert_many(rows)
+    repo.set_registry_fingerprint(fingerprint)
     db.commit()
+    return written
+
+
+def prepare_database(bind: Engine) -> bool:
+    """
+    Create missing tables, sync the task registry and release the expired
+    claims of submissions a stopped process was judging (see JudgeQueue),
+    once per process tree, i.e. before any judge queue of it starts.
+
+    Runs in one transaction holding an advisory lock on PostgreSQL, so
+    concurrently starting servers do not race on DDL or task rows.  Returns
+    False when this process already did it.
+    """
+    global _prepared
+    if _prepared:
+        return False
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": STARTUP_LOCK_KEY})
+        Base.metadata.create_all(bind=conn)
+        # The session joins the outer transaction; its commit leaves the lock held.
+        with Session(bind=conn, join_transaction_mode="create_savepoint") as db:
+            sync_tasks_to_db(db)
+            released = SubmissionRepo(db).release_claims(ttl_sec=settings.judge_claim_ttl_sec)
+            db.commit()
+        if released:
+            logger.info("Released %d submissions interrupted while judging", released)
+    _prepared = True
+    return True
@@ -1,32 +1,77 @@
 """
-Database engine and session factory.
+Database engines and session factories.
 
-Usage in FastAPI endpoints:
+API endpoints use the async stack:
 
-    from marketlab.infra.db.session import get_db
+    from marketlab.infra.db.session import get_async_db
 
     @router.get("/something")
-    def handler(db: Session = Depends(get_db)):
+    async def handler(db: AsyncSession = Depends(get_async_db)):
         ...
+
+The synchronous engine remains for startup schema/seed sync, Alembic and
+command-line tools.
 """
 
 from __future__ import annotations
 
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
+from typing import Any
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from marketlab.infra.settings import settings
 
+# Async drivers for URLs configured with a sync driver (psycopg 3 does both).
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+psycopg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Map a database URL to the matching async driver."""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _pool_kwargs(url: str) -> dict[str, Any]:
+    # SQLite uses a single-connection / per-thread pool without sizing options.
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle_sec,
+        "pool_timeout": settings.db_pool_timeout_sec,
+    }
+
+
 engine = create_engine(
     settings.database_url,
     echo=False,
     pool_pre_ping=True,
+    **_pool_kwargs(settings.database_url),
 )
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
+async_engine = create_async_engine(
+    to_async_url(settings.database_url),
+    echo=False,
+    pool_pre_ping=True,
+    **_pool_kwargs(settings.database_url),
+)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 
 def get_db() -> Generator[Session, None, None]:
     """FastAPI dependency that yields a DB session and closes it after the request."""
@@ -35,3 +80,9 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency that yields an async DB session and closes it after the request."""
+    async with AsyncSessionLocal() as db:
+        yield db
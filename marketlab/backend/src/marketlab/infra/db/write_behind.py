@@ -0,0 +1,222 @@
+"""
+Write-behind persistence of judged submissions.
+
+Instead of an INSERT + COMMIT round trip per request, finished submissions
+are buffered in memory and written as one multi-row INSERT every
+``batch_size`` rows or ``flush_interval_ms``, whichever comes first.  The
+client still gets the submission id immediately (ids and ``created_at`` are
+assigned up front), and rows that are not flushed yet are served from the
+buffer by ``get_pending``.
+
+If a flush fails the batch is appended to a JSON-lines spool file, which is
+replayed (idempotently) on the next successful flush and on startup; until
+then those submissions are not readable.  Rows still buffered when the
+process is killed outright are lost, so this is opt-in
+(``submission_write_behind``); PENDING rows of async submissions are always
+written synchronously because the judge queue reads them back.
+
+``get_pending`` only knows this process's buffer: with several API processes
+another one answers 404 for a submission until it is flushed.  Processes may
+share a spool file; appends and replays hold an exclusive ``flock`` on
+``<spool>.lock``, so a replay never unlinks lines it has not inserted.
+
+All methods must be called from the event loop that ran ``start()``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import uuid
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from marketlab.infra.db.models import SubmissionRow
+from marketlab.infra.db.repos.submission_repo import SUBMISSION_DB_SECONDS
+from marketlab.infra.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SPOOLED_ROWS = REGISTRY.counter(
+    "marketlab_submission_spooled_rows_total", "Submissions spooled to disk after a failed flush."
+)
+
+_COLUMNS = tuple(c.key for c in SubmissionRow.__table__.columns)
+
+
+def _to_values(row: SubmissionRow) -> dict[str, Any]:
+    return {key: getattr(row, key) for key in _COLUMNS}
+
+
+def _encode(values: dict[str, Any]) -> str:
+    return json.dumps({**values, "created_at": values["created_at"].isoformat()})
+
+
+def _decode(line: str) -> dict[str, Any]:
+    values = json.loads(line)
+    values["created_at"] = datetime.fromisoformat(values["created_at"])
+    return values
+
+
+class SubmissionWriteBehind:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        batch_size: int = 100,
+        flush_interval_ms: int = 50,
+        spool_path: Path | str = "submission_spool.jsonl",
+    ) -> None:
+        self._session_factory = session_factory
+        self._batch_size = max(1, batch_size)
+        self._flush_interval = flush_interval_ms / 1000
+        self._spool_path = Path(spool_path)
+        self._spool_lock_path = self._spool_path.with_name(self._spool_path.name + ".lock")
+        self._buffer: list[dict[str, Any]] = []
+        self._pending: dict[str, dict[str, Any]] = {}  # buffered or being flushed
+        self._has_rows = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._closing = False
+        self._task: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        """Replay rows spooled by a previous run and start the flush loop."""
+        async with self._lock:
+            await self._replay_spool()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flush loop and write out everything still buffered."""
+        if self._task is not None:
+            # Not cancelled: a flush in progress finishes (or spools) its batch.
+            self._closing = True
+            self._has_rows.set()
+            self._batch_full.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def add(self, row: SubmissionRow) -> None:
+        """Queue ``row`` for insertion; its ``id`` and ``created_at`` are set on return."""
+        if row.id is None:
+            row.id = str(uuid.uuid4())
+        if row.created_at is None:
+            row.created_at = datetime.now(UTC)
+        if row.message is None:
+            row.message = ""
+        values = _to_values(row)
+        self._buffer.append(values)
+        self._pending[row.id] = values
+        self._has_rows.set()
+        if len(self._buffer) >= self._batch_size:
+            self._batch_full.set()
+
+    def get_pending(self, submission_id: str) -> SubmissionRow | None:
+        """A submission accepted by ``add`` but not yet visible in the database."""
+        values = self._pending.get(submission_id)
+        return SubmissionRow(**values) if values is not None else None
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            batch, self._buffer = self._buffer, []
+            self._has_rows.clear()
+            self._batch_full.clear()
+            if not batch:
+                return
+            try:
+                with SUBMISSION_DB_SECONDS.labels("bulk_insert").time():
+                    await self._insert(batch)
+            except Exception:
+                logger.exception("Flushing %d submissions failed; spooling to disk", len(batch))
+                await asyncio.to_thread(self._append_spool, batch)
+                SPOOLED_ROWS.inc(len(batch))
+            except BaseException:
+                # Cancelled mid-insert: the rows may not be in the table, and
+                # the buffer no longer has them.  Spool them before unwinding.
+                self._append_spool(batch)
+                SPOOLED_ROWS.inc(len(batch))
+                raise
+            else:
+                await self._replay_spool()
+            finally:
+                for values in batch:
+                    self._pending.pop(values["id"], None)
+
+    async def _run(self) -> None:
+        while not self._closing:
+            await self._has_rows.wait()
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._batch_full.wait(), self._flush_interval)
+            await self.flush()
+
+    async def _insert(self, batch: list[dict[str, Any]], *, ignore_existing: bool = False) -> None:
+        async with self._session_factory() as db:
+            stmt = self._insert_ignoring_conflicts(db) if ignore_existing else insert(SubmissionRow)
+            # executemany: SQLAlchemy batches this into multi-row INSERT ... VALUES.
+            await db.execute(stmt, batch)
+            await db.commit()
+
+    @staticmethod
+    def _insert_ignoring_conflicts(db: AsyncSession) -> Any:
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(SubmissionRow).on_conflict_do_nothing(index_elements=["id"])
+        if dialect == "sqlite":
+            return sqlite.insert(SubmissionRow).on_conflict_do_nothing(index_elements=["id"])
+        raise NotImplementedError(f"Spool replay does not support {dialect!r}")
+
+    def _lock_spool(self) -> int:
+        """Take the cross-process spool lock (blocking); closing the returned fd releases it."""
+        fd = os.open(self._spool_lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    def _append_spool(self, batch: list[dict[str, Any]]) -> None:
+        lock = self._lock_spool()
+        try:
+            with self._spool_path.open("a", encoding="utf-8") as f:
+                f.writelines(_encode(values) + "\n" for values in batch)
+                f.flush()
+                os.fsync(f.fileno())  # the spool is now the only copy of these rows
+        finally:
+            os.close(lock)
+
+    async def _replay_spool(self) -> None:
+        if not self._spool_path.exists():
+            return
+        # Held until the unlink: lines appended meanwhile would be lost with the file.
+        lock = await asyncio.to_thread(self._lock_spool)
+        try:
+            if not self._spool_path.exists():
+                return  # replayed by another process while we waited
+            text = await asyncio.to_thread(self._spool_path.read_text, encoding="utf-8")
+            rows = [_decode(line) for line in text.splitlines() if line.strip()]
+            if rows:
+                try:
+                    # Rows of a partially failed flush may already be in the table.
+                    await self._insert(rows, ignore_existing=True)
+                except Exception:
+                    logger.exception("Replaying %d spooled submissions failed", len(rows))
+                    return
+                logger.info("Replayed %d spooled submissions", len(rows))
+            self._spool_path.unlink(missing_ok=True)
+        finally:
+            os.close(lock)
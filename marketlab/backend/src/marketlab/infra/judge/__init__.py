@@ -1,3 +1,16 @@
-from .runner_inprocess import compile_user_solve, time_limit, TimeoutError
+from .runner_inprocess import code_hash, compile_user_solve, time_limit, TimeoutError
+from .runner_pool import JudgeWorkerPool, PoolSettings, WorkerCrashedError
+from .test_set import TestRow, TestSet, release_shared_blocks
 
-__all__ = ["compile_user_solve", "time_limit", "TimeoutError"]
+__all__ = [
+    "code_hash",
+    "compile_user_solve",
+    "time_limit",
+    "TimeoutError",
+    "JudgeWorkerPool",
+    "PoolSettings",
+    "WorkerCrashedError",
+    "TestRow",
+    "TestSet",
+    "release_shared_blocks",
+]
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import hashlib
 import signal
 import threading
-from contextlib import contextmanager
-from types import MappingProxyType
+import time
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from types import CodeType, MappingProxyType
 from typing import Any, Callable
 
+from marketlab.infra.cache import LRUCache
+
+# Compiled code objects of recently seen submissions, keyed by code_hash().
+COMPILED_CODE_CACHE_SIZE = 512
+_compiled_code: LRUCache[str, CodeType] = LRUCache(COMPILED_CODE_CACHE_SIZE)
+
 
 class TimeoutError(Exception):
     pass
@@ -15,37 +23,84 @@ def _is_main_thread() -> bool:
     return threading.current_thread() is threading.main_thread()
 
 
+def _on_cpu_timer(signum, frame):  # noqa: ARG001
+    raise TimeoutError("Time limit exceeded")
+
+
+# CPU-time deadlines (``time.process_time``) of the main thread's active limits,
+# outermost first.  Kept here rather than read back from the timer, whose
+# remaining time only moves in scheduler ticks.
+_cpu_deadlines: list[float] = []
+
+
+class _CpuTimer:
+    """ITIMER_PROF-based limit for the main thread; see ``time_limit``."""
+
+    __slots__ = ("_seconds", "_old_handler")
+
+    def __init__(self, seconds: float) -> None:
+        self._seconds = seconds
+
+    def __enter__(self) -> None:
+        self._old_handler = None
+        if not _cpu_deadlines:
+            self._old_handler = signal.signal(signal.SIGPROF, _on_cpu_timer)
+        now = time.process_time()
+        deadline = now + self._seconds
+        if _cpu_deadlines:
+            deadline = min(deadline, _cpu_deadlines[-1])  # never outlast an enclosing limit
+        _cpu_deadlines.append(deadline)
+        signal.setitimer(signal.ITIMER_PROF, max(deadline - now, 1e-6))
+
+    def __exit__(self, *exc: object) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        _cpu_deadlines.pop()
+        if _cpu_deadlines:
+            # Re-arm the enclosing limit (almost at once if it is spent).
+            left = _cpu_deadlines[-1] - time.process_time()
+            signal.setitimer(signal.ITIMER_PROF, max(left, 1e-6))
+        else:
+            old = self._old_handler
+            signal.signal(signal.SIGPROF, old if old is not None else signal.SIG_DFL)
+
+
 @contextmanager
-def time_limit(seconds: int):
+def _post_hoc_limit(seconds: float):
+    start = time.thread_time()
+    yield
+    if time.thread_time() - start > seconds:
+        raise TimeoutError("Time limit exceeded")
+
+
+def time_limit(seconds: float) -> AbstractContextManager[None]:
+    """
+    Raise ``TimeoutError`` once the block has used ``seconds`` of CPU time.
+
+    CPU rather than wall time, so verdicts do not depend on host load, and
+    fractional, so a limit can be a few milliseconds.  On the main thread an
+    ``ITIMER_PROF`` timer interrupts the block; limits nest, an inner one
+    never outlasting the outer.  Signals only reach the main thread, so on
+    other threads the block's CPU time is checked when it ends.
+    """
     if seconds <= 0:
-        yield
-        return
-
-    if _is_main_thread():
-        def handler(signum, frame):  # noqa: ARG001
-            raise TimeoutError("Time limit exceeded")
-
-        old_handler = signal.signal(signal.SIGALRM, handler)
-        signal.alarm(seconds)
-        try:
-            yield
-        finally:
-            signal.alarm(0)
-            signal.signal(signal.SIGALRM, old_handler)
-    else:
-        timed_out = threading.Event()
-
-        def _interrupt():
-            timed_out.set()
-
-        timer = threading.Timer(seconds, _interrupt)
-        timer.start()
-        try:
-            yield
-            if timed_out.is_set():
-                raise TimeoutError("Time limit exceeded")
-        finally:
-            timer.cancel()
+        return nullcontext()
+    if _is_main_thread() and hasattr(signal, "setitimer"):
+        return _CpuTimer(seconds)
+    return _post_hoc_limit(seconds)
+
+
+def code_hash(user_code: str) -> str:
+    return hashlib.sha256(user_code.encode()).hexdigest()
+
+
+def _compile_cached(user_code: str) -> CodeType:
+    """Byte-compile user code once per distinct source (resubmissions, shared templates)."""
+    key = code_hash(user_code)
+    code = _compiled_code.get(key)
+    if code is None:
+        code = compile(user_code, "<string>", "exec")
+        _compiled_code.put(key, code)
+    return code
 
 
 def compile_user_solve(user_code: str) -> Callable[[dict[str, Any]], dict[str, float]]:
@@ -65,7 +120,9 @@ def compile_user_solve(user_code: str) -> Callable[[dict[str, Any]], dict[str, f
     globals_dict: dict[str, Any] = {"__builtins__": MappingProxyType(safe_builtins)}
     locals_dict: dict[str, Any] = {}
 
-    exec(user_code, globals_dict, locals_dict)  # noqa: S102
+    # The code object is shared, but every call gets fresh globals, so no state
+    # leaks between submissions.
+    exec(_compile_cached(user_code), globals_dict, locals_dict)  # noqa: S102
 
     solve = locals_dict.get("solve") or globals_dict.get("solve")
     if not callable(solve):
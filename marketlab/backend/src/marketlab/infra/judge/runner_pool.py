@@ -0,0 +1,262 @@
+"""
+Pool of pre-started judge worker processes.
+
+User code never runs inside the API process: every job is shipped over a
+pipe to a warm worker process.  Two independent limits protect the API:
+
+- inside the worker, RLIMIT_CPU is re-armed before each job, so a busy loop
+  is killed by the kernel (SIGXCPU) once it burns its CPU budget;
+- the parent waits for the answer with a wall-clock deadline and kills the
+  worker outright if the deadline passes (sleeping / blocked code).
+
+Workers also run under an RLIMIT_AS memory cap and are recycled after a
+fixed number of jobs, so state leaked by user code does not accumulate.
+"""
+
+from __future__ import annotations
+
+import math
+import multiprocessing as mp
+import os
+import queue
+import signal
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any
+
+from marketlab.infra.metrics import REGISTRY
+
+from .runner_inprocess import TimeoutError
+from .usage import mark_single_job_process
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    resource = None  # type: ignore[assignment]
+
+
+POOL_WORKERS = REGISTRY.gauge("marketlab_judge_pool_workers", "Judge worker processes.")
+POOL_BUSY_WORKERS = REGISTRY.gauge(
+    "marketlab_judge_pool_busy_workers", "Judge workers currently running a job."
+)
+
+
+class WorkerCrashedError(Exception):
+    """Raised when a judge worker dies without returning a result."""
+
+
+@dataclass(frozen=True, slots=True)
+class PoolSettings:
+    size: int = os.cpu_count() or 1
+    max_jobs_per_worker: int = 200
+    memory_limit_mb: int = 512  # 0 disables the RLIMIT_AS cap
+    start_method: str = "forkserver"
+
+
+def _apply_memory_limit(memory_limit_mb: int) -> None:
+    if resource is None or memory_limit_mb <= 0:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    _soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _arm_cpu_limit(cpu_budget_sec: float | None) -> None:
+    """Allow the current job at most ``cpu_budget_sec`` more seconds of CPU."""
+    if resource is None or cpu_budget_sec is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    _soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = math.ceil(used + cpu_budget_sec)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _disarm_cpu_limit() -> None:
+    if resource is None:
+        return
+    _soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+def _worker_main(conn: Connection, memory_limit_mb: int, max_jobs: int) -> None:
+    # The parent owns Ctrl+C handling; a worker must not die on SIGINT mid-job.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Judge jobs are single-threaded; per-core BLAS thread buffers would only
+    # eat into the RLIMIT_AS budget once the oracle imports NumPy.
+    for var in ("OPENBLAS_NUM_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(var, "1")
+    _apply_memory_limit(memory_limit_mb)
+    mark_single_job_process()
+
+    for _ in range(max_jobs):
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+
+        fn, args, kwargs, cpu_budget_sec = message
+        _arm_cpu_limit(cpu_budget_sec)
+        try:
+            reply = ("ok", fn(*args, **kwargs))
+        except BaseException as e:  # noqa: BLE001 - everything goes back to the parent
+            reply = ("error", f"{type(e).__name__}: {e}")
+        finally:
+            _disarm_cpu_limit()
+
+        # Metrics recorded while judging travel back with the reply.
+        conn.send((*reply, REGISTRY.drain()))
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "jobs")
+
+    def __init__(self, process: mp.process.BaseProcess, conn: Connection) -> None:
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+
+
+class JudgeWorkerPool:
+    """
+    Fixed-size pool of judge processes.
+
+    ``run`` is thread-safe and blocks until a worker is free, so the pool can
+    be shared by all request threads of an API process.
+    """
+
+    def __init__(self, settings: PoolSettings = PoolSettings()) -> None:
+        if settings.size <= 0:
+            raise ValueError("Judge pool size must be > 0")
+        self._settings = settings
+        self._ctx = mp.get_context(settings.start_method)
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        for _ in range(settings.size):
+            self._idle.put(self._spawn())
+        POOL_WORKERS.set_function(lambda: self.size)
+        POOL_BUSY_WORKERS.set_function(lambda: self.busy)
+
+    @property
+    def size(self) -> int:
+        return self._settings.size
+
+    @property
+    def busy(self) -> int:
+        """Number of workers currently running a job."""
+        return max(0, self._settings.size - self._idle.qsize())
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self._settings.memory_limit_mb, self._settings.max_jobs_per_worker),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    @staticmethod
+    def _kill(worker: _Worker) -> None:
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join()
+        worker.conn.close()
+
+    def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: float,
+        cpu_budget_sec: float | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Execute ``fn(*args, **kwargs)`` in a worker and return its result.
+
+        ``fn`` must be importable by reference (a module-level function).
+        Raises ``TimeoutError`` when the job exceeds its wall-clock ``timeout``
+        or CPU budget, and ``WorkerCrashedError`` when the worker dies or
+        ``fn`` itself raises.
+        """
+        if self._closed:
+            raise RuntimeError("Judge pool is closed")
+        if cpu_budget_sec is None:
+            cpu_budget_sec = timeout
+
+        worker = self._idle.get()
+        try:
+            try:
+                worker.conn.send((fn, args, kwargs, cpu_budget_sec))
+            except (BrokenPipeError, OSError):
+                # The worker finished its job quota or died while idle.
+                self._kill(worker)
+                worker = self._spawn()
+                worker.conn.send((fn, args, kwargs, cpu_budget_sec))
+
+            if not worker.conn.poll(timeout):
+                self._kill(worker)
+                worker = self._spawn()
+                raise TimeoutError("Time limit exceeded")
+
+            try:
+                status, payload, metrics = worker.conn.recv()
+            except EOFError:
+                worker.process.join()
+                exitcode = worker.process.exitcode
+                self._kill(worker)
+                worker = self._spawn()
+                if exitcode == -signal.SIGXCPU:
+                    raise TimeoutError("CPU time limit exceeded") from None
+                raise WorkerCrashedError(f"Judge worker died (exit code {exitcode})") from None
+
+            REGISTRY.merge(metrics)
+            worker.jobs += 1
+            if worker.jobs >= self._settings.max_jobs_per_worker:
+                self._kill(worker)
+                worker = self._spawn()
+
+            if status == "error":
+                raise WorkerCrashedError(payload)
+            return payload
+        finally:
+            if self._closed:
+                self._kill(worker)
+            else:
+                self._idle.put(worker)
+
+    def close(self) -> None:
+        """Stop all idle workers; busy ones are stopped when their job returns."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        POOL_WORKERS.set_function(None)
+        POOL_BUSY_WORKERS.set_function(None)
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            worker.process.join(timeout=1)
+            self._kill(worker)
+
+    def __enter__(self) -> JudgeWorkerPool:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
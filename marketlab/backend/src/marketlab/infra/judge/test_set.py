@@ -0,0 +1,287 @@
+"""
+Columnar test sets shared with judge workers.
+
+A ``TestSet`` keeps a task's tests as one typed array per input field
+(``float`` -> float64, ``int`` -> int64, ``str`` -> small integer codes
+into a tuple of categories) instead of a list of dicts repeating every key.
+``share()`` moves the arrays into one ``multiprocessing.shared_memory``
+block: pickling such a set (a job sent to a pool worker) ships only the
+block's name and layout, and the worker maps the same pages instead of
+unpickling the tests.
+
+Only the process that created a block unlinks it, once its set is garbage
+(or on ``release_shared_blocks()`` at shutdown).  Processes forked after
+``share()`` (``marketlab.serve`` workers) may drop their copy of the set at
+any time; they only unmap the block, which stays usable for everyone else.
+
+Indexing yields ``TestRow`` views; ``TestRow.copy()`` materialises the
+``params`` dict the user's ``solve`` receives, so only the tests a judge
+run reaches are ever turned into Python objects.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping, Sequence
+from itertools import repeat
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, overload
+
+import numpy as np
+
+from marketlab.domain.tasks import Columns, FieldSpec, Params
+
+_DTYPES = {"float": np.dtype(np.float64), "int": np.dtype(np.int64)}
+
+# Shared blocks a worker process keeps mapped (one per recently judged set).
+ATTACHED_BLOCKS = 16
+_attached: OrderedDict[str, SharedMemory] = OrderedDict()
+_attached_lock = threading.Lock()
+# Finalizers of the blocks this process created and has not released yet.
+_owned: dict[str, weakref.finalize] = {}
+
+# (field name, dtype, byte offset) of each column in a shared block.
+Layout = tuple[tuple[str, str, int], ...]
+
+
+class TestRow(Mapping[str, Any]):
+    """Read-only view of one test of a ``TestSet``."""
+
+    __test__ = False  # not a pytest class
+    __slots__ = ("_tests", "_index")
+
+    def __init__(self, tests: TestSet, index: int) -> None:
+        self._tests = tests
+        self._index = index
+
+    def copy(self) -> Params:
+        """The test as a fresh ``params`` dict of plain Python values."""
+        tests = self._tests
+        return dict(zip(tests.fields, tests._decoded()[self._index], strict=True))
+
+    def __getitem__(self, name: str) -> Any:
+        tests = self._tests
+        return tests._decoded()[self._index][tests.fields.index(name)]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tests.fields)
+
+    def __len__(self) -> int:
+        return len(self._tests.fields)
+
+    def __repr__(self) -> str:
+        return f"TestRow({self.copy()!r})"
+
+
+class TestSet(Sequence[TestRow]):
+    """Tests of one task as typed columns; see the module docstring."""
+
+    __test__ = False  # not a pytest class
+    __slots__ = (
+        "fields",
+        "categories",
+        "_columns",
+        "_block",
+        "_layout",
+        "_owner",
+        "_rows",
+        "__weakref__",
+    )
+
+    def __init__(
+        self,
+        fields: tuple[str, ...],
+        columns: dict[str, np.ndarray],
+        categories: dict[str, tuple[str, ...]],
+        *,
+        block: SharedMemory | None = None,
+        layout: Layout = (),
+        owner: TestSet | None = None,
+    ) -> None:
+        self.fields = fields
+        # Code columns of ``str`` fields decode through ``categories``.
+        self.categories = categories
+        self._columns = columns
+        # Shared memory the columns live in (None: private arrays).
+        self._block = block
+        self._layout = layout
+        # The set whose lifetime the block is tied to, kept alive by its slices.
+        self._owner = owner
+        self._rows: list[tuple[Any, ...]] | None = None
+
+    @classmethod
+    def from_tests(cls, input_fields: Sequence[FieldSpec], tests: Sequence[Params]) -> TestSet:
+        """Pack row-oriented tests; every test must carry every input field."""
+        columns: dict[str, np.ndarray] = {}
+        categories: dict[str, tuple[str, ...]] = {}
+        for field in input_fields:
+            values = [t[field.name] for t in tests]
+            if field.type == "str":
+                names = tuple(sorted(set(map(str, values))))
+                lookup = {name: code for code, name in enumerate(names)}
+                dtype = np.uint8 if len(names) <= 256 else np.int32
+                columns[field.name] = np.array([lookup[str(v)] for v in values], dtype=dtype)
+                categories[field.name] = names
+            else:
+                columns[field.name] = np.asarray(values, dtype=_DTYPES[field.type])
+        return cls(tuple(f.name for f in input_fields), columns, categories)
+
+    @property
+    def shared(self) -> bool:
+        return self._block is not None
+
+    def share(self) -> TestSet:
+        """
+        A copy in shared memory (``self`` if already shared or shared memory
+        is unavailable).  The block is unlinked once the copy is garbage.
+        """
+        if self._block is not None or not self._columns:
+            return self
+        layout: list[tuple[str, str, int]] = []
+        size = 0
+        for name in self.fields:
+            column = self._columns[name]
+            layout.append((name, column.dtype.str, size))
+            size += -(-column.nbytes // 8) * 8  # keep every column 8-byte aligned
+        try:
+            block = SharedMemory(create=True, size=max(size, 1))
+        except OSError:
+            return self
+        columns = _map(block, tuple(layout), len(self))
+        for name, column in columns.items():
+            column[:] = self._columns[name]
+        shared = TestSet(self.fields, columns, self.categories, block=block, layout=tuple(layout))
+        _owned[block.name] = weakref.finalize(shared, _release, block, os.getpid())
+        return shared
+
+    def to_columns(self) -> Columns:
+        """Decoded columns (``str`` fields as string arrays), e.g. for a batch oracle."""
+        return {
+            name: np.asarray(self.categories[name])[col] if name in self.categories else col
+            for name, col in self._columns.items()
+        }
+
+    def to_tests(self) -> list[Params]:
+        return [dict(zip(self.fields, values, strict=True)) for values in self._decoded()]
+
+    def __len__(self) -> int:
+        return len(self._columns[self.fields[0]]) if self.fields else 0
+
+    @overload
+    def __getitem__(self, index: int) -> TestRow: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> TestSet: ...
+
+    def __getitem__(self, index: int | slice) -> TestRow | TestSet:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("TestSet slices must be contiguous")
+            columns = {name: col[start:stop] for name, col in self._columns.items()}
+            layout = tuple(
+                (name, dtype, offset + start * np.dtype(dtype).itemsize)
+                for name, dtype, offset in self._layout
+            )
+            return TestSet(
+                self.fields,
+                columns,
+                self.categories,
+                block=self._block,
+                layout=layout,
+                owner=self._owner or self,
+            )
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("TestSet index out of range")
+        return TestRow(self, index)
+
+    def __iter__(self) -> Iterator[TestRow]:
+        return map(TestRow, repeat(self), range(len(self)))
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        if self._block is None:
+            return TestSet, (self.fields, self._columns, self.categories)
+        return _attach, (self._block.name, self._layout, len(self), self.fields, self.categories)
+
+    def _decoded(self) -> list[tuple[Any, ...]]:
+        # Plain Python values, decoded once per process on the first test a judge run reaches.
+        if self._rows is None:
+            lists = []
+            for name in self.fields:
+                values = self._columns[name].tolist()
+                if name in self.categories:
+                    names = self.categories[name]
+                    values = [names[code] for code in values]
+                lists.append(values)
+            self._rows = list(zip(*lists, strict=True))
+        return self._rows
+
+
+def _map(block: SharedMemory, layout: Layout, n: int) -> dict[str, np.ndarray]:
+    return {
+        name: np.ndarray((n,), dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+        for name, dtype, offset in layout
+    }
+
+
+def _release(block: SharedMemory, creator_pid: int) -> None:
+    _owned.pop(block.name, None)
+    try:
+        block.close()
+    except BufferError:
+        pass  # a column outlived its set; the mapping goes with it
+    # A forked process dropping its inherited copy must not remove the block
+    # from under the creator and its other children.
+    if os.getpid() != creator_pid:
+        return
+    try:
+        block.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def release_shared_blocks() -> None:
+    """Release every block this process created, e.g. when the server shuts down."""
+    for finalizer in list(_owned.values()):
+        finalizer()
+
+
+def _open_block(name: str) -> SharedMemory:
+    # The creating process owns the block: only it may unlink it, so the
+    # resource tracker must not count a worker's mapping.
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    block = SharedMemory(name=name)
+    resource_tracker.unregister(block._name, "shared_memory")  # type: ignore[attr-defined]
+    return block
+
+
+def _attach(
+    name: str,
+    layout: Layout,
+    n: int,
+    fields: tuple[str, ...],
+    categories: dict[str, tuple[str, ...]],
+) -> TestSet:
+    """Unpickle a shared ``TestSet``: map its block (kept mapped for reuse)."""
+    with _attached_lock:
+        block = _attached.get(name)
+        if block is None:
+            block = _open_block(name)
+            _attached[name] = block
+            if len(_attached) > ATTACHED_BLOCKS:
+                _stale_name, stale = _attached.popitem(last=False)
+                try:
+                    stale.close()
+                except BufferError:
+                    pass  # still in use; unmapped when the process exits
+        else:
+            _attached.move_to_end(name)
+    return TestSet(fields, _map(block, layout, n), categories, block=block, layout=layout)
@@ -0,0 +1,473 @@
+"""
+Minimal in-process metrics registry with Prometheus text exposition.
+
+Built for hot paths: a labelled child is resolved once (``HIST.labels(...)``)
+and an observation is then a bisect plus two in-place adds, well under a
+microsecond.  Updates are deliberately not locked; under the GIL a racing
+increment can at worst be lost, which is acceptable for monitoring data.
+
+Judge worker processes record into their own copy of the registry; the pool
+ships ``REGISTRY.drain()`` back with every job and the API process merges it,
+so ``/metrics`` also covers work done in workers.
+
+API processes forked by ``marketlab.serve`` share one listening socket, so a
+scrape reaches an arbitrary one of them.  Each publishes its counters and
+histograms to a shared directory (``publish``) and ``/metrics`` adds the
+other processes' files (``read_published``) to its own; gauges stay
+per-process.  A file is named by the process's pid and an id drawn at
+start (and after a fork), so a process reusing a pid starts a file of its
+own.  ``publish`` folds the files of exited processes into one file of
+retired totals, so the directory stays small and totals never drop.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import math
+import os
+import time
+import uuid
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+# Latency buckets in seconds, from a single solve() call up to a slow submission.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.000_01,
+    0.000_05,
+    0.000_1,
+    0.000_5,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+)
+
+LabelValues = tuple[str, ...]
+Snapshot = dict[str, dict[LabelValues, Any]]
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values, strict=True)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return "+Inf" if value == math.inf else repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self._bounds, value)] += 1
+        self.sum += value
+
+    def time(self) -> _Timer:
+        """``with HIST.labels(...).time():`` observes the block's duration."""
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: _HistogramChild) -> None:
+        self._child = child
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[LabelValues, Any] = {}
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _header(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def collect(self) -> Iterator[str]:
+        yield from self._header()
+        for values, child in sorted(self._children.items()):
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}{labels} {_format_value(child.value)}"
+
+    def drain(self) -> dict[LabelValues, float]:
+        out = {}
+        for values, child in list(self._children.items()):
+            if child.value:
+                out[values], child.value = child.value, 0.0
+        return out
+
+    def merge(self, samples: dict[LabelValues, float]) -> None:
+        for values, value in samples.items():
+            self.labels(*values).inc(value)
+
+    def snapshot(self) -> dict[LabelValues, float]:
+        return {values: child.value for values, child in list(self._children.items())}
+
+    def empty_copy(self) -> Counter:
+        return Counter(self.name, self.documentation, self.labelnames)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def collect(self) -> Iterator[str]:
+        yield from self._header()
+        bounds = (*self.buckets, math.inf)
+        for values, child in sorted(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, child.counts, strict=True):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                labels = _format_labels(self.labelnames, values, le)
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+    def drain(self) -> dict[LabelValues, tuple[list[int], float]]:
+        out = {}
+        for values, child in list(self._children.items()):
+            if any(child.counts):
+                out[values] = (child.counts, child.sum)
+                child.counts = [0] * len(child.counts)
+                child.sum = 0.0
+        return out
+
+    def merge(self, samples: dict[LabelValues, tuple[list[int], float]]) -> None:
+        for values, (counts, total) in samples.items():
+            child = self.labels(*values)
+            if len(counts) != len(child.counts):
+                continue  # recorded with different buckets (e.g. mid-deploy)
+            for i, count in enumerate(counts):
+                child.counts[i] += count
+            child.sum += total
+
+    def snapshot(self) -> dict[LabelValues, tuple[list[int], float]]:
+        return {
+            values: (list(child.counts), child.sum)
+            for values, child in list(self._children.items())
+        }
+
+    def empty_copy(self) -> Histogram:
+        return Histogram(self.name, self.documentation, self.labelnames, self.buckets)
+
+
+class Gauge(_Metric):
+    """Point-in-time value, read from a callback at scrape time. Process-local."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str) -> None:
+        super().__init__(name, documentation, ())
+        self._fn: Callable[[], float] | None = None
+
+    def set_function(self, fn: Callable[[], float] | None) -> None:
+        self._fn = fn
+
+    def collect(self) -> Iterator[str]:
+        if self._fn is None:
+            return
+        yield from self._header()
+        yield f"{self.name} {_format_value(self._fn())}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            # Re-imported module (tests, reloads): keep accumulating into the original.
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Metric {metric.name} is already registered differently")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._register(Gauge(name, documentation))
+
+    def render(self, others: Iterable[Snapshot] = ()) -> str:
+        """
+        Prometheus text exposition format (version 0.0.4), with the counters
+        and histograms of ``others`` (other processes' snapshots) added in.
+        """
+        metrics = self._metrics
+        others = list(others)
+        if others:
+            merged = MetricsRegistry()
+            for name, metric in self._metrics.items():
+                is_summed = isinstance(metric, (Counter, Histogram))
+                merged._metrics[name] = metric.empty_copy() if is_summed else metric
+            for snapshot in (self.snapshot(), *others):
+                merged.merge(snapshot)
+            metrics = merged._metrics
+        lines: list[str] = []
+        for name in sorted(metrics):
+            lines.extend(metrics[name].collect())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Snapshot:
+        """Counter/histogram totals, without resetting them (see ``drain``)."""
+        return {
+            name: metric.snapshot()
+            for name, metric in self._metrics.items()
+            if isinstance(metric, (Counter, Histogram))
+        }
+
+    def drain(self) -> Snapshot:
+        """Return and reset counter/histogram data recorded since the last drain."""
+        out: Snapshot = {}
+        for name, metric in self._metrics.items():
+            if isinstance(metric, (Counter, Histogram)):
+                samples = metric.drain()
+                if samples:
+                    out[name] = samples
+        return out
+
+    def merge(self, snapshot: Snapshot) -> None:
+        """Add a ``drain()`` result from another process; unknown metrics are ignored."""
+        for name, samples in snapshot.items():
+            metric = self._metrics.get(name)
+            if isinstance(metric, (Counter, Histogram)):
+                metric.merge(samples)
+
+
+REGISTRY = MetricsRegistry()
+
+# Totals of exited processes, in the published directory.
+RETIRED_FILE = "retired.json"
+
+_process_id = uuid.uuid4().hex
+
+
+def _new_process_id() -> None:
+    global _process_id
+    _process_id = uuid.uuid4().hex
+
+
+os.register_at_fork(after_in_child=_new_process_id)
+
+
+def _own_file() -> str:
+    return f"{os.getpid()}-{_process_id}.json"
+
+
+def _encode(snapshot: Snapshot) -> dict[str, list[list[Any]]]:
+    return {
+        name: [[list(values), value] for values, value in samples.items()]
+        for name, samples in snapshot.items()
+    }
+
+
+def _decode(encoded: dict[str, list[list[Any]]]) -> Snapshot:
+    return {
+        name: {tuple(values): value for values, value in samples}
+        for name, samples in encoded.items()
+    }
+
+
+def _add(total: Snapshot, snapshot: Snapshot) -> None:
+    """Add a (decoded) snapshot's counters and histograms into ``total``."""
+    for name, samples in snapshot.items():
+        into = total.setdefault(name, {})
+        for values, value in samples.items():
+            if isinstance(value, (int, float)):
+                into[values] = into.get(values, 0.0) + value
+                continue
+            counts, value_sum = value
+            old = into.get(values)
+            if old is None:
+                into[values] = [list(counts), value_sum]
+            elif len(old[0]) == len(counts):  # else recorded with different buckets
+                into[values] = [
+                    [a + b for a, b in zip(old[0], counts, strict=True)],
+                    old[1] + value_sum,
+                ]
+
+
+def _write_atomically(path: Path, data: Any) -> None:
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    tmp.replace(path)  # readers never see a partial file
+
+
+@contextmanager
+def _locked(directory: Path, operation: int) -> Iterator[None]:
+    # Readers share it; folding exited processes' files into RETIRED_FILE takes it alone.
+    fd = os.open(directory / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, operation)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _exited(path: Path) -> bool:
+    pid, _sep, _id = path.stem.partition("-")
+    if not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False  # running, or its pid was reused: kept for now either way
+
+
+def _read_retired(directory: Path) -> tuple[Snapshot, set[str]]:
+    try:
+        data = json.loads((directory / RETIRED_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}, set()
+    return _decode(data["totals"]), set(data["absorbed"])
+
+
+def _retire_exited(directory: Path) -> None:
+    """
+    Add the files of exited processes to RETIRED_FILE, then delete them.
+    ``absorbed`` lists the files already added, so a crash before their
+    deletion does not count them twice.
+    """
+    exited = [p for p in directory.glob("*-*.json") if _exited(p)]
+    if not exited:
+        return
+    with _locked(directory, fcntl.LOCK_EX):
+        totals, absorbed = _read_retired(directory)
+        absorbed = {name for name in absorbed if (directory / name).exists()}
+        for path in exited:
+            if path.name in absorbed:
+                continue
+            try:
+                snapshot = _decode(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue  # retired by another process meanwhile
+            _add(totals, snapshot)
+            absorbed.add(path.name)
+        _write_atomically(
+            directory / RETIRED_FILE, {"totals": _encode(totals), "absorbed": sorted(absorbed)}
+        )
+        for name in absorbed:
+            (directory / name).unlink(missing_ok=True)
+
+
+def publish(directory: Path | str, registry: MetricsRegistry = REGISTRY) -> None:
+    """
+    Write this process's totals to ``directory`` for other processes'
+    ``/metrics``, and retire the files of processes that have exited.
+    """
+    directory = Path(directory)
+    _write_atomically(directory / _own_file(), _encode(registry.snapshot()))
+    _retire_exited(directory)
+
+
+def read_published(directory: Path | str) -> list[Snapshot]:
+    """Snapshots published by every process except this one, and the retired totals."""
+    directory = Path(directory)
+    own = _own_file()
+    snapshots = []
+    with _locked(directory, fcntl.LOCK_SH):
+        for path in directory.glob("*.json"):
+            if path.name == own:
+                continue
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue  # being replaced or removed
+            if path.name == RETIRED_FILE:
+                data = data["totals"]
+            snapshots.append(_decode(data))
+    return snapshots
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
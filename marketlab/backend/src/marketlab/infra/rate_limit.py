@@ -0,0 +1,169 @@
+"""
+Token-bucket rate limiting.
+
+A bucket holds up to ``burst`` tokens and refills at ``rate`` tokens per
+second; every admitted request takes one.  Buckets live in a pluggable
+store:
+
+* ``MemoryBucketStore`` (default) keeps them in the process.  With several
+  API processes each one enforces the limit on its own share of traffic.
+* ``SQLBucketStore`` keeps them in the ``rate_limit_buckets`` table, shared by
+  every process using the database; one atomic upsert per check.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+from sqlalchemy import case, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from marketlab.infra.db.models import RateLimitBucketRow
+from marketlab.infra.metrics import REGISTRY
+
+REJECTED = REGISTRY.counter(
+    "marketlab_rate_limited_total", "Requests rejected by a rate limit.", ("scope",)
+)
+
+# Buckets kept by the in-memory store; the least recently used one is dropped
+# beyond this (it would have refilled by the time it matters in practice).
+MAX_MEMORY_BUCKETS = 100_000
+
+
+@dataclass(frozen=True, slots=True)
+class BucketLimit:
+    rate: float  # tokens per second
+    burst: int
+
+    @classmethod
+    def per_minute(cls, requests: float, burst: int) -> BucketLimit:
+        return cls(rate=requests / 60, burst=burst)
+
+
+class BucketStore(Protocol):
+    async def take(self, key: str, limit: BucketLimit, now: float) -> float:
+        """Take a token; 0 if granted, else seconds until one will be available."""
+        ...
+
+    async def give_back(self, key: str, limit: BucketLimit) -> None:
+        """Return a token taken for a request that was rejected after all."""
+        ...
+
+
+def _wait_for_token(tokens: float, limit: BucketLimit) -> float:
+    if limit.rate <= 0:
+        return math.inf
+    return max((1 - tokens) / limit.rate, 0.0)
+
+
+class MemoryBucketStore:
+    def __init__(self, max_buckets: int = MAX_MEMORY_BUCKETS) -> None:
+        self._max_buckets = max_buckets
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()  # tokens, updated
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, limit: BucketLimit, now: float) -> float:
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (float(limit.burst), now))
+            tokens = min(float(limit.burst), tokens + max(now - updated, 0.0) * limit.rate)
+            granted = tokens >= 1
+            if granted:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self._max_buckets:
+                self._buckets.popitem(last=False)
+        return 0.0 if granted else _wait_for_token(tokens, limit)
+
+    async def give_back(self, key: str, limit: BucketLimit) -> None:
+        with self._lock:
+            if key in self._buckets:
+                tokens, updated = self._buckets[key]
+                self._buckets[key] = (min(float(limit.burst), tokens + 1), updated)
+
+
+class SQLBucketStore:
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self._session_factory = session_factory
+
+    async def take(self, key: str, limit: BucketLimit, now: float) -> float:
+        table = RateLimitBucketRow.__table__
+        async with self._session_factory() as db:
+            dialect = db.get_bind().dialect.name
+            if dialect == "postgresql":
+                insert = postgresql.insert
+            elif dialect == "sqlite":
+                insert = sqlite.insert
+            else:
+                raise NotImplementedError(f"SQL rate limiting does not support {dialect!r}")
+
+            elapsed = case((table.c.updated_at < now, now - table.c.updated_at), else_=0.0)
+            refilled = table.c.tokens + elapsed * limit.rate
+            available = case((refilled > limit.burst, literal(float(limit.burst))), else_=refilled)
+            stmt = insert(table).values(key=key, tokens=limit.burst - 1.0, updated_at=now)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.key],
+                set_={"tokens": available - 1, "updated_at": now},
+                where=available >= 1,
+            ).returning(table.c.tokens)
+            # Atomic refill-and-take: no row comes back when the bucket is empty.
+            granted = (await db.execute(stmt)).first() is not None
+            tokens = 0.0
+            if not granted:
+                query = select(table.c.tokens, table.c.updated_at).where(table.c.key == key)
+                row = (await db.execute(query)).one()
+                refill = max(now - row.updated_at, 0.0) * limit.rate
+                tokens = min(float(limit.burst), row.tokens + refill)
+            await db.commit()
+        return 0.0 if granted else _wait_for_token(tokens, limit)
+
+    async def give_back(self, key: str, limit: BucketLimit) -> None:
+        table = RateLimitBucketRow.__table__
+        refunded = case(
+            (table.c.tokens + 1 > limit.burst, literal(float(limit.burst))),
+            else_=table.c.tokens + 1,
+        )
+        async with self._session_factory() as db:
+            await db.execute(update(table).where(table.c.key == key).values(tokens=refunded))
+            await db.commit()
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitExceeded:
+    scope: str  # "client" or "global"
+    retry_after: float
+
+
+class RateLimiter:
+    """A per-client bucket and one global bucket in front of expensive endpoints."""
+
+    def __init__(self, store: BucketStore, *, per_client: BucketLimit, total: BucketLimit) -> None:
+        self._store = store
+        self._per_client = per_client
+        self._total = total
+
+    async def check(self, client: str, *, now: float | None = None) -> RateLimitExceeded | None:
+        """
+        Take a token from the client's and the global bucket; ``None`` means
+        admitted.  A rejected request keeps no token: when the global bucket
+        is empty, the client's token goes back.
+        """
+        if now is None:
+            now = time.time()
+        key = f"client:{client}"
+        wait = await self._store.take(key, self._per_client, now)
+        if wait > 0:
+            REJECTED.labels("client").inc()
+            return RateLimitExceeded("client", wait)
+        wait = await self._store.take("global", self._total, now)
+        if wait > 0:
+            await self._store.give_back(key, self._per_client)
+            REJECTED.labels("global").inc()
+            return RateLimitExceeded("global", wait)
+        return None
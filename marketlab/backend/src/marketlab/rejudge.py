@@ -0,0 +1,103 @@
+"""
+Re-judge a task's stored submissions: ``python -m marketlab.rejudge TASK_ID``.
+
+Run it after changing a task's oracle or the judge tolerances.  Submissions
+are judged across a dedicated worker pool and only rows whose result
+changed are rewritten; see ``marketlab.usecases.rejudge``.  Progress is
+checkpointed per batch, so running the same command again after an
+interruption continues where it stopped (``--restart`` starts over).
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import signal
+import sys
+import threading
+import time
+from dataclasses import replace
+
+from marketlab.infra.settings import settings
+
+logger = logging.getLogger("marketlab.rejudge")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m marketlab.rejudge")
+    parser.add_argument("task_id")
+    parser.add_argument("--workers", type=int, default=settings.judge_pool_size)
+    parser.add_argument("--batch-size", type=int, default=settings.rejudge_batch_size)
+    parser.add_argument("--restart", action="store_true", help="ignore a saved checkpoint")
+    parser.add_argument("--abs-tol", type=float, help="override JudgeSettings.abs_tol")
+    parser.add_argument("--rel-tol", type=float, help="override JudgeSettings.rel_tol")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    from marketlab.infra.db.session import SessionLocal
+    from marketlab.infra.judge.runner_pool import JudgeWorkerPool, PoolSettings
+    from marketlab.usecases.judge_v1 import JudgeSettings
+    from marketlab.usecases.registry import TASK_REGISTRY
+    from marketlab.usecases.rejudge import RejudgeAlreadyRunning, RejudgeProgress, rejudge_task
+
+    if args.task_id not in TASK_REGISTRY:
+        parser.error(f"unknown task {args.task_id!r}")
+    judge_settings = JudgeSettings()
+    if args.abs_tol is not None:
+        judge_settings = replace(judge_settings, abs_tol=args.abs_tol)
+    if args.rel_tol is not None:
+        judge_settings = replace(judge_settings, rel_tol=args.rel_tol)
+
+    # The first Ctrl-C / SIGTERM finishes the current batch, so the checkpoint is exact.
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+
+    started = time.monotonic()
+
+    def report(progress: RejudgeProgress) -> None:
+        elapsed = time.monotonic() - started
+        logger.info(
+            "%s: %d scanned, %d judged, %d updated (%.0f/s)",
+            progress.task_id,
+            progress.scanned,
+            progress.judged,
+            progress.updated,
+            progress.scanned / elapsed if elapsed > 0 else 0.0,
+        )
+
+    pool = None
+    if args.workers > 0:
+        pool = JudgeWorkerPool(
+            PoolSettings(
+                size=args.workers,
+                max_jobs_per_worker=settings.judge_max_jobs_per_worker,
+                memory_limit_mb=settings.judge_memory_limit_mb,
+            )
+        )
+    try:
+        progress = rejudge_task(
+            SessionLocal,
+            args.task_id,
+            pool=pool,
+            settings=judge_settings,
+            batch_size=args.batch_size,
+            restart=args.restart,
+            on_progress=report,
+            stop=stop,
+        )
+    except RejudgeAlreadyRunning as e:
+        logger.error("%s (by the API or another command)", e)
+        return 1
+    finally:
+        if pool is not None:
+            pool.close()
+    if not progress.done:
+        logger.info("Stopped; run the same command again to continue")
+        return 1
+    logger.info("Done in %.1fs", time.monotonic() - started)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
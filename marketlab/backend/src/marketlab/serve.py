@@ -0,0 +1,190 @@
+"""
+Production server: ``python -m marketlab.serve``.
+
+A master process imports the app, syncs schema and tasks once, renders the
+task catalogue and generates the hidden test sets, then forks
+``web_workers`` uvicorn workers that accept on one shared listening socket.
+Everything loaded before the fork is shared copy-on-write (``gc.freeze()``
+keeps the collector from touching, and so copying, those pages); each worker
+starts its own judge pool, queue and database connections in ``lifespan``.
+
+The master restarts workers that die and, on SIGTERM/SIGINT, forwards the
+signal and waits for the workers to finish their in-flight requests.
+
+Workers publish their metrics to ``metrics_dir`` (a temporary directory
+unless configured), so whichever worker a scrape reaches reports them all.
+Unless ``judge_pool_size`` is set, each worker gets ``cpu_count // workers``
+judge processes.
+
+For development keep using ``uvicorn marketlab.api.main:app --reload``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import uvicorn
+from fastapi import FastAPI
+
+from marketlab.infra.judge.test_set import release_shared_blocks
+from marketlab.infra.settings import judge_pool_share, settings
+
+logger = logging.getLogger("marketlab.serve")
+
+# A worker that dies sooner than this after being forked is restarted with a delay.
+MIN_WORKER_UPTIME_SEC = 1.0
+
+
+def preload() -> FastAPI:
+    """Import the app and build the read-only state workers will share."""
+    from marketlab.api.catalogue import get_task_catalogue
+    from marketlab.api.main import app
+    from marketlab.infra.db.seed import prepare_database
+    from marketlab.infra.db.session import SessionLocal, engine
+    from marketlab.usecases.registry import TASK_REGISTRY
+    from marketlab.usecases.submit_solution import HIDDEN_TESTS_COUNT
+    from marketlab.usecases.test_sets import HIDDEN_TEST_SETS
+
+    prepare_database(engine)
+    catalogue = get_task_catalogue()
+    with SessionLocal() as db:
+        for task_id in TASK_REGISTRY:
+            catalogue.detail(task_id)
+            for seed in range(settings.hidden_test_set_variants):
+                HIDDEN_TEST_SETS.get(task_id, seed=seed, n=HIDDEN_TESTS_COUNT, db=db)
+        db.commit()
+
+    # Connections must not be shared with the children.
+    engine.dispose()
+    return app
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app: FastAPI, sock: socket.socket) -> None:
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, signal.SIG_DFL)  # uvicorn installs its own handlers
+    config = uvicorn.Config(app, lifespan="on", proxy_headers=True, access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Master:
+    def __init__(self, app: FastAPI, sock: socket.socket, workers: int) -> None:
+        self._app = app
+        self._sock = sock
+        self._workers = max(1, workers)
+        self._children: dict[int, float] = {}  # pid -> fork time
+        self._stopping = False
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(self._app, self._sock)
+            except BaseException:
+                logger.exception("Worker %d failed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self._children[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+
+    def _stop(self, signum: int, frame: object) -> None:  # noqa: ARG002
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for _ in range(self._workers):
+            self._spawn()
+
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self._children.pop(pid, None)
+            if started is None:
+                continue
+            if self._stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            logger.warning("Worker %d exited with %d; restarting", pid, code)
+            if time.monotonic() - started < MIN_WORKER_UPTIME_SEC:
+                time.sleep(MIN_WORKER_UPTIME_SEC)  # do not spin on a crash at boot
+            if not self._stopping:
+                self._spawn()
+        self._sock.close()
+        return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m marketlab.serve")
+    parser.add_argument("--host", default=settings.web_host)
+    parser.add_argument("--port", type=int, default=settings.web_port)
+    parser.add_argument("--workers", type=int, default=settings.web_workers)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    if "judge_pool_size" not in settings.model_fields_set:
+        settings.judge_pool_size = judge_pool_share(args.workers)
+    metrics_tmp_dir = _prepare_metrics_dir()
+    app = preload()
+    sock = bind_socket(args.host, args.port, settings.web_backlog)
+    logger.info(
+        "Listening on %s:%d with %d workers (judge pool of %d per worker)",
+        args.host,
+        sock.getsockname()[1],
+        args.workers,
+        settings.judge_pool_size,
+    )
+    # Everything allocated so far lives for the whole process; keep the GC off
+    # those pages so forked workers keep sharing them.
+    gc.freeze()
+    try:
+        return Master(app, sock, args.workers).run()
+    finally:
+        # The preloaded hidden test sets live in shared memory the master created.
+        release_shared_blocks()
+        if metrics_tmp_dir is not None:
+            shutil.rmtree(metrics_tmp_dir, ignore_errors=True)
+
+
+def _prepare_metrics_dir() -> str | None:
+    """Give the workers an empty ``metrics_dir``; returns it if it is temporary."""
+    if not settings.metrics_dir:
+        settings.metrics_dir = tempfile.mkdtemp(prefix="marketlab-metrics-")
+        return settings.metrics_dir
+    directory = Path(settings.metrics_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.glob("*.json"):
+        path.unlink(missing_ok=True)  # totals of a previous server run
+    return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+"""
+Task modules, one per task template.
+
+A task module defines ``TASK: TaskDefinition`` (spec, oracle, generator) and
+is listed in ``marketlab.domain.task_loader.TASK_MANIFEST``; nothing imports
+it directly, so it is only loaded once its task is first used.
+"""
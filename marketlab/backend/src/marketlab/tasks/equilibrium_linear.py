@@ -0,0 +1,190 @@
+"""Market equilibrium with linear demand/supply and an optional per-unit tax or subsidy."""
+
+from __future__ import annotations
+
+from marketlab.domain.equilibrium import compute_equilibrium_batch
+from marketlab.domain.sampling import Choice, Const, Constraint, GeneratorSpec, Uniform, Where
+from marketlab.domain.task_loader import TaskDefinition
+from marketlab.domain.tasks import Columns, FieldSpec, Params, TaskSpec
+from marketlab.usecases.solvers import solve_equilibrium_linear, solve_equilibrium_linear_batch
+
+SPEC = TaskSpec(
+    id="equilibrium_linear_v1",
+    title="Равновесие на конкурентном рынке (линейные спрос/предложение) с режимами",
+    topic="equilibrium",
+    input_fields=(
+        FieldSpec("a", "float", "Параметр спроса: Qd = a - bP"),
+        FieldSpec("b", "float", "Наклон спроса (b>0): Qd = a - bP"),
+        FieldSpec("c", "float", "Параметр предложения: Qs = c + dP"),
+        FieldSpec("d", "float", "Наклон предложения (d>0): Qs = c + dP"),
+        FieldSpec("mode", "str", "Режим: none | tax | subsidy"),
+        FieldSpec("t", "float", "Величина налога/субсидии (t>=0), используется при mode!=none"),
+    ),
+    output_fields=(
+        FieldSpec("p_eq", "float", "Равновесная цена (для потребителя)"),
+        FieldSpec("q_eq", "float", "Равновесный объём"),
+    ),
+)
+
+GENERATOR = GeneratorSpec(
+    params=(
+        ("mode", Choice(("none", "tax", "subsidy"))),
+        ("a", Uniform(20, 300, decimals=2)),
+        ("b", Uniform(0.5, 10, decimals=2)),
+        ("c", Uniform(-100, lambda cols: cols["a"] * 0.4, decimals=2)),
+        ("d", Uniform(0.5, 10, decimals=2)),
+        (
+            "t",
+            Where(
+                lambda cols: cols["mode"] == "none",
+                then=Const(0.0),
+                otherwise=Uniform(1, 30, decimals=2),
+            ),
+        ),
+    ),
+    constraints=(
+        # P* > 0 and Q* > 0, exactly as the oracle decides it (e.g. a subsidy
+        # needs a - c > d*t, a tax needs a*d + b*c > b*d*t).
+        Constraint(
+            "equilibrium exists",
+            lambda cols: compute_equilibrium_batch(
+                cols["a"], cols["b"], cols["c"], cols["d"], cols["mode"], cols["t"]
+            ).valid,
+        ),
+    ),
+    cover="mode",
+    public_tests=({"a": 120.0, "b": 3.0, "c": -10.0, "d": 2.0, "mode": "tax", "t": 10.0},),
+)
+
+_EQUILIBRIUM_EXISTS = GENERATOR.constraints
+
+
+def _subsidy_price_zero(cols: Columns):
+    # The subsidy at which P* reaches 0: a - c - d*t = 0.
+    return (cols["a"] - cols["c"]) / cols["d"]
+
+
+def _tax_quantity_zero(cols: Columns):
+    # The tax at which Q* reaches 0: a*d + b*c - b*d*t = 0.
+    return (cols["a"] * cols["d"] + cols["b"] * cols["c"]) / (cols["b"] * cols["d"])
+
+
+# Adversarial families for stress judging: each is tried in turn, chunk by chunk.
+STRESS_PROFILES: tuple[tuple[str, GeneratorSpec], ...] = (
+    ("random", GENERATOR),
+    (
+        "huge_magnitudes",
+        GeneratorSpec(
+            params=(
+                ("mode", Choice(("none", "tax", "subsidy"))),
+                ("a", Uniform(1e6, 1e12)),
+                ("b", Uniform(0.5, 1e3)),
+                ("c", Uniform(lambda cols: -cols["a"], lambda cols: cols["a"] * 0.4)),
+                ("d", Uniform(0.5, 1e3)),
+                (
+                    "t",
+                    Where(
+                        lambda cols: cols["mode"] == "none",
+                        then=Const(0.0),
+                        otherwise=Uniform(0, lambda cols: cols["a"] * 1e-3),
+                    ),
+                ),
+            ),
+            constraints=_EQUILIBRIUM_EXISTS,
+            cover="mode",
+        ),
+    ),
+    (
+        "tiny_slopes",
+        GeneratorSpec(
+            params=(
+                ("mode", Choice(("none", "tax", "subsidy"))),
+                ("a", Uniform(20, 300)),
+                ("b", Uniform(1e-9, 1e-3)),
+                ("c", Uniform(-100, lambda cols: cols["a"] * 0.4)),
+                ("d", Uniform(1e-9, 1e-3)),
+                (
+                    "t",
+                    Where(
+                        lambda cols: cols["mode"] == "none",
+                        then=Const(0.0),
+                        otherwise=Uniform(0, 30),
+                    ),
+                ),
+            ),
+            constraints=_EQUILIBRIUM_EXISTS,
+            cover="mode",
+        ),
+    ),
+    (
+        "near_zero_price",
+        GeneratorSpec(
+            params=(
+                ("mode", Const("subsidy")),
+                ("a", Uniform(20, 300)),
+                ("b", Uniform(0.5, 10)),
+                ("c", Uniform(-100, lambda cols: cols["a"] * 0.4)),
+                ("d", Uniform(0.5, 10)),
+                (
+                    "t",
+                    Uniform(
+                        lambda cols: _subsidy_price_zero(cols) * (1 - 1e-6),
+                        _subsidy_price_zero,
+                    ),
+                ),
+            ),
+            constraints=_EQUILIBRIUM_EXISTS,
+        ),
+    ),
+    (
+        "near_zero_quantity",
+        GeneratorSpec(
+            params=(
+                ("mode", Const("tax")),
+                ("a", Uniform(20, 300)),
+                ("b", Uniform(0.5, 10)),
+                ("c", Uniform(0, lambda cols: cols["a"] * 0.4)),
+                ("d", Uniform(0.5, 10)),
+                (
+                    "t",
+                    Uniform(
+                        lambda cols: _tax_quantity_zero(cols) * (1 - 1e-6),
+                        _tax_quantity_zero,
+                    ),
+                ),
+            ),
+            constraints=_EQUILIBRIUM_EXISTS,
+        ),
+    ),
+    (
+        "boundary_t",
+        GeneratorSpec(
+            params=(
+                ("mode", Choice(("tax", "subsidy"))),
+                ("a", Uniform(20, 300, decimals=2)),
+                ("b", Uniform(0.5, 10, decimals=2)),
+                ("c", Uniform(-100, lambda cols: cols["a"] * 0.4, decimals=2)),
+                ("d", Uniform(0.5, 10, decimals=2)),
+                ("t", Uniform(0, 1e-9)),
+            ),
+            constraints=_EQUILIBRIUM_EXISTS,
+            cover="mode",
+        ),
+    ),
+)
+
+
+def _test_class(params: Params) -> str:
+    # Policy mode, and whether supply starts at a positive quantity.
+    return f"{params['mode']}/{'c>=0' if params['c'] >= 0 else 'c<0'}"
+
+
+TASK = TaskDefinition(
+    spec=SPEC,
+    solve=solve_equilibrium_linear,
+    solve_batch=solve_equilibrium_linear_batch,
+    generator=GENERATOR,
+    generator_version=3,
+    stress_profiles=STRESS_PROFILES,
+    test_class=_test_class,
+)
@@ -0,0 +1,190 @@
+"""
+Background judging of submissions accepted in async mode.
+
+The ``submissions`` table is the durable part of the queue: a row with a
+``PENDING`` verdict is a job.  The in-process ``asyncio.Queue`` only carries
+ids, so anything left unjudged when the process stops is picked up again by
+``start()`` of the next (or of a restarted) API process.
+
+Several API processes (``marketlab.serve`` workers) may hold the same id:
+a consumer first claims the row with a conditional ``UPDATE`` from PENDING
+to JUDGING, and only the winner judges it.  Rows left JUDGING by a process
+that died mid-judging go back to PENDING at the next server start
+(``prepare_database``) once their claim is older than
+``judge_claim_ttl_sec``, so claims of live processes (other hosts, a
+server started next to a running one) are left alone.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from marketlab.infra.db.models import SubmissionRow
+from marketlab.infra.db.repos import AsyncSubmissionRepo, usage_columns
+from marketlab.infra.db.repos.submission_repo import SUBMISSION_DB_SECONDS
+from marketlab.infra.judge.runner_pool import JudgeWorkerPool
+from marketlab.infra.metrics import REGISTRY
+from marketlab.usecases.judge_v1 import JudgeSettings
+from marketlab.usecases.submit_solution import (
+    HIDDEN_TESTS_COUNT,
+    SubmitSolutionInput,
+    submit_solution,
+)
+from marketlab.usecases.test_sets import HIDDEN_TEST_SETS, pick_hidden_seed
+
+logger = logging.getLogger(__name__)
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "marketlab_judge_queue_depth", "Async submissions waiting for a free consumer."
+)
+QUEUE_BUSY = REGISTRY.gauge(
+    "marketlab_judge_queue_busy_consumers", "Queue consumers currently judging."
+)
+
+
+class JudgeQueue:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        pool: JudgeWorkerPool | None = None,
+        concurrency: int = 1,
+        judge_settings: JudgeSettings = JudgeSettings(),
+    ) -> None:
+        self._session_factory = session_factory
+        self._pool = pool
+        self._concurrency = max(1, concurrency)
+        self._judge_settings = judge_settings
+        self._queue: asyncio.Queue[str] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._consumers: list[asyncio.Task[None]] = []
+        self._busy: set[asyncio.Task[None]] = set()
+        self._stopping = False
+        self._done: dict[str, asyncio.Event] = {}
+
+    @property
+    def depth(self) -> int:
+        """Number of submissions waiting for a free consumer."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def start(self) -> None:
+        """Start consumers and re-enqueue submissions left pending by a previous run."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        for _ in range(self._concurrency):
+            self._consumers.append(asyncio.create_task(self._consume()))
+        QUEUE_DEPTH.set_function(lambda: self.depth)
+        QUEUE_BUSY.set_function(lambda: len(self._busy))
+
+        async with self._session_factory() as db:
+            pending = await AsyncSubmissionRepo(db).list_pending_ids()
+        for submission_id in pending:
+            self._queue.put_nowait(submission_id)
+        if pending:
+            logger.info("Re-enqueued %d pending submissions", len(pending))
+
+    async def stop(self) -> None:
+        """
+        Stop the consumers.  Idle ones are cancelled; a submission being judged
+        is finished first so its verdict and DB session are closed cleanly.
+        """
+        self._stopping = True
+        QUEUE_DEPTH.set_function(None)
+        QUEUE_BUSY.set_function(None)
+        for task in self._consumers:
+            if task not in self._busy:
+                task.cancel()
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers.clear()
+        self._stopping = False
+
+    def enqueue(self, submission_id: str) -> None:
+        """Schedule a persisted PENDING submission; safe to call from any thread."""
+        if self._loop is None or self._queue is None:
+            raise RuntimeError("Judge queue is not started")
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, submission_id)
+
+    async def wait_for(self, submission_id: str, timeout: float) -> None:
+        """Wait until the submission is judged by this queue or ``timeout`` elapses."""
+        event = self._done.setdefault(submission_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except TimeoutError:
+            # Do not keep events for submissions judged elsewhere (or already
+            # judged); callers re-check the DB after every wait anyway.
+            if self._done.get(submission_id) is event:
+                del self._done[submission_id]
+
+    async def load(self, submission_id: str) -> SubmissionRow | None:
+        """Fetch the current state of a submission."""
+        async with self._session_factory() as db:
+            return await AsyncSubmissionRepo(db).get_by_id(submission_id)
+
+    async def _consume(self) -> None:
+        assert self._queue is not None
+        task = asyncio.current_task()
+        assert task is not None
+        while not self._stopping:
+            submission_id = await self._queue.get()
+            self._busy.add(task)
+            try:
+                await self._judge_one(submission_id)
+            except Exception:
+                logger.exception("Failed to judge submission %s", submission_id)
+            finally:
+                self._busy.discard(task)
+                self._queue.task_done()
+                event = self._done.pop(submission_id, None)
+                if event is not None:
+                    event.set()
+
+    async def _judge_one(self, submission_id: str) -> None:
+        async with self._session_factory() as db:
+            repo = AsyncSubmissionRepo(db)
+            # Every API process enqueues the PENDING rows it finds on start;
+            # the claim makes sure only one of them judges each submission.
+            claimed = await repo.claim(submission_id)
+            await db.commit()
+            if not claimed:
+                return
+            row = await repo.get_by_id(submission_id)
+            if row is None:
+                return
+
+            test_set = None
+            if row.test_set_id is not None:
+                test_set = await HIDDEN_TEST_SETS.aget_by_key(row.test_set_id, db)
+            if test_set is None:
+                test_set = await HIDDEN_TEST_SETS.aget(
+                    row.task_id, seed=pick_hidden_seed(), n=HIDDEN_TESTS_COUNT, db=db
+                )
+            # Hand the connection back to the pool for the duration of judging.
+            await db.commit()
+
+            report = await asyncio.to_thread(
+                submit_solution,
+                SubmitSolutionInput(
+                    task_id=row.task_id,
+                    user_code=row.user_code,
+                    tests=test_set.packed,
+                    expected=test_set.expected,
+                    test_set_digest=test_set.digest,
+                ),
+                self._judge_settings,
+                pool=self._pool,
+            )
+
+            row.verdict = report.verdict
+            row.passed = report.passed
+            row.total = report.total
+            row.message = report.message
+            row.failed_test_index = report.failed_test_index
+            row.failed_field = report.failed_field
+            row.test_set_id = test_set.key
+            for column, value in usage_columns(report).items():
+                setattr(row, column, value)
+            with SUBMISSION_DB_SECONDS.labels("commit").time():
+                await db.commit()
@@ -1,18 +1,40 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from time import perf_counter
 from typing import Any
 
-from marketlab.domain.judge.models import JudgeReport
-from marketlab.domain.tasks import Result, TaskSpec
+from marketlab.domain.judge.models import JudgeReport, TestOutcome
+from marketlab.domain.tasks import Params, Result, TaskSpec
 from marketlab.infra.judge.runner_inprocess import TimeoutError, compile_user_solve, time_limit
+from marketlab.infra.judge.test_set import TestRow, TestSet
+from marketlab.infra.judge.usage import UsageMeter
+from marketlab.infra.metrics import REGISTRY
+
+COMPILE_SECONDS = REGISTRY.histogram(
+    "marketlab_compile_seconds", "Compiling user code and resolving solve().", ("task_id",)
+)
+SOLVE_SECONDS = REGISTRY.histogram(
+    "marketlab_solve_seconds", "One call of the user's solve(params).", ("task_id",)
+)
+
+MLE_MESSAGE = "Memory limit exceeded"
 
 
 @dataclass(frozen=True, slots=True)
 class JudgeSettings:
-    time_limit_sec: int = 1
+    # CPU-time limits in (fractional) seconds: per test (and for compiling),
+    # and for all tests of a submission together.
+    time_limit_sec: float = 0.1
+    submission_time_limit_sec: float = 1.0
     abs_tol: float = 1e-6
     rel_tol: float = 1e-6
+    # Full-report mode: one time budget for a whole batch of tests.
+    batch_time_limit_sec: float = 2.0
+    # Peak RSS a run may add on top of the judge process; 0 disables (MLE check,
+    # made in pool workers only).
+    memory_limit_mb: int = 256
 
 
 def _validate_result(spec: TaskSpec, user_result: Any) -> Result | None:
@@ -47,56 +69,269 @@ def run_judge_v1(
     spec: TaskSpec,
     oracle,  # callable(params)->Result
     user_code: str,
-    tests: list[dict[str, Any]],
+    tests: Sequence[Params] | TestSet,
     settings: JudgeSettings = JudgeSettings(),
+    expected: Sequence[Result | None] | None = None,
+    order: Sequence[int] | None = None,
 ) -> JudgeReport:
     """
     Runs user solve() against tests and compares with oracle.
+
+    ``tests`` are dicts or a columnar ``TestSet``.  ``expected`` may carry
+    precomputed oracle answers aligned with ``tests`` (e.g. from a batch
+    oracle); the oracle is only called for missing ones.
+    The report carries the run's resource usage.
+
+    ``order`` (a permutation of test indices) is the order to run the tests
+    in; ``failed_test_index`` always refers to the position in ``tests``.
     """
+    meter = UsageMeter()
+    report = _first_failure(spec, oracle, user_code, tests, settings, expected, meter, order)
+    return _with_usage(report, meter, settings)
+
+
+def _first_failure(
+    spec: TaskSpec,
+    oracle,
+    user_code: str,
+    tests: Sequence[Params] | TestSet,
+    settings: JudgeSettings,
+    expected: Sequence[Result | None] | None,
+    meter: UsageMeter,
+    order: Sequence[int] | None = None,
+) -> JudgeReport:
     try:
-        with time_limit(settings.time_limit_sec):
+        with time_limit(settings.time_limit_sec), COMPILE_SECONDS.labels(spec.id).time():
             solve = compile_user_solve(user_code)
     except TimeoutError:
         return JudgeReport(verdict="TLE", passed=0, total=len(tests), message="TLE during compilation")
+    except MemoryError:
+        return JudgeReport(verdict="MLE", passed=0, total=len(tests), message=MLE_MESSAGE)
     except Exception as e:
         return JudgeReport(verdict="RE", passed=0, total=len(tests), message=f"Compile error: {e}")
 
-    passed = 0
     total = len(tests)
+    solve_seconds = SOLVE_SECONDS.labels(spec.id)
 
-    for i, params in enumerate(tests):
+    def judge_test(i: int) -> JudgeReport | None:
+        """The failure on test ``i`` (``passed`` still unset), None if it passes."""
+        params = tests[i]
         try:
             with time_limit(settings.time_limit_sec):
-                user_out_raw = solve(params)
+                # A copy, so user code cannot corrupt cached/shared tests.
+                start = perf_counter()
+                user_out_raw = solve(params.copy())
+                elapsed = perf_counter() - start
+                solve_seconds.observe(elapsed)
+                meter.test_finished(elapsed * 1000)
         except TimeoutError:
-            return JudgeReport(verdict="TLE", passed=passed, total=total, message="TLE", failed_test_index=i)
+            return JudgeReport(verdict="TLE", passed=0, total=total, message="TLE", failed_test_index=i)
+        except MemoryError:
+            return JudgeReport(verdict="MLE", passed=0, total=total, message=MLE_MESSAGE, failed_test_index=i)
         except Exception as e:
-            return JudgeReport(verdict="RE", passed=passed, total=total, message=f"Runtime error: {e}", failed_test_index=i)
+            return JudgeReport(verdict="RE", passed=0, total=total, message=f"Runtime error: {e}", failed_test_index=i)
 
         user_out = _validate_result(spec, user_out_raw)
         if user_out is None:
             return JudgeReport(
                 verdict="WA",
-                passed=passed,
+                passed=0,
                 total=total,
                 message="Wrong output format/keys",
                 failed_test_index=i,
             )
 
-        expected = oracle(params)
+        exp = expected[i] if expected is not None else None
+        if exp is None:
+            exp = oracle(params)
 
-        for field, exp_val in expected.items():
+        for field, exp_val in exp.items():
             got_val = user_out[field]
             if not _close_enough(got_val, exp_val, settings.abs_tol, settings.rel_tol):
                 return JudgeReport(
                     verdict="WA",
-                    passed=passed,
+                    passed=0,
                     total=total,
                     message="Wrong answer",
                     failed_test_index=i,
                     failed_field=field,
                 )
+        return None
 
-        passed += 1
+    run_order = list(order) if order is not None else range(total)
+    passed = 0
+    i = 0
+    ran: set[int] = set()
+    failure = None
+    try:
+        with time_limit(settings.submission_time_limit_sec):
+            for i in run_order:
+                ran.add(i)
+                failure = judge_test(i)
+                if failure is not None:
+                    break
+                passed += 1
+            if failure is not None and order is not None:
+                # The report is that of the canonical order: a test before the
+                # failed one that was not run yet may fail first.
+                for i in range(failure.failed_test_index):
+                    if i not in ran:
+                        earlier = judge_test(i)
+                        if earlier is not None:
+                            failure = earlier
+                            break
+                        passed += 1
+    except TimeoutError:
+        # The submission budget ran out outside user code (e.g. in the oracle).
+        return JudgeReport(verdict="TLE", passed=passed, total=total, message="TLE", failed_test_index=i)
 
+    if failure is not None:
+        # Every test before the first failing one (canonically) passed.
+        return replace(failure, passed=failure.failed_test_index)
     return JudgeReport(verdict="AC", passed=passed, total=total, message="Accepted")
+
+
+def _with_usage(report: JudgeReport, meter: UsageMeter, settings: JudgeSettings) -> JudgeReport:
+    """
+    Attach the run's resource usage; a run that outgrew the memory limit is
+    MLE (checked in pool workers only, where the growth is known).
+    """
+    usage, growth_kb = meter.finish()
+    report = replace(report, usage=usage)
+    if settings.memory_limit_mb <= 0 or report.verdict in ("TLE", "MLE"):
+        return report
+    if growth_kb is None or growth_kb <= settings.memory_limit_mb * 1024:
+        return report
+    return replace(report, verdict="MLE", message=MLE_MESSAGE, failed_field=None)
+
+
+def run_judge_full(
+    *,
+    spec: TaskSpec,
+    oracle,  # callable(params)->Result
+    user_code: str,
+    tests: Sequence[Params] | TestSet,
+    settings: JudgeSettings = JudgeSettings(),
+    expected: Sequence[Result | None] | None = None,
+    index_offset: int = 0,
+) -> JudgeReport:
+    """
+    Runs user solve() against *all* tests and reports every outcome.
+
+    Unlike run_judge_v1 it does not stop at the first failure: a test over
+    ``time_limit_sec`` is TLE and judging goes on, within one
+    ``batch_time_limit_sec`` budget for the whole batch; tests not reached
+    before the budget runs out are TLE.
+    ``index_offset`` shifts reported indices when judging a shard.
+    """
+    meter = UsageMeter()
+    total = len(tests)
+    try:
+        with time_limit(settings.time_limit_sec), COMPILE_SECONDS.labels(spec.id).time():
+            solve = compile_user_solve(user_code)
+    except TimeoutError:
+        report = JudgeReport(verdict="TLE", passed=0, total=total, message="TLE during compilation")
+        return _with_usage(report, meter, settings)
+    except MemoryError:
+        report = JudgeReport(verdict="MLE", passed=0, total=total, message=MLE_MESSAGE)
+        return _with_usage(report, meter, settings)
+    except Exception as e:
+        report = JudgeReport(verdict="RE", passed=0, total=total, message=f"Compile error: {e}")
+        return _with_usage(report, meter, settings)
+
+    outcomes: list[TestOutcome] = []
+    try:
+        with time_limit(settings.batch_time_limit_sec):
+            for i, params in enumerate(tests):
+                try:
+                    with time_limit(settings.time_limit_sec):
+                        outcome = judge_one_test(
+                            spec, oracle, solve, params, expected, i, index_offset, settings
+                        )
+                except TimeoutError:
+                    outcome = TestOutcome(index=index_offset + i, verdict="TLE", message="TLE")
+                meter.test_finished(outcome.time_ms)
+                outcomes.append(outcome)
+    except TimeoutError:
+        outcomes.extend(
+            TestOutcome(index=index_offset + i, verdict="TLE", message="TLE")
+            for i in range(len(outcomes), total)
+        )
+
+    return _with_usage(summarize_outcomes(outcomes, total=total), meter, settings)
+
+
+def judge_one_test(
+    spec: TaskSpec,
+    oracle,
+    solve,
+    params: Params | TestRow,
+    expected: Sequence[Result | None] | None,
+    i: int,
+    index_offset: int,
+    settings: JudgeSettings,
+) -> TestOutcome:
+    """
+    Judge ``params`` (test ``i`` of ``expected``) with an already compiled ``solve``.
+
+    ``TimeoutError`` from the surrounding time limit propagates to the caller.
+    """
+    index = index_offset + i
+    start = perf_counter()
+    try:
+        user_out_raw = solve(params.copy())
+    except TimeoutError:
+        raise
+    except MemoryError:
+        time_ms = (perf_counter() - start) * 1000
+        return TestOutcome(index=index, verdict="MLE", message=MLE_MESSAGE, time_ms=time_ms)
+    except Exception as e:
+        time_ms = (perf_counter() - start) * 1000
+        return TestOutcome(
+            index=index, verdict="RE", message=f"Runtime error: {e}", time_ms=time_ms
+        )
+    elapsed = perf_counter() - start
+    SOLVE_SECONDS.labels(spec.id).observe(elapsed)
+    time_ms = elapsed * 1000
+
+    user_out = _validate_result(spec, user_out_raw)
+    if user_out is None:
+        return TestOutcome(
+            index=index, verdict="WA", message="Wrong output format/keys", time_ms=time_ms
+        )
+
+    exp = expected[i] if expected is not None else None
+    if exp is None:
+        exp = oracle(params)
+
+    for field, exp_val in exp.items():
+        if not _close_enough(user_out[field], exp_val, settings.abs_tol, settings.rel_tol):
+            return TestOutcome(
+                index=index,
+                verdict="WA",
+                message="Wrong answer",
+                failed_field=field,
+                expected=dict(exp),
+                got=user_out,
+                time_ms=time_ms,
+            )
+
+    return TestOutcome(index=index, verdict="AC", expected=dict(exp), got=user_out, time_ms=time_ms)
+
+
+def summarize_outcomes(outcomes: Sequence[TestOutcome], *, total: int) -> JudgeReport:
+    """Fold per-test outcomes into a report; the first failing test sets the verdict."""
+    ordered = tuple(sorted(outcomes, key=lambda o: o.index))
+    passed = sum(1 for o in ordered if o.verdict == "AC")
+    first_failure = next((o for o in ordered if o.verdict != "AC"), None)
+    if first_failure is None:
+        return JudgeReport(verdict="AC", passed=passed, total=total, message="Accepted", tests=ordered)
+    return JudgeReport(
+        verdict=first_failure.verdict,
+        passed=passed,
+        total=total,
+        message=first_failure.message,
+        failed_test_index=first_failure.index,
+        failed_field=first_failure.failed_field,
+        tests=ordered,
+    )
@@ -1,30 +1,37 @@
 from __future__ import annotations
 
-from marketlab.domain.tasks import FieldSpec, TaskSpec
-from marketlab.usecases.solvers import solve_equilibrium_linear
-
-
-EQUILIBRIUM_LINEAR = TaskSpec(
-    id="equilibrium_linear_v1",
-    title="Равновесие на конкурентном рынке (линейные спрос/предложение) с режимами",
-    topic="equilibrium",
-    input_fields=(
-        FieldSpec("a", "float", "Параметр спроса: Qd = a - bP"),
-        FieldSpec("b", "float", "Наклон спроса (b>0): Qd = a - bP"),
-        FieldSpec("c", "float", "Параметр предложения: Qs = c + dP"),
-        FieldSpec("d", "float", "Наклон предложения (d>0): Qs = c + dP"),
-        FieldSpec("mode", "str", "Режим: none | tax | subsidy"),
-        FieldSpec("t", "float", "Величина налога/субсидии (t>=0), используется при mode!=none"),
-    ),
-    output_fields=(
-        FieldSpec("p_eq", "float", "Равновесная цена (для потребителя)"),
-        FieldSpec("q_eq", "float", "Равновесный объём"),
-    ),
-)
+from collections.abc import Iterator, Mapping
+
+import numpy as np
+
+from marketlab.domain.task_loader import TASKS, Oracle
+from marketlab.domain.tasks import BatchResult, Columns, Params, Result, TaskSpec, tests_to_columns
+from marketlab.infra.judge.test_set import TestSet
+from marketlab.infra.metrics import REGISTRY
+
+
+class _SpecsAndOracles(Mapping[str, tuple[TaskSpec, Oracle]]):
+    """``task_id -> (spec, oracle)``; a task module is imported on first lookup."""
+
+    def __getitem__(self, task_id: str) -> tuple[TaskSpec, Oracle]:
+        task = TASKS[task_id]
+        return task.spec, task.solve
+
+    def __contains__(self, task_id: object) -> bool:
+        return task_id in TASKS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(TASKS)
+
+    def __len__(self) -> int:
+        return len(TASKS)
 
-TASK_REGISTRY: dict[str, tuple[TaskSpec, object]] = {
-    EQUILIBRIUM_LINEAR.id: (EQUILIBRIUM_LINEAR, solve_equilibrium_linear),
-}
+
+TASK_REGISTRY = _SpecsAndOracles()
+
+ORACLE_SECONDS = REGISTRY.histogram(
+    "marketlab_oracle_seconds", "Oracle answers for one batch of tests.", ("task_id",)
+)
 
 
 def get_task_spec(task_id: str) -> TaskSpec:
@@ -42,3 +49,39 @@ def solve_task(task_id: str, params: dict) -> dict[str, float]:
         raise ValueError(f"Solver returned keys {sorted(got)}, expected {sorted(expected)}")
 
     return result
+
+
+def solve_task_batch(task_id: str, columns: Columns) -> BatchResult:
+    """Evaluate the task oracle over column-oriented params in one call."""
+    task = TASKS[task_id]
+    if task.solve_batch is not None:
+        return task.solve_batch(columns)
+
+    # Generic fallback: row by row through the scalar solver.
+    spec, solver = task.spec, task.solve
+    n = len(next(iter(columns.values()))) if columns else 0
+    results: list[Result | None] = []
+    for i in range(n):
+        params = {name: col[i] for name, col in columns.items()}
+        try:
+            results.append(solver(params))
+        except Exception:
+            results.append(None)
+    return BatchResult(
+        values={
+            f.name: np.array([r[f.name] if r else np.nan for r in results], dtype=np.float64)
+            for f in spec.output_fields
+        },
+        valid=np.array([r is not None for r in results], dtype=bool),
+    )
+
+
+def expected_results(task_id: str, tests: list[Params] | TestSet) -> list[Result | None]:
+    """Oracle answers for the tests; None where the oracle rejects the params."""
+    spec, _solver = TASK_REGISTRY[task_id]
+    with ORACLE_SECONDS.labels(task_id).time():
+        if isinstance(tests, TestSet):
+            columns = tests.to_columns()
+        else:
+            columns = tests_to_columns(tests, spec.input_fields)
+        return solve_task_batch(task_id, columns).rows()
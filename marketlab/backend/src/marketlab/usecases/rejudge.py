@@ -0,0 +1,424 @@
+"""
+Bulk re-judging of a task's stored submissions.
+
+When a task's oracle or the judge tolerances change, stored verdicts go
+stale.  ``rejudge_task`` walks the task's judged submissions oldest first
+in keyset batches and, per batch:
+
+* reads the rows (streamed, so a batch is never buffered twice),
+* judges every distinct ``(user_code, test set)`` once, spread over the
+  judge pool's workers; identical code seen in an earlier batch is answered
+  from a job-local cache,
+* writes the rows whose result changed with one executemany ``UPDATE`` and
+  saves the batch's last key as a checkpoint in the same transaction.
+
+A run that is interrupted resumes after the last committed batch.  Only one
+run per task may go at a time across all processes (API workers and the
+CLI): a run holds a lease row in ``app_state``, renewed with every batch's
+commit, and a second run is refused with ``RejudgeAlreadyRunning``.  Each
+stored hidden test set is re-answered with the current oracle before use
+(``HiddenTestSetCache.refresh``), since its stored answers are what went
+stale.  PENDING submissions are left to the judge queue.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from marketlab.domain.judge.models import JudgeReport
+from marketlab.infra.cache import LRUCache
+from marketlab.infra.db.repos import StoredResult, SubmissionCursor, SubmissionRepo, usage_columns
+from marketlab.infra.judge.runner_inprocess import code_hash
+from marketlab.infra.judge.runner_pool import JudgeWorkerPool
+from marketlab.infra.metrics import REGISTRY
+from marketlab.usecases.judge_v1 import JudgeSettings
+from marketlab.usecases.submit_solution import (
+    HIDDEN_TESTS_COUNT,
+    SubmitSolutionInput,
+    submit_solution,
+)
+from marketlab.usecases.test_sets import HIDDEN_TEST_SETS, HiddenTestSet, pick_hidden_seed
+
+logger = logging.getLogger(__name__)
+
+REJUDGED = REGISTRY.counter(
+    "marketlab_rejudged_total",
+    "Submissions re-judged, by whether the stored result changed.",
+    ("task_id", "changed"),
+)
+
+DEFAULT_BATCH_SIZE = 500
+# A lease not renewed for this long belongs to a run that died; it must be
+# longer than judging one batch can take.
+LEASE_TTL_SEC = 600.0
+# Reports kept for code already judged by this run (identical resubmissions).
+DEDUP_CACHE_SIZE = 50_000
+
+# Stored columns a re-judge may change (resource usage is rewritten along with them).
+_RESULT_COLUMNS = (
+    "verdict",
+    "passed",
+    "total",
+    "message",
+    "failed_test_index",
+    "failed_field",
+    "test_set_id",
+)
+
+# (code hash, test set key) -> report
+_JobKey = tuple[str, str]
+
+
+class RejudgeAlreadyRunning(Exception):
+    """Another run (possibly in another process) holds the task's lease."""
+
+    def __init__(self, task_id: str) -> None:
+        super().__init__(f"Task '{task_id}' is already being re-judged")
+        self.task_id = task_id
+
+
+@dataclass(frozen=True, slots=True)
+class RejudgeProgress:
+    task_id: str
+    scanned: int = 0  # submissions read
+    judged: int = 0  # distinct (code, test set) pairs judged
+    updated: int = 0  # submissions whose stored result changed
+    after: SubmissionCursor | None = None  # last committed position
+    done: bool = False
+
+    def encode(self) -> str:
+        return json.dumps(
+            {
+                "scanned": self.scanned,
+                "judged": self.judged,
+                "updated": self.updated,
+                "after": self.after.encode() if self.after is not None else None,
+            }
+        )
+
+    @classmethod
+    def decode(cls, task_id: str, value: str) -> RejudgeProgress:
+        data = json.loads(value)
+        after = data["after"]
+        return cls(
+            task_id=task_id,
+            scanned=data["scanned"],
+            judged=data["judged"],
+            updated=data["updated"],
+            after=SubmissionCursor.decode(after) if after is not None else None,
+        )
+
+
+def _result_values(report: JudgeReport, test_set: HiddenTestSet) -> dict[str, Any]:
+    return {
+        "verdict": report.verdict,
+        "passed": report.passed,
+        "total": report.total,
+        "message": report.message,
+        "failed_test_index": report.failed_test_index,
+        "failed_field": report.failed_field,
+        "test_set_id": test_set.key,
+    }
+
+
+class _Run:
+    """State of one ``rejudge_task`` call: refreshed test sets and reports so far."""
+
+    def __init__(
+        self,
+        task_id: str,
+        pool: JudgeWorkerPool | None,
+        settings: JudgeSettings,
+        executor: ThreadPoolExecutor | None,
+        lease: str,
+    ) -> None:
+        self.task_id = task_id
+        self.lease = lease
+        self.pool = pool
+        self.settings = settings
+        self.executor = executor
+        self.test_sets: dict[str, HiddenTestSet | None] = {}
+        self.fallback_seed: int | None = None
+        self.reports: LRUCache[_JobKey, JudgeReport] = LRUCache(DEDUP_CACHE_SIZE)
+
+    def test_set(self, db: Session, row: StoredResult) -> HiddenTestSet:
+        test_set = None
+        if row.test_set_id is not None:
+            if row.test_set_id not in self.test_sets:
+                self.test_sets[row.test_set_id] = HIDDEN_TEST_SETS.refresh(row.test_set_id, db)
+            test_set = self.test_sets[row.test_set_id]
+        if test_set is None:
+            # Never judged on a stored set (or it is gone): judge like a new
+            # submission, on one variant for the whole run so duplicates stay duplicates.
+            if self.fallback_seed is None:
+                self.fallback_seed = pick_hidden_seed()
+            test_set = HIDDEN_TEST_SETS.get(
+                self.task_id, seed=self.fallback_seed, n=HIDDEN_TESTS_COUNT, db=db
+            )
+        return test_set
+
+    def judge(
+        self, jobs: dict[_JobKey, tuple[str, HiddenTestSet]]
+    ) -> tuple[dict[_JobKey, JudgeReport], int]:
+        """Reports for every job and how many of them had to be judged."""
+        reports: dict[_JobKey, JudgeReport] = {}
+        todo: list[_JobKey] = []
+        for key in jobs:
+            cached = self.reports.get(key)
+            if cached is not None:
+                reports[key] = cached
+            else:
+                todo.append(key)
+
+        def run(key: _JobKey) -> JudgeReport:
+            user_code, test_set = jobs[key]
+            return submit_solution(
+                SubmitSolutionInput(
+                    task_id=self.task_id,
+                    user_code=user_code,
+                    tests=test_set.packed,
+                    expected=test_set.expected,
+                    test_set_digest=test_set.digest,
+                ),
+                self.settings,
+                pool=self.pool,
+            )
+
+        mapper = self.executor.map if self.executor is not None else map
+        for key, report in zip(todo, mapper(run, todo), strict=True):
+            reports[key] = report
+            # A time limit depends on load: judge such code again when it recurs.
+            if report.verdict != "TLE":
+                self.reports.put(key, report)
+        return reports, len(todo)
+
+
+def _rejudge_batch(
+    session_factory: sessionmaker[Session], run: _Run, progress: RejudgeProgress, batch_size: int
+) -> RejudgeProgress:
+    with session_factory() as db:
+        repo = SubmissionRepo(db)
+        rows = repo.list_judged(run.task_id, limit=batch_size, after=progress.after)
+        jobs: dict[_JobKey, tuple[str, HiddenTestSet]] = {}
+        keys: list[_JobKey] = []
+        for row in rows:
+            test_set = run.test_set(db, row)
+            key = (code_hash(row.user_code), test_set.key)
+            jobs.setdefault(key, (row.user_code, test_set))
+            keys.append(key)
+        # Refreshed test sets are saved; the connection is released while judging.
+        db.commit()
+
+        reports, judged = run.judge(jobs)
+        updates = []
+        for row, key in zip(rows, keys, strict=True):
+            report = reports[key]
+            values = _result_values(report, jobs[key][1])
+            changed = any(getattr(row, name) != values[name] for name in _RESULT_COLUMNS)
+            REJUDGED.labels(run.task_id, "true" if changed else "false").inc()
+            if changed:
+                updates.append({"id": row.id, **values, **usage_columns(report)})
+
+        progress = RejudgeProgress(
+            task_id=run.task_id,
+            scanned=progress.scanned + len(rows),
+            judged=progress.judged + judged,
+            updated=progress.updated + len(updates),
+            after=SubmissionCursor.after(rows[-1]) if rows else progress.after,
+            done=len(rows) < batch_size,
+        )
+        if not repo.renew_rejudge_lease(run.task_id, run.lease):
+            db.rollback()
+            raise RejudgeAlreadyRunning(run.task_id)
+        repo.update_results(updates)
+        # Saved with the batch's UPDATEs: a restart neither skips nor repeats a batch.
+        if progress.done:
+            repo.clear_rejudge_checkpoint(run.task_id)
+        else:
+            repo.set_rejudge_checkpoint(run.task_id, progress.encode())
+        db.commit()
+    return progress
+
+
+def acquire_rejudge_lease(session_factory: sessionmaker[Session], task_id: str) -> str | None:
+    """Lease ``task_id`` for one run (pass it as ``rejudge_task(lease=...)``); None if taken."""
+    owner = uuid.uuid4().hex
+    with session_factory() as db:
+        acquired = SubmissionRepo(db).acquire_rejudge_lease(task_id, owner, ttl_sec=LEASE_TTL_SEC)
+        db.commit()
+    return owner if acquired else None
+
+
+def rejudge_task(
+    session_factory: sessionmaker[Session],
+    task_id: str,
+    *,
+    pool: JudgeWorkerPool | None = None,
+    settings: JudgeSettings = JudgeSettings(),
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    restart: bool = False,
+    on_progress: Callable[[RejudgeProgress], None] | None = None,
+    stop: threading.Event | None = None,
+    lease: str | None = None,
+) -> RejudgeProgress:
+    """
+    Re-judge every judged submission of ``task_id`` (see the module docstring).
+
+    Continues an interrupted run from its checkpoint unless ``restart``.
+    ``on_progress`` is called after every committed batch; setting ``stop``
+    ends the run after the current batch, with ``done`` False.  Raises
+    ``RejudgeAlreadyRunning`` if another run holds the task; ``lease`` is one
+    already taken with ``acquire_rejudge_lease``, and is released on return.
+    """
+    if lease is None:
+        lease = acquire_rejudge_lease(session_factory, task_id)
+        if lease is None:
+            raise RejudgeAlreadyRunning(task_id)
+    batch_size = max(1, batch_size)
+    # One thread per worker keeps every worker busy; without a pool judge in this thread.
+    executor = None
+    if pool is not None and pool.size > 1:
+        executor = ThreadPoolExecutor(max_workers=pool.size, thread_name_prefix="rejudge")
+    try:
+        with session_factory() as db:
+            saved = None if restart else SubmissionRepo(db).get_rejudge_checkpoint(task_id)
+        progress = RejudgeProgress(task_id)
+        if saved is not None:
+            progress = RejudgeProgress.decode(task_id, saved)
+            logger.info("Resuming re-judge of %s after %d submissions", task_id, progress.scanned)
+
+        run = _Run(task_id, pool, settings, executor, lease)
+        while not progress.done and (stop is None or not stop.is_set()):
+            progress = _rejudge_batch(session_factory, run, progress, batch_size)
+            if on_progress is not None:
+                on_progress(progress)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        with session_factory() as db:
+            SubmissionRepo(db).release_rejudge_lease(task_id, lease)
+            db.commit()
+    return progress
+
+
+RejudgeState = Literal["running", "done", "stopped", "failed"]
+
+
+@dataclass(frozen=True, slots=True)
+class RejudgeStatus:
+    state: RejudgeState
+    progress: RejudgeProgress
+    error: str | None = None
+
+
+class RejudgeJobs:
+    """Re-judge runs started through the admin API, each in a background thread."""
+
+    def __init__(
+        self,
+        session_factory: sessionmaker[Session],
+        *,
+        pool: JudgeWorkerPool | None = None,
+        settings: JudgeSettings = JudgeSettings(),
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self._session_factory = session_factory
+        self._pool = pool
+        self._settings = settings
+        self._batch_size = batch_size
+        self._status: dict[str, RejudgeStatus] = {}
+        self._threads: dict[str, threading.Thread] = {}
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self, task_id: str, *, restart: bool = False) -> RejudgeStatus | None:
+        """
+        Start re-judging ``task_id``; None if a run for it is already going
+        in any process.  Blocks on the database.
+        """
+        with self._lock:
+            current = self._status.get(task_id)
+            if current is not None and current.state == "running":
+                return None
+            lease = acquire_rejudge_lease(self._session_factory, task_id)
+            if lease is None:
+                return None
+            status = RejudgeStatus("running", RejudgeProgress(task_id))
+            self._status[task_id] = status
+            thread = threading.Thread(
+                target=self._run,
+                args=(task_id, restart, lease),
+                name=f"rejudge-{task_id}",
+                daemon=True,
+            )
+            self._threads[task_id] = thread
+            thread.start()
+        return status
+
+    def status(self, task_id: str) -> RejudgeStatus | None:
+        """
+        The run started by this process, else the checkpoint of an unfinished
+        run (e.g. one started by another API process or the CLI).
+        """
+        with self._lock:
+            status = self._status.get(task_id)
+        if status is not None:
+            return status
+        with self._session_factory() as db:
+            repo = SubmissionRepo(db)
+            saved = repo.get_rejudge_checkpoint(task_id)
+            running = repo.rejudge_lease_held(task_id, ttl_sec=LEASE_TTL_SEC)
+        if saved is None and not running:
+            return None
+        progress = RejudgeProgress(task_id)
+        if saved is not None:
+            progress = RejudgeProgress.decode(task_id, saved)
+        return RejudgeStatus("running" if running else "stopped", progress)
+
+    def wait(self, task_id: str, timeout: float | None = None) -> None:
+        with self._lock:
+            thread = self._threads.get(task_id)
+        if thread is not None:
+            thread.join(timeout)
+
+    def close(self) -> None:
+        """Stop the runs after their current batch; they resume from their checkpoints."""
+        self._stop.set()
+        with self._lock:
+            threads = list(self._threads.values())
+        for thread in threads:
+            thread.join()
+
+    def _set(self, task_id: str, status: RejudgeStatus) -> None:
+        with self._lock:
+            self._status[task_id] = status
+
+    def _run(self, task_id: str, restart: bool, lease: str) -> None:
+        try:
+            progress = rejudge_task(
+                self._session_factory,
+                task_id,
+                pool=self._pool,
+                settings=self._settings,
+                batch_size=self._batch_size,
+                restart=restart,
+                on_progress=lambda p: self._set(task_id, RejudgeStatus("running", p)),
+                stop=self._stop,
+                lease=lease,
+            )
+        except Exception as e:
+            logger.exception("Re-judge of %s failed", task_id)
+            with self._lock:
+                last = self._status[task_id].progress
+                self._status[task_id] = RejudgeStatus("failed", last, error=str(e))
+            return
+        self._set(task_id, RejudgeStatus("done" if progress.done else "stopped", progress))
@@ -1,3 +1,3 @@
-from .equilibrium_solver import solve_equilibrium_linear
+from .equilibrium_solver import solve_equilibrium_linear, solve_equilibrium_linear_batch
 
-__all__ = ["solve_equilibrium_linear"]
+__all__ = ["solve_equilibrium_linear", "solve_equilibrium_linear_batch"]
@@ -0,0 +1,309 @@
+"""
+Stress judging: many generated edge cases, first counterexample, minimised.
+
+Cases come from the task's stress profiles (huge magnitudes, tiny slopes,
+equilibria next to zero, ...) in chunks; each chunk gets its oracle answers
+from one batch-oracle call and is then judged case by case exactly like a
+hidden test.  The run stops at the first failing case, which is shrunk to
+the simplest valid test that still fails the same way, or when the case
+limit or CPU budget is used up.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from typing import Any
+
+from marketlab.domain.generator import generator_spec, stress_profiles
+from marketlab.domain.judge.models import Counterexample, StressReport, TestOutcome
+from marketlab.domain.sampling import Choice, columns_to_tests, conform, sample_columns
+from marketlab.domain.tasks import Params, TaskSpec
+from marketlab.infra.judge.runner_inprocess import TimeoutError, compile_user_solve, time_limit
+from marketlab.infra.judge.runner_pool import JudgeWorkerPool, WorkerCrashedError
+from marketlab.usecases.judge_v1 import JudgeSettings, judge_one_test
+from marketlab.usecases.registry import TASK_REGISTRY, solve_task, solve_task_batch
+from marketlab.usecases.submit_solution import POOL_DEADLINE_SLACK_SEC, POOL_WALL_DEADLINE_FACTOR
+
+# Shrinking stops after this many candidate evaluations.
+MAX_SHRINK_STEPS = 500
+
+
+@dataclass(frozen=True, slots=True)
+class StressSettings:
+    max_cases: int = 5_000
+    chunk_size: int = 500
+    cpu_budget_sec: float = 2.0
+
+
+@dataclass(frozen=True, slots=True)
+class _Failure:
+    params: Params
+    outcome: TestOutcome
+    profile: str
+
+
+def _still_fails(
+    spec: TaskSpec, oracle: Callable, solve: Callable, verdict: str, settings: JudgeSettings
+) -> Callable[[Params], TestOutcome | None]:
+    def check(params: Params) -> TestOutcome | None:
+        try:
+            expected = solve_task(spec.id, params)
+        except Exception:
+            return None  # not a valid test for this task
+        try:
+            with time_limit(settings.time_limit_sec):
+                outcome = judge_one_test(spec, oracle, solve, params, [expected], 0, 0, settings)
+        except TimeoutError:
+            outcome = TestOutcome(index=0, verdict="TLE", message="TLE")
+        return outcome if outcome.verdict == verdict else None
+
+    return check
+
+
+def _simplicity(value: float) -> tuple[int, int, float]:
+    # Fewer significant digits first, then an order of magnitude closer to 1.
+    if value == 0:
+        return 0, 0, 0.0
+    mantissa, exponent = f"{abs(value):.15e}".split("e")
+    return len(mantissa.replace(".", "").rstrip("0")), abs(int(exponent)), abs(value)
+
+
+def _number_candidates(value: float) -> list[float]:
+    candidates = [0.0, 1.0, float(math.trunc(value)), round(value, 1), round(value, 2)]
+    candidates += [value / 10, value / 2]
+    for digits in (1, 2, 3, 6):
+        candidates.append(float(f"{value:.{digits}g}"))
+    key = _simplicity(value)
+    return sorted({c for c in candidates if _simplicity(c) < key}, key=_simplicity)
+
+
+def _choices(task_id: str) -> dict[str, tuple[Any, ...]]:
+    return {
+        name: dist.values
+        for name, dist in generator_spec(task_id).params
+        if isinstance(dist, Choice)
+    }
+
+
+def _in_domain(task_id: str) -> Callable[[Params], Params | None]:
+    # A valid test of any of the task's profiles ("random" is the regular generator).
+    specs = [gen for _name, gen in stress_profiles(task_id)]
+
+    def check(params: Params) -> Params | None:
+        for spec in specs:
+            conformed = conform(spec, params)
+            if conformed is not None:
+                return conformed
+        return None
+
+    return check
+
+
+def shrink(
+    params: Params,
+    outcome: TestOutcome,
+    still_fails: Callable[[Params], TestOutcome | None],
+    choices: dict[str, tuple[Any, ...]],
+    *,
+    in_domain: Callable[[Params], Params | None] | None = None,
+    cpu_deadline: float = math.inf,
+) -> tuple[Params, TestOutcome, int]:
+    """
+    Greedily simplify ``params`` field by field while the case keeps failing.
+
+    Numbers move towards 0, 1, fewer significant digits and magnitudes
+    closer to 1; choice fields towards earlier values.  ``in_domain`` maps
+    a candidate to the valid test it stands for (dependent fields adjusted)
+    or None to skip it.  Repeats until no field can be simplified,
+    ``MAX_SHRINK_STEPS`` candidates were tried or ``time.process_time()``
+    passes ``cpu_deadline``; the simplest failing case so far is returned.
+    """
+    steps = 0
+    improved = True
+    while improved:
+        improved = False
+        for name, value in list(params.items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                candidates: list[Any] = _number_candidates(float(value))
+            elif name in choices and value in choices[name]:
+                candidates = list(choices[name][: choices[name].index(value)])
+            else:
+                continue
+            for candidate in candidates:
+                if steps >= MAX_SHRINK_STEPS or time.process_time() >= cpu_deadline:
+                    return params, outcome, steps
+                steps += 1
+                trial = {**params, name: candidate}
+                if in_domain is not None:
+                    conformed = in_domain(trial)
+                    if conformed is None or conformed == params:
+                        continue
+                    trial = conformed
+                failed = still_fails(trial)
+                if failed is not None:
+                    params, outcome, improved = trial, failed, True
+                    break
+    return params, outcome, steps
+
+
+def run_stress(
+    task_id: str,
+    user_code: str,
+    settings: StressSettings = StressSettings(),
+    judge_settings: JudgeSettings = JudgeSettings(),
+    *,
+    seed: int | None = None,
+) -> StressReport:
+    """Stress-judge ``user_code``; meant to run inside a judge worker process."""
+    if seed is None:
+        seed = random.randrange(2**32)
+    spec, oracle = TASK_REGISTRY[task_id]
+
+    try:
+        with time_limit(judge_settings.time_limit_sec):
+            solve = compile_user_solve(user_code)
+    except TimeoutError:
+        return StressReport(
+            verdict="TLE",
+            cases=0,
+            seed=seed,
+            counterexample=Counterexample(
+                params={}, verdict="TLE", message="TLE during compilation"
+            ),
+        )
+    except Exception as e:
+        return StressReport(
+            verdict="RE",
+            cases=0,
+            seed=seed,
+            counterexample=Counterexample(params={}, verdict="RE", message=f"Compile error: {e}"),
+        )
+
+    profiles = [(name, replace(gen, public_tests=())) for name, gen in stress_profiles(task_id)]
+    cpu_deadline = time.process_time() + settings.cpu_budget_sec
+    cases = 0
+    chunk_index = 0
+    while cases < settings.max_cases:
+        if time.process_time() >= cpu_deadline:
+            return StressReport(verdict="AC", cases=cases, seed=seed, budget_exhausted=True)
+        profile, gen = profiles[chunk_index % len(profiles)]
+        size = min(settings.chunk_size, settings.max_cases - cases)
+        cols = sample_columns(gen, n=size, seed=seed + chunk_index)
+        chunk_index += 1
+        tests = columns_to_tests({f.name: cols[f.name] for f in spec.input_fields})
+        expected = solve_task_batch(task_id, cols).rows()
+
+        for i, params in enumerate(tests):
+            if time.process_time() >= cpu_deadline:
+                return StressReport(verdict="AC", cases=cases, seed=seed, budget_exhausted=True)
+            if expected[i] is None:
+                continue
+            cases += 1
+            try:
+                with time_limit(judge_settings.time_limit_sec):
+                    outcome = judge_one_test(
+                        spec, oracle, solve, params, expected, i, 0, judge_settings
+                    )
+            except TimeoutError:
+                outcome = TestOutcome(index=i, verdict="TLE", message="TLE")
+            if outcome.verdict != "AC":
+                failure = _Failure(params, outcome, profile)
+                return _report_failure(
+                    task_id, spec, oracle, solve, failure, judge_settings, cases, seed, cpu_deadline
+                )
+
+    return StressReport(verdict="AC", cases=cases, seed=seed)
+
+
+def _report_failure(
+    task_id: str,
+    spec: TaskSpec,
+    oracle: Callable,
+    solve: Callable,
+    failure: _Failure,
+    judge_settings: JudgeSettings,
+    cases: int,
+    seed: int,
+    cpu_deadline: float,
+) -> StressReport:
+    params, outcome, steps = dict(failure.params), failure.outcome, 0
+    if outcome.verdict != "TLE":  # every TLE candidate would cost a full time limit
+        still_fails = _still_fails(spec, oracle, solve, outcome.verdict, judge_settings)
+        params, outcome, steps = shrink(
+            params,
+            outcome,
+            still_fails,
+            _choices(task_id),
+            in_domain=_in_domain(task_id),
+            cpu_deadline=cpu_deadline,
+        )
+    return StressReport(
+        verdict=outcome.verdict,
+        cases=cases,
+        seed=seed,
+        counterexample=Counterexample(
+            params=params,
+            verdict=outcome.verdict,
+            message=outcome.message,
+            failed_field=outcome.failed_field,
+            expected=outcome.expected,
+            got=outcome.got,
+            profile=failure.profile,
+            shrink_steps=steps,
+        ),
+    )
+
+
+def stress_solution(
+    task_id: str,
+    user_code: str,
+    settings: StressSettings = StressSettings(),
+    judge_settings: JudgeSettings = JudgeSettings(),
+    *,
+    pool: JudgeWorkerPool | None = None,
+    seed: int | None = None,
+) -> StressReport:
+    """
+    Run ``run_stress`` in a judge worker, capped at the CPU budget.
+
+    Without a pool it runs in the calling thread (tests, scripts), where the
+    time limit cannot interrupt code that never returns.
+    """
+    if seed is None:
+        seed = random.randrange(2**32)
+    if pool is None:
+        return run_stress(task_id, user_code, settings, judge_settings, seed=seed)
+    cpu_budget = settings.cpu_budget_sec + POOL_DEADLINE_SLACK_SEC
+    try:
+        return pool.run(
+            run_stress,
+            task_id,
+            user_code,
+            settings,
+            judge_settings,
+            seed=seed,
+            timeout=cpu_budget * POOL_WALL_DEADLINE_FACTOR,
+            cpu_budget_sec=cpu_budget,
+        )
+    except TimeoutError:
+        # run_stress stops cleanly on its budget; a killed worker means the
+        # code kept running past every limit (e.g. it swallowed the timeout).
+        return StressReport(
+            verdict="TLE",
+            cases=0,
+            seed=seed,
+            counterexample=Counterexample(
+                params={}, verdict="TLE", message="TLE: judge worker killed"
+            ),
+        )
+    except WorkerCrashedError as e:
+        return StressReport(
+            verdict="RE",
+            cases=0,
+            seed=seed,
+            counterexample=Counterexample(params={}, verdict="RE", message=f"Runtime error: {e}"),
+        )
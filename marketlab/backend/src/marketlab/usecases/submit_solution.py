@@ -1,26 +1,339 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from time import perf_counter
 from typing import Any
 
-from marketlab.domain.judge.models import JudgeReport
-from marketlab.usecases.judge_v1 import JudgeSettings, run_judge_v1
-from marketlab.usecases.registry import TASK_REGISTRY
+from marketlab.domain.judge.models import JudgeReport, ResourceUsage, TestOutcome, Verdict
+from marketlab.domain.tasks import Result
+from marketlab.infra.cache import LRUCache
+from marketlab.infra.judge.runner_inprocess import TimeoutError, code_hash
+from marketlab.infra.judge.runner_pool import JudgeWorkerPool, WorkerCrashedError
+from marketlab.infra.judge.test_set import TestSet
+from marketlab.infra.metrics import REGISTRY
+from marketlab.infra.settings import settings as app_settings
+from marketlab.usecases.judge_v1 import (
+    MLE_MESSAGE,
+    JudgeSettings,
+    run_judge_full,
+    run_judge_v1,
+    summarize_outcomes,
+)
+from marketlab.usecases.registry import TASK_REGISTRY, expected_results
+from marketlab.usecases.test_order import FAILURE_STATS, REORDERED, classify_tests
+
+HIDDEN_TESTS_COUNT = 25
+
+# Extra CPU time granted to a pooled job on top of the per-test limits
+# (unpickling, compiling); the in-worker CPU timer normally fires first.
+POOL_DEADLINE_SLACK_SEC = 1.0
+# A pooled job's wall-clock deadline, as a multiple of its CPU budget.  Time
+# limits are CPU time (ITIMER_PROF per test, RLIMIT_CPU per job) and decide
+# TLE; on a loaded host a job gets well under one CPU, so the wall clock only
+# catches code that blocks or sleeps.
+POOL_WALL_DEADLINE_FACTOR = 5.0
+
+# Full-report mode splits larger test sets into shards judged by separate workers.
+FULL_REPORT_SHARD_SIZE = 200
+
+
+VERDICTS = REGISTRY.counter(
+    "marketlab_verdicts_total", "Judged submissions by verdict.", ("task_id", "verdict")
+)
+JUDGE_SECONDS = REGISTRY.histogram(
+    "marketlab_judge_seconds",
+    "End-to-end judging of one submission (including worker hand-off).",
+    ("task_id",),
+)
+# Sizing data for the judge pool: what one submission costs inside a worker.
+JUDGE_CPU_SECONDS = REGISTRY.histogram(
+    "marketlab_judge_cpu_seconds", "CPU time of judging one submission.", ("task_id",)
+)
+JUDGE_PEAK_RSS_BYTES = REGISTRY.histogram(
+    "marketlab_judge_peak_rss_bytes",
+    "Peak RSS of the judge process while judging one submission.",
+    buckets=tuple(mb * 1024 * 1024 for mb in (32, 64, 128, 256, 384, 512, 1024)),
+)
+VERDICT_CACHE_HITS = REGISTRY.counter(
+    "marketlab_verdict_cache_hits_total", "Submissions answered from the verdict cache."
+)
 
 
 @dataclass(frozen=True, slots=True)
 class SubmitSolutionInput:
     task_id: str
     user_code: str
-    tests: list[dict[str, Any]]
+    # A shared-memory TestSet reaches pool workers without being copied.
+    tests: list[dict[str, Any]] | TestSet
+    # Oracle answers aligned with ``tests``; computed in one batch call when omitted.
+    expected: list[Result | None] | None = None
+    # Content digest of a persisted test set; enables the verdict cache.
+    test_set_digest: str | None = None
+
 
+# (task_id, code hash, test set digest, judge settings, full report) -> report.
+# Only deterministic verdicts are stored: user code has no clock, randomness or
+# imports, so AC/WA/RE repeat exactly, while TLE depends on host load.
+VerdictKey = tuple[str, str, str, JudgeSettings, bool]
+_verdicts: LRUCache[VerdictKey, JudgeReport] = LRUCache(max(1, app_settings.verdict_cache_size))
 
-def submit_solution(inp: SubmitSolutionInput, settings: JudgeSettings = JudgeSettings()) -> JudgeReport:
+
+def _judge_job(
+    inp: SubmitSolutionInput, settings: JudgeSettings, order: list[int] | None = None
+) -> JudgeReport:
+    """Entry point executed inside a judge worker process."""
     spec, oracle = TASK_REGISTRY[inp.task_id]
+    expected = inp.expected
+    if expected is None:
+        expected = expected_results(inp.task_id, inp.tests)
     return run_judge_v1(
         spec=spec,
         oracle=oracle,  # callable(params)->Result
         user_code=inp.user_code,
         tests=inp.tests,
         settings=settings,
+        expected=expected,
+        order=order,
     )
+
+
+def _judge_full_job(
+    inp: SubmitSolutionInput, settings: JudgeSettings, index_offset: int = 0
+) -> JudgeReport:
+    """Full-report entry point executed inside a judge worker process."""
+    spec, oracle = TASK_REGISTRY[inp.task_id]
+    expected = inp.expected
+    if expected is None:
+        expected = expected_results(inp.task_id, inp.tests)
+    return run_judge_full(
+        spec=spec,
+        oracle=oracle,
+        user_code=inp.user_code,
+        tests=inp.tests,
+        settings=settings,
+        expected=expected,
+        index_offset=index_offset,
+    )
+
+
+def _worker_failure(e: TimeoutError | WorkerCrashedError) -> tuple[Verdict, str]:
+    """Verdict and message for a judge job that did not return a report."""
+    if isinstance(e, TimeoutError):
+        return "TLE", "TLE: judge worker killed"
+    if str(e).startswith("MemoryError"):  # raised outside solve(), e.g. by the oracle
+        return "MLE", MLE_MESSAGE
+    return "RE", f"Runtime error: {e}"
+
+
+def _combined_usage(reports: list[JudgeReport]) -> ResourceUsage | None:
+    """Usage of a sharded run: CPU adds up, the rest is the worst shard's."""
+    usages = [r.usage for r in reports if r.usage is not None]
+    if not usages:
+        return None
+    peaks = [u.peak_rss_kb for u in usages if u.peak_rss_kb is not None]
+    return ResourceUsage(
+        cpu_time_ms=sum(u.cpu_time_ms for u in usages),
+        wall_time_ms=max(u.wall_time_ms for u in usages),
+        max_test_time_ms=max(u.max_test_time_ms for u in usages),
+        peak_rss_kb=max(peaks) if peaks else None,
+    )
+
+
+def _run_shard(
+    pool: JudgeWorkerPool, shard: SubmitSolutionInput, settings: JudgeSettings, offset: int
+) -> JudgeReport:
+    size = len(shard.tests)
+    cpu_budget = settings.time_limit_sec + settings.batch_time_limit_sec + POOL_DEADLINE_SLACK_SEC
+    try:
+        return pool.run(
+            _judge_full_job,
+            shard,
+            settings,
+            offset,
+            timeout=cpu_budget * POOL_WALL_DEADLINE_FACTOR,
+            cpu_budget_sec=cpu_budget,
+        )
+    except (TimeoutError, WorkerCrashedError) as e:
+        verdict, message = _worker_failure(e)
+        return JudgeReport(
+            verdict=verdict,
+            passed=0,
+            total=size,
+            message=message,
+            failed_test_index=offset,
+            tests=tuple(
+                TestOutcome(index=offset + i, verdict=verdict, message=message)
+                for i in range(size)
+            ),
+        )
+
+
+def _judge_full(
+    inp: SubmitSolutionInput, settings: JudgeSettings, pool: JudgeWorkerPool | None
+) -> JudgeReport:
+    total = len(inp.tests)
+    if pool is None:
+        return _judge_full_job(inp, settings)
+
+    offsets = list(range(0, total, FULL_REPORT_SHARD_SIZE)) or [0]
+    shards = [
+        replace(
+            inp,
+            tests=inp.tests[off : off + FULL_REPORT_SHARD_SIZE],
+            expected=(
+                inp.expected[off : off + FULL_REPORT_SHARD_SIZE]
+                if inp.expected is not None
+                else None
+            ),
+        )
+        for off in offsets
+    ]
+    if len(shards) == 1:
+        reports = [_run_shard(pool, shards[0], settings, 0)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(len(shards), pool.size)) as executor:
+            reports = list(
+                executor.map(
+                    lambda shard, off: _run_shard(pool, shard, settings, off), shards, offsets
+                )
+            )
+
+    usage = _combined_usage(reports)
+    # A compile failure is reported without per-test outcomes by every shard.
+    for report in reports:
+        if not report.tests and report.verdict != "AC":
+            return replace(report, total=total, usage=usage)
+    combined = summarize_outcomes([o for r in reports for o in r.tests], total=total)
+    # A shard over the memory limit fails the submission even if its tests passed.
+    over_memory = next((r for r in reports if r.verdict == "MLE"), None)
+    if over_memory is not None and combined.verdict != "MLE":
+        combined = replace(
+            combined,
+            verdict="MLE",
+            message=over_memory.message,
+            failed_test_index=over_memory.failed_test_index,
+            failed_field=None,
+        )
+    return replace(combined, usage=usage)
+
+
+def submit_solution(
+    inp: SubmitSolutionInput,
+    settings: JudgeSettings = JudgeSettings(),
+    *,
+    pool: JudgeWorkerPool | None = None,
+    full_report: bool = False,
+) -> JudgeReport:
+    """
+    Judge a submission.
+
+    With a ``pool`` the user code runs in a separate worker process that is
+    killed if it overruns the whole-submission CPU budget (or, blocked, a
+    generous multiple of it in wall-clock time); without one it is
+    judged in the calling thread (tests, scripts).
+
+    ``full_report`` runs every test instead of stopping at the first failure
+    and fills ``JudgeReport.tests``; large test sets are sharded across
+    the pool's workers.
+
+    When ``inp.test_set_digest`` is set, a previous verdict for the same code
+    on the same test set is returned without judging again.
+    """
+    start = perf_counter()
+    report = _submit(inp, settings, pool, full_report)
+    JUDGE_SECONDS.labels(inp.task_id).observe(perf_counter() - start)
+    VERDICTS.labels(inp.task_id, report.verdict).inc()
+    return report
+
+
+def _submit(
+    inp: SubmitSolutionInput,
+    settings: JudgeSettings,
+    pool: JudgeWorkerPool | None,
+    full_report: bool,
+) -> JudgeReport:
+    key: VerdictKey | None = None
+    if inp.test_set_digest is not None and app_settings.verdict_cache_size > 0:
+        key = (inp.task_id, code_hash(inp.user_code), inp.test_set_digest, settings, full_report)
+        cached = _verdicts.get(key)
+        if cached is not None:
+            VERDICT_CACHE_HITS.inc()
+            return cached
+
+    classes = None
+    order = None
+    if app_settings.adaptive_test_order:
+        classes = classify_tests(inp.task_id, inp.tests)
+        if classes is not None and not full_report:
+            order = FAILURE_STATS.order(inp.task_id, classes)
+            if order is not None:
+                REORDERED.labels(inp.task_id).inc()
+
+    if full_report:
+        report = _judge_full(inp, settings, pool)
+    elif pool is None:
+        report = _judge_job(inp, settings, order)
+    else:
+        total = len(inp.tests)
+        # Compilation (one per-test limit) plus the tests' shared budget, which
+        # no more than every test using its whole limit can exhaust.
+        budget = min(settings.submission_time_limit_sec, settings.time_limit_sec * total)
+        cpu_budget = settings.time_limit_sec + budget + POOL_DEADLINE_SLACK_SEC
+        try:
+            report = pool.run(
+                _judge_job,
+                inp,
+                settings,
+                order,
+                timeout=cpu_budget * POOL_WALL_DEADLINE_FACTOR,
+                cpu_budget_sec=cpu_budget,
+            )
+        except (TimeoutError, WorkerCrashedError) as e:
+            verdict, message = _worker_failure(e)
+            return JudgeReport(verdict=verdict, passed=0, total=total, message=message)
+
+    if report.usage is not None:
+        JUDGE_CPU_SECONDS.labels(inp.task_id).observe(report.usage.cpu_time_ms / 1000)
+        if report.usage.peak_rss_kb is not None:
+            JUDGE_PEAK_RSS_BYTES.observe(report.usage.peak_rss_kb * 1024)
+
+    timed_out = report.verdict == "TLE" or any(o.verdict == "TLE" for o in report.tests)
+    # A time limit depends on load (and on the test order), so it is no evidence.
+    if classes is not None and not timed_out:
+        run_order = None if full_report else order or range(len(classes))
+        _record_failure(inp.task_id, classes, report, run_order)
+    if key is not None and not timed_out:
+        _verdicts.put(key, report)
+    return report
+
+
+def _record_failure(
+    task_id: str,
+    classes: tuple[str, ...],
+    report: JudgeReport,
+    run_order: Sequence[int] | None,
+) -> None:
+    """
+    Count the classes of the tests that ran: all of them for a full report
+    (``run_order`` None), else those of ``run_order`` up to the failure and
+    of the canonical tests before it, which judging runs to confirm it.
+    """
+    if report.verdict == "AC":
+        FAILURE_STATS.record(task_id, classes, None)
+        return
+    failed = report.failed_test_index
+    # A compile error (no failed test) says nothing about the tests.
+    if failed is None or failed >= len(classes):
+        return
+    ran: Sequence[str] = classes
+    if run_order is not None:
+        run_order = list(run_order)
+        indices = set(run_order[: run_order.index(failed) + 1]).union(range(failed))
+        ran = [classes[i] for i in sorted(indices)]
+    FAILURE_STATS.record(task_id, ran, classes[failed])
+
+
+def clear_verdict_cache() -> None:
+    _verdicts.clear()
@@ -0,0 +1,82 @@
+"""
+Fail-fast test order learned from judged submissions.
+
+Every test belongs to a class given by its task's ``test_class`` (e.g. the
+policy mode and a parameter region).  For each task and class we count the
+judged submissions that ran a test of the class (a fail-fast run stops at
+its first failure) and how many of them first failed on a test of that
+class.  A submission's tests then run
+classes with the highest (smoothed) failure rate first, so a wrong solution
+is usually caught by its first few tests instead of after every test
+before the case it gets wrong.
+
+Only the run order changes.  After the first failure the tests before it
+in the canonical (generated) order that have not run yet are run too, so
+the verdict, ``failed_test_index`` and ``passed`` are those of the
+canonical order, whatever the run order, except for time limits.  The
+statistics are process-local and start empty.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Sequence
+
+from marketlab.domain.task_loader import TASKS
+from marketlab.domain.tasks import Params
+from marketlab.infra.judge.test_set import TestSet
+from marketlab.infra.metrics import REGISTRY
+
+REORDERED = REGISTRY.counter(
+    "marketlab_judge_reordered_total", "Submissions judged in a learned test order.", ("task_id",)
+)
+
+
+class FailureStats:
+    """Per task and test class: submissions that ran the class, and first failures on it."""
+
+    def __init__(self) -> None:
+        self._seen: dict[tuple[str, str], int] = {}
+        self._failed: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, task_id: str, classes: Sequence[str], failed_class: str | None) -> None:
+        """``classes``: those of the tests that ran, ``failed_class`` among them."""
+        with self._lock:
+            for cls in set(classes):
+                key = (task_id, cls)
+                self._seen[key] = self._seen.get(key, 0) + 1
+            if failed_class is not None:
+                key = (task_id, failed_class)
+                self._failed[key] = self._failed.get(key, 0) + 1
+
+    def failure_rate(self, task_id: str, cls: str) -> float:
+        # Laplace-smoothed, so an unseen class starts at 1/2.
+        key = (task_id, cls)
+        return (self._failed.get(key, 0) + 1) / (self._seen.get(key, 0) + 2)
+
+    def order(self, task_id: str, classes: Sequence[str]) -> list[int] | None:
+        """Test indices, most failure-prone class first (None: keep the canonical order)."""
+        with self._lock:
+            rates = {cls: self.failure_rate(task_id, cls) for cls in set(classes)}
+        if len(set(rates.values())) <= 1:
+            return None
+        # Stable: canonical order within a class.
+        order = sorted(range(len(classes)), key=lambda i: -rates[classes[i]])
+        return None if order == list(range(len(classes))) else order
+
+    def clear(self) -> None:
+        with self._lock:
+            self._seen.clear()
+            self._failed.clear()
+
+
+FAILURE_STATS = FailureStats()
+
+
+def classify_tests(task_id: str, tests: Sequence[Params] | TestSet) -> tuple[str, ...] | None:
+    """Class label of every test; None if the task does not classify its tests."""
+    classify = TASKS[task_id].test_class
+    if classify is None:
+        return None
+    return tuple(classify(t) for t in tests)
@@ -0,0 +1,227 @@
+"""
+Precomputed hidden test sets.
+
+A hidden test set is fully determined by (task_id, generator version, seed,
+n), so it is generated once together with the oracle answers, addressed by
+a hash of that key, kept in a process-local LRU and persisted to the
+``test_sets`` table.  Judging a submission then only needs a cache lookup:
+the generator and the oracle stay off the hot path, and every worker judges
+a given set against exactly the same tests.
+
+Each cached set also carries its tests packed into a shared-memory
+``TestSet`` (``packed``), which judge workers map instead of receiving a
+pickled copy with every job.
+
+``refresh`` (re-judging after an oracle fix) rewrites stored answers and
+bumps a version in ``app_state``; the caches of the other processes re-read
+it at most every ``VERSION_CHECK_INTERVAL_SEC`` and then drop their copies.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass, field, replace
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from marketlab.domain.generator import generate_tests, generator_version
+from marketlab.domain.tasks import Params, Result
+from marketlab.infra.cache import LRUCache
+from marketlab.infra.db.models import TestSetRow
+from marketlab.infra.db.repos import AsyncTestSetRepo, TestSetRepo
+from marketlab.infra.judge.test_set import TestSet
+from marketlab.infra.metrics import REGISTRY
+from marketlab.infra.settings import settings
+from marketlab.usecases.registry import expected_results, get_task_spec
+
+GENERATE_SECONDS = REGISTRY.histogram(
+    "marketlab_generate_tests_seconds", "Generating one hidden test set.", ("task_id",)
+)
+
+# How often a cache re-reads the stored answers' version, i.e. how long it may
+# keep judging on answers another process has just refreshed.
+VERSION_CHECK_INTERVAL_SEC = 2.0
+
+
+@dataclass(frozen=True, slots=True)
+class HiddenTestSet:
+    key: str
+    task_id: str
+    generator_version: int
+    seed: int
+    tests: list[Params]
+    expected: list[Result | None]
+    digest: str
+    # ``tests`` again, columnar and shared with judge workers.
+    packed: TestSet = field(compare=False, repr=False)
+
+
+def _pack(task_id: str, tests: list[Params]) -> TestSet:
+    return TestSet.from_tests(get_task_spec(task_id).input_fields, tests).share()
+
+
+def hidden_set_key(task_id: str, version: int, seed: int, n: int) -> str:
+    raw = json.dumps([task_id, version, seed, n], separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _payload(tests: list[Params], expected: list[Result | None]) -> str:
+    return json.dumps({"tests": tests, "expected": expected}, sort_keys=True, separators=(",", ":"))
+
+
+def build_test_set(task_id: str, *, seed: int, n: int) -> HiddenTestSet:
+    """Generate tests and their oracle answers (the slow path)."""
+    version = generator_version(task_id)
+    with GENERATE_SECONDS.labels(task_id).time():
+        tests = generate_tests(task_id, n=n, seed=seed)
+    expected = expected_results(task_id, tests)
+    return HiddenTestSet(
+        key=hidden_set_key(task_id, version, seed, n),
+        task_id=task_id,
+        generator_version=version,
+        seed=seed,
+        tests=tests,
+        expected=expected,
+        digest=hashlib.sha256(_payload(tests, expected).encode()).hexdigest(),
+        packed=_pack(task_id, tests),
+    )
+
+
+def _from_row(row: TestSetRow) -> HiddenTestSet:
+    data = json.loads(row.payload)
+    return HiddenTestSet(
+        key=row.id,
+        task_id=row.task_id,
+        generator_version=row.generator_version,
+        seed=row.seed,
+        tests=data["tests"],
+        expected=data["expected"],
+        digest=row.digest,
+        packed=_pack(row.task_id, data["tests"]),
+    )
+
+
+def _to_row(test_set: HiddenTestSet) -> TestSetRow:
+    return TestSetRow(
+        id=test_set.key,
+        task_id=test_set.task_id,
+        generator_version=test_set.generator_version,
+        seed=test_set.seed,
+        n=len(test_set.tests),
+        digest=test_set.digest,
+        payload=_payload(test_set.tests, test_set.expected),
+    )
+
+
+def pick_hidden_seed() -> int:
+    """Seed of the hidden set variant a new submission is judged on."""
+    return random.randrange(settings.hidden_test_set_variants)
+
+
+class HiddenTestSetCache:
+    """Memory LRU in front of the ``test_sets`` table in front of the generator."""
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self._lru: LRUCache[str, HiddenTestSet] = LRUCache(max_entries)
+        self._version: str | None = None
+        self._version_checked_at: float | None = None
+
+    def _version_due(self) -> bool:
+        checked = self._version_checked_at
+        return checked is None or time.monotonic() - checked >= VERSION_CHECK_INTERVAL_SEC
+
+    def _check_version(self, version: str | None) -> None:
+        self._version_checked_at = time.monotonic()
+        if version != self._version:
+            self._lru.clear()  # some stored answers were rewritten since they were cached
+            self._version = version
+
+    def get(self, task_id: str, *, seed: int, n: int, db: Session | None = None) -> HiddenTestSet:
+        """
+        Return the test set for ``(task_id, seed, n)``, building and persisting
+        it on first use.  The caller commits ``db``.
+        """
+        key = hidden_set_key(task_id, generator_version(task_id), seed, n)
+        cached = self.get_by_key(key, db)
+        if cached is not None:
+            return cached
+
+        test_set = build_test_set(task_id, seed=seed, n=n)
+        if db is not None:
+            TestSetRepo(db).add_if_absent(_to_row(test_set))
+        self._lru.put(key, test_set)
+        return test_set
+
+    def get_by_key(self, key: str, db: Session | None = None) -> HiddenTestSet | None:
+        if db is not None and self._version_due():
+            self._check_version(TestSetRepo(db).get_version())
+        cached = self._lru.get(key)
+        if cached is not None:
+            return cached
+        if db is None:
+            return None
+        row = TestSetRepo(db).get_by_id(key)
+        if row is None:
+            return None
+        test_set = _from_row(row)
+        self._lru.put(key, test_set)
+        return test_set
+
+    def refresh(self, key: str, db: Session) -> HiddenTestSet | None:
+        """
+        Reload a stored set and recompute its answers with the current oracle
+        (e.g. after an oracle fix).  Changed answers are written back to the
+        row and the cache, and bump the version other processes' caches
+        check; the caller commits ``db``.  None if not stored.
+        """
+        row = TestSetRepo(db).get_by_id(key)
+        if row is None:
+            return None
+        test_set = _from_row(row)
+        expected = expected_results(test_set.task_id, test_set.tests)
+        digest = hashlib.sha256(_payload(test_set.tests, expected).encode()).hexdigest()
+        if digest != test_set.digest:
+            test_set = replace(test_set, expected=expected, digest=digest)
+            row.payload = _payload(test_set.tests, expected)
+            row.digest = digest
+            db.flush()
+            self._version = TestSetRepo(db).bump_version()
+        self._lru.put(key, test_set)
+        return test_set
+
+    async def aget(self, task_id: str, *, seed: int, n: int, db: AsyncSession) -> HiddenTestSet:
+        """Async ``get``: generation runs in a worker thread off the event loop."""
+        key = hidden_set_key(task_id, generator_version(task_id), seed, n)
+        cached = await self.aget_by_key(key, db)
+        if cached is not None:
+            return cached
+
+        test_set = await asyncio.to_thread(build_test_set, task_id, seed=seed, n=n)
+        await AsyncTestSetRepo(db).add_if_absent(_to_row(test_set))
+        self._lru.put(key, test_set)
+        return test_set
+
+    async def aget_by_key(self, key: str, db: AsyncSession) -> HiddenTestSet | None:
+        if self._version_due():
+            self._check_version(await AsyncTestSetRepo(db).get_version())
+        cached = self._lru.get(key)
+        if cached is not None:
+            return cached
+        row = await AsyncTestSetRepo(db).get_by_id(key)
+        if row is None:
+            return None
+        test_set = _from_row(row)
+        self._lru.put(key, test_set)
+        return test_set
+
+    def clear(self) -> None:
+        self._lru.clear()
+        self._version = self._version_checked_at = None
+
+
+HIDDEN_TEST_SETS = HiddenTestSetCache()
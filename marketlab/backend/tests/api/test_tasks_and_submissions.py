@@ -1,21 +1,40 @@
 """Integration tests for tasks & submissions API with database persistence.
 
-Uses SQLite in-memory so tests run without Postgres.
+Uses a throwaway SQLite file (via aiosqlite) so tests run without Postgres.
 """
 
+import asyncio
+import json
+import threading
+import time
+from contextlib import asynccontextmanager
+
 import pytest
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
+from marketlab.api.admission import AdmissionController
+from marketlab.api.routes.admin import router as admin_router
 from marketlab.api.routes.health import router as health_router
+from marketlab.api.routes.metrics import router as metrics_router
+from marketlab.api.routes.stress import router as stress_router
 from marketlab.api.routes.tasks import router as tasks_router
+from marketlab.api.routes import submissions as submissions_routes
 from marketlab.api.routes.submissions import router as submissions_router
-from marketlab.infra.db.models import Base
-from marketlab.infra.db.session import get_db
+from marketlab.infra.db.models import Base, SubmissionRow
+from marketlab.infra.db.session import get_async_db
+from marketlab.infra.db.write_behind import SubmissionWriteBehind
+from marketlab.infra.rate_limit import BucketLimit, MemoryBucketStore, RateLimiter
+from marketlab.infra.settings import settings
+from marketlab.usecases import judge_queue
+from marketlab.usecases.judge_queue import JudgeQueue
+from marketlab.usecases.rejudge import RejudgeJobs
+from marketlab.usecases.test_sets import HIDDEN_TEST_SETS
 
 GOOD_CODE = """\
 def solve(params):
@@ -39,27 +58,39 @@ def solve(params):
     return {"p_eq": 0.0, "q_eq": 0.0}
 """
 
-# ---------- Test DB setup (SQLite in-memory, single shared connection) ----------
+# ---------- Test DB setup (SQLite file per test: sync engine for DDL, aiosqlite for the app) ----------
 
-test_engine = create_engine(
-    "sqlite://",
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestSession = sessionmaker(bind=test_engine, autoflush=False, expire_on_commit=False)
+TestSession = async_sessionmaker(autoflush=False, expire_on_commit=False)
 
 
-def override_get_db():
-    db = TestSession()
-    try:
+async def override_get_async_db():
+    async with TestSession() as db:
         yield db
-    finally:
-        db.close()
 
 
-def _create_test_app() -> FastAPI:
-    """Create app WITHOUT lifespan (no Postgres connection needed in tests)."""
-    app = FastAPI(title="MarketLab API Test")
+@asynccontextmanager
+async def _queue_lifespan(app: FastAPI):
+    """Start only the background judge queue, bound to the test DB."""
+    queue = JudgeQueue(TestSession)
+    await queue.start()
+    app.state.judge_queue = queue
+    yield
+    await queue.stop()
+
+
+@asynccontextmanager
+async def _write_behind_lifespan(app: FastAPI):
+    """Persist judged submissions through a write-behind buffer that never flushes on its own."""
+    writer = SubmissionWriteBehind(TestSession, batch_size=1000, flush_interval_ms=60_000)
+    await writer.start()
+    app.state.submission_writer = writer
+    yield
+    await writer.close()
+
+
+def _create_test_app(lifespan=None) -> FastAPI:
+    """Create app WITHOUT the production lifespan (no Postgres connection needed in tests)."""
+    app = FastAPI(title="MarketLab API Test", lifespan=lifespan)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -67,18 +98,27 @@ def _create_test_app() -> FastAPI:
         allow_headers=["*"],
     )
     app.include_router(health_router)
+    app.include_router(metrics_router)
     app.include_router(tasks_router)
     app.include_router(submissions_router)
-    app.dependency_overrides[get_db] = override_get_db
+    app.include_router(stress_router)
+    app.include_router(admin_router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
     return app
 
 
 @pytest.fixture(autouse=True)
-def setup_db():
+def setup_db(tmp_path):
     """Create all tables before each test, drop after."""
-    Base.metadata.create_all(bind=test_engine)
+    path = tmp_path / "test.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    # NullPool: TestClient may drive requests from different event loops.
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    TestSession.configure(bind=async_engine)
     yield
-    Base.metadata.drop_all(bind=test_engine)
+    Base.metadata.drop_all(bind=sync_engine)
+    sync_engine.dispose()
 
 
 @pytest.fixture()
@@ -86,6 +126,18 @@ def client():
     return TestClient(_create_test_app())
 
 
+@pytest.fixture()
+def async_client():
+    with TestClient(_create_test_app(lifespan=_queue_lifespan)) as c:
+        yield c
+
+
+@pytest.fixture()
+def write_behind_client():
+    with TestClient(_create_test_app(lifespan=_write_behind_lifespan)) as c:
+        yield c
+
+
 # ---------- Task tests ----------
 
 class TestTasksAPI:
@@ -110,6 +162,25 @@ class TestTasksAPI:
         resp = client.get("/api/v1/tasks/no_such_task")
         assert resp.status_code == 404
 
+    @pytest.mark.parametrize("path", ["/api/v1/tasks", "/api/v1/tasks/equilibrium_linear_v1"])
+    def test_catalogue_revalidates_with_etag(self, client, path):
+        first = client.get(path)
+        etag = first.headers["etag"]
+        assert etag.startswith('"')
+        assert "max-age" in first.headers["cache-control"]
+
+        resp = client.get(path, headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert resp.content == b""
+        assert resp.headers["etag"] == etag
+
+        resp = client.get(path, headers={"If-None-Match": '"stale", W/' + etag})
+        assert resp.status_code == 304
+
+        resp = client.get(path, headers={"If-None-Match": '"stale"'})
+        assert resp.status_code == 200
+        assert resp.json() == first.json()
+
 
 # ---------- Submission tests ----------
 
@@ -135,6 +206,18 @@ class TestSubmissionsAPI:
         assert data["verdict"] == "WA"
         assert data["id"] is not None
 
+    def test_resource_usage_is_stored(self, client):
+        created = client.post(
+            "/api/v1/submissions",
+            json={"task_id": "equilibrium_linear_v1", "user_code": GOOD_CODE},
+        ).json()
+        fetched = client.get(f"/api/v1/submissions/{created['id']}").json()
+
+        for data in (created, fetched):
+            assert data["cpu_time_ms"] >= 0
+            assert data["wall_time_ms"] >= data["max_test_time_ms"] > 0
+        assert fetched["peak_rss_kb"] == created["peak_rss_kb"]
+
     def test_submit_unknown_task(self, client):
         resp = client.post(
             "/api/v1/submissions",
@@ -150,6 +233,159 @@ class TestSubmissionsAPI:
         assert resp.status_code == 422
 
 
+    def test_get_submission_by_id(self, client):
+        created = client.post(
+            "/api/v1/submissions",
+            json={"task_id": "equilibrium_linear_v1", "user_code": BAD_CODE},
+        ).json()
+        resp = client.get(f"/api/v1/submissions/{created['id']}")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["verdict"] == "WA"
+        assert data["failed_test_index"] == created["failed_test_index"]
+
+    def test_full_report_lists_every_test(self, client):
+        resp = client.post(
+            "/api/v1/submissions?report=full",
+            json={"task_id": "equilibrium_linear_v1", "user_code": BAD_CODE},
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["verdict"] == "WA"
+        assert len(data["tests"]) == data["total"]
+        assert all(t["verdict"] == "WA" for t in data["tests"])
+        assert "a" not in data["tests"][0]["expected"]  # hidden inputs are not exposed
+
+    def test_get_submission_not_found(self, client):
+        resp = client.get("/api/v1/submissions/no-such-id")
+        assert resp.status_code == 404
+
+
+# ---------- Async submissions ----------
+
+class TestAsyncSubmissions:
+    def test_async_submit_returns_202_pending(self, async_client):
+        resp = async_client.post(
+            "/api/v1/submissions?async=true",
+            json={"task_id": "equilibrium_linear_v1", "user_code": GOOD_CODE},
+        )
+        assert resp.status_code == 202
+        data = resp.json()
+        assert data["verdict"] == "PENDING"
+        assert data["id"] is not None
+
+    def test_async_verdict_streamed_over_sse(self, async_client):
+        created = async_client.post(
+            "/api/v1/submissions?async=true",
+            json={"task_id": "equilibrium_linear_v1", "user_code": BAD_CODE},
+        ).json()
+
+        with async_client.stream("GET", f"/api/v1/submissions/{created['id']}/events") as resp:
+            assert resp.headers["content-type"].startswith("text/event-stream")
+            data_lines = [line for line in resp.iter_lines() if line.startswith("data: ")]
+
+        event = json.loads(data_lines[-1].removeprefix("data: "))
+        assert event["id"] == created["id"]
+        assert event["verdict"] == "WA"
+
+        polled = async_client.get(f"/api/v1/submissions/{created['id']}").json()
+        assert polled["verdict"] == "WA"
+
+    def test_sse_sees_verdict_written_by_another_process(self, async_client, monkeypatch):
+        monkeypatch.setattr(submissions_routes, "EVENTS_POLL_SEC", 0.05)
+
+        async def store(verdict, row_id=None):
+            async with TestSession() as db:
+                row = await db.get(SubmissionRow, row_id) if row_id else SubmissionRow(
+                    task_id="equilibrium_linear_v1", user_code=BAD_CODE, passed=0, total=25
+                )
+                row.verdict = verdict
+                db.add(row)
+                await db.commit()
+                return row.id
+
+        # Pending and never enqueued here: another worker's queue judges it.
+        row_id = asyncio.run(store("PENDING"))
+        judge = threading.Timer(0.2, lambda: asyncio.run(store("WA", row_id)))
+        judge.start()
+        started = time.monotonic()
+        with async_client.stream("GET", f"/api/v1/submissions/{row_id}/events") as resp:
+            lines = list(resp.iter_lines())
+        judge.join()
+
+        assert time.monotonic() - started < submissions_routes.EVENTS_KEEPALIVE_SEC
+        assert lines.count(": pending") == 1
+        event = json.loads(next(ln for ln in lines if ln.startswith("data: "))[len("data: "):])
+        assert event["verdict"] == "WA"
+
+    def test_pending_submission_is_judged_by_one_of_several_queues(self, monkeypatch):
+        judged = []
+        real_submit = judge_queue.submit_solution
+        monkeypatch.setattr(
+            judge_queue,
+            "submit_solution",
+            lambda *args, **kwargs: judged.append(1) or real_submit(*args, **kwargs),
+        )
+
+        async def scenario():
+            async with TestSession() as db:
+                row = SubmissionRow(
+                    task_id="equilibrium_linear_v1",
+                    user_code=BAD_CODE,
+                    verdict="PENDING",
+                    passed=0,
+                    total=25,
+                )
+                db.add(row)
+                await db.commit()
+            # E.g. two marketlab.serve workers that both find the row on start.
+            queues = [JudgeQueue(TestSession), JudgeQueue(TestSession)]
+            for queue in queues:
+                await queue.start()
+            for queue in queues:
+                await queue._queue.join()
+                await queue.stop()
+            async with TestSession() as db:
+                return (await db.get(SubmissionRow, row.id)).verdict
+
+        assert asyncio.run(scenario()) == "WA"
+        assert len(judged) == 1
+
+    def test_async_without_queue_is_unavailable(self, client):
+        resp = client.post(
+            "/api/v1/submissions?async=true",
+            json={"task_id": "equilibrium_linear_v1", "user_code": GOOD_CODE},
+        )
+        assert resp.status_code == 503
+
+
+class TestWriteBehindSubmissions:
+    def test_submission_readable_before_flush(self, write_behind_client):
+        created = write_behind_client.post(
+            "/api/v1/submissions",
+            json={"task_id": "equilibrium_linear_v1", "user_code": GOOD_CODE},
+        ).json()
+        assert created["verdict"] == "AC"
+        assert created["created_at"] is not None
+
+        resp = write_behind_client.get(f"/api/v1/submissions/{created['id']}")
+        assert resp.status_code == 200
+        assert resp.json()["verdict"] == "AC"
+        # Still only in the buffer.
+        assert write_behind_client.get("/api/v1/submissions").json() == []
+
+    def test_buffer_flushed_on_shutdown(self, write_behind_client):
+        created = write_behind_client.post(
+            "/api/v1/submissions",
+            json={"task_id": "equilibrium_linear_v1", "user_code": BAD_CODE},
+        ).json()
+        write_behind_client.__exit__(None, None, None)
+
+        with TestClient(_create_test_app()) as c:
+            history = c.get("/api/v1/submissions").json()
+        assert [h["id"] for h in history] == [created["id"]]
+
+
 # ---------- Submission history ----------
 
 class TestSubmissionHistory:
@@ -195,3 +431,187 @@ class TestSubmissionHistory:
         assert len(data) == 2
         verdicts = {d["verdict"] for d in data}
         assert verdicts == {"AC", "WA"}
+
+    def test_history_cursor_pagination(self, client):
+        created = [
+            client.post(
+                "/api/v1/submissions",
+                json={"task_id": "equilibrium_linear_v1", "user_code": GOOD_CODE},
+            ).json()["id"]
+            for _ in range(5)
+        ]
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2} | ({"cursor": cursor} if cursor else {})
+            resp = client.get("/api/v1/submissions", params=params)
+            assert resp.status_code == 200
+            seen.extend(d["id"] for d in resp.json())
+            cursor = resp.headers.get("x-next-cursor")
+            if cursor is None:
+                break
+
+        assert seen == list(reversed(created))
+
+    def test_history_invalid_cursor(self, client):
+        resp = client.get("/api/v1/submissions?cursor=garbage")
+        assert resp.status_code == 422
+
+
+# ---------- Metrics ----------
+
+class TestMetrics:
+    def test_metrics_expose_judge_instrumentation(self, client):
+        client.post(
+            "/api/v1/submissions",
+            json={"task_id": "equilibrium_linear_v1", "user_code": BAD_CODE},
+        )
+        resp = client.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = resp.text
+        assert 'marketlab_verdicts_total{task_id="equilibrium_linear_v1",verdict="WA"}' in text
+        assert "marketlab_judge_seconds_count" in text
+        assert 'marketlab_submission_db_seconds_count{op="commit"}' in text
+
+
+# ---------- Stress judging ----------
+
+class TestStress:
+    def test_wrong_solution_gets_a_counterexample(self, client):
+        resp = client.post(
+            "/api/v1/stress",
+            json={"task_id": "equilibrium_linear_v1", "user_code": BAD_CODE},
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["verdict"] == "WA"
+        assert data["cases"] == 1
+        ce = data["counterexample"]
+        assert set(ce["params"]) == {"a", "b", "c", "d", "mode", "t"}
+        assert ce["got"] == {"p_eq": 0.0, "q_eq": 0.0}
+
+    def test_correct_solution_is_accepted(self, client):
+        resp = client.post(
+            "/api/v1/stress",
+            json={"task_id": "equilibrium_linear_v1", "user_code": GOOD_CODE},
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["verdict"] == "AC"
+        assert data["cases"] > 0
+        assert data["counterexample"] is None
+
+    def test_unknown_task_404(self, client):
+        resp = client.post("/api/v1/stress", json={"task_id": "nope", "user_code": GOOD_CODE})
+        assert resp.status_code == 404
+
+    def test_busy_503(self, client, monkeypatch):
+        from marketlab.api.routes import stress
+
+        monkeypatch.setattr(stress, "_slots", threading.BoundedSemaphore(1))
+        stress._slots.acquire()
+        resp = client.post(
+            "/api/v1/stress",
+            json={"task_id": "equilibrium_linear_v1", "user_code": GOOD_CODE},
+        )
+        assert resp.status_code == 503
+
+
+class TestAdmission:
+    @staticmethod
+    def _client(*, limiter=None, max_backlog=64):
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            app.state.rate_limiter = limiter
+            app.state.admission = AdmissionController(max_backlog=max_backlog, retry_after_sec=3)
+            yield
+
+        return TestClient(_create_test_app(lifespan=lifespan))
+
+    def test_client_over_rate_gets_429(self):
+        limiter = RateLimiter(
+            MemoryBucketStore(),
+            per_client=BucketLimit.per_minute(1, burst=1),
+            total=BucketLimit(rate=100.0, burst=100),
+        )
+        body = {"task_id": "equilibrium_linear_v1", "user_code": GOOD_CODE}
+        with self._client(limiter=limiter) as c:
+            assert c.post("/api/v1/submissions", json=body).status_code == 200
+            resp = c.post("/api/v1/submissions", json=body)
+            stress = c.post("/api/v1/stress", json=body)
+
+        assert resp.status_code == 429
+        assert 1 <= int(resp.headers["Retry-After"]) <= 60
+        assert stress.status_code == 429
+
+    def test_global_rate_exhausted_gets_503(self):
+        limiter = RateLimiter(
+            MemoryBucketStore(),
+            per_client=BucketLimit(rate=100.0, burst=100),
+            total=BucketLimit(rate=0.5, burst=1),
+        )
+        body = {"task_id": "equilibrium_linear_v1", "user_code": GOOD_CODE}
+        with self._client(limiter=limiter) as c:
+            c.post("/api/v1/submissions", json=body)
+            resp = c.post("/api/v1/submissions", json=body)
+
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == "2"
+
+    def test_full_backlog_sheds_load_with_503(self):
+        with self._client(max_backlog=0) as c:
+            resp = c.post(
+                "/api/v1/submissions",
+                json={"task_id": "equilibrium_linear_v1", "user_code": GOOD_CODE},
+            )
+            reads = c.get("/api/v1/tasks")
+
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == "3"
+        assert reads.status_code == 200  # only judged endpoints are admission-controlled
+
+
+class TestAdmin:
+    def test_admin_api_is_hidden_without_a_token(self, client, monkeypatch):
+        monkeypatch.setattr(settings, "admin_token", "")
+        assert client.post("/api/v1/admin/rejudge/equilibrium_linear_v1").status_code == 404
+
+    def test_rejudge_runs_in_background(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "admin_token", "secret")
+        # The submission's test set must be stored in this test's database.
+        HIDDEN_TEST_SETS.clear()
+        engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+        jobs = RejudgeJobs(sessionmaker(bind=engine, expire_on_commit=False))
+
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            app.state.rejudge_jobs = jobs
+            yield
+            jobs.close()
+
+        headers = {"X-Admin-Token": "secret"}
+        with TestClient(_create_test_app(lifespan=lifespan)) as c:
+            c.post(
+                "/api/v1/submissions",
+                json={"task_id": "equilibrium_linear_v1", "user_code": GOOD_CODE},
+            )
+            forbidden = c.post(
+                "/api/v1/admin/rejudge/equilibrium_linear_v1", headers={"X-Admin-Token": "x"}
+            )
+            started = c.post("/api/v1/admin/rejudge/equilibrium_linear_v1", headers=headers)
+            jobs.wait("equilibrium_linear_v1", timeout=30)
+            status = c.get("/api/v1/admin/rejudge/equilibrium_linear_v1", headers=headers)
+        engine.dispose()
+
+        assert forbidden.status_code == 403
+        assert started.status_code == 202
+        assert started.json()["state"] == "running"
+        assert status.json() == {
+            "task_id": "equilibrium_linear_v1",
+            "state": "done",
+            "scanned": 1,
+            "judged": 1,
+            "updated": 0,
+            "error": None,
+        }
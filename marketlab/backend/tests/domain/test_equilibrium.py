@@ -1,6 +1,7 @@
+import numpy as np
 import pytest
 
-from marketlab.domain.equilibrium import compute_equilibrium
+from marketlab.domain.equilibrium import compute_equilibrium, compute_equilibrium_batch
 from marketlab.domain.models import LinearDemand, LinearSupply, MarketPolicy
 
 
@@ -32,3 +33,38 @@ def test_equilibrium_subsidy():
     eq = compute_equilibrium(dmd, spl, policy)
     assert eq.p < 26.0
     assert eq.q > 42.0
+
+
+def test_batch_matches_scalar_bit_for_bit():
+    a = [120, 120, 120, 1]
+    b = [3, 3, 3, 10]
+    c = [-10, -10, -10, 100]
+    d = [2, 2, 2, 1]
+    mode = ["none", "tax", "subsidy", "none"]
+    t = [0, 10, 10, 0]
+
+    batch = compute_equilibrium_batch(a, b, c, d, mode, t)
+
+    for i in range(3):
+        eq = compute_equilibrium(
+            LinearDemand(a=a[i], b=b[i]),
+            LinearSupply(c=c[i], d=d[i]),
+            MarketPolicy(mode=mode[i], t=t[i]),
+        )
+        assert batch.p[i] == eq.p
+        assert batch.q[i] == eq.q
+    assert batch.valid.tolist() == [True, True, True, False]
+
+
+def test_batch_masks_distinguish_invalid_params_from_no_equilibrium():
+    batch = compute_equilibrium_batch(
+        a=[0, 120, 120, 1],
+        b=[3, 3, 3, 10],
+        c=[-10, -10, -10, 100],
+        d=[2, 2, 2, 1],
+        mode=["none", "bogus", "none", "none"],
+        t=[0, 0, 5, 0],
+    )
+    assert batch.params_ok.tolist() == [False, False, False, True]
+    assert batch.has_equilibrium[3] == False  # noqa: E712
+    assert np.isnan(batch.p).all()
@@ -2,7 +2,7 @@
 
 import pytest
 
-from marketlab.domain.generator import generate_tests
+from marketlab.domain.generator import generate_test, generate_tests
 from marketlab.usecases.registry import solve_task
 
 
@@ -42,6 +42,11 @@ class TestGeneratorEquilibrium:
         b = generate_tests(self.TASK_ID, n=10, seed=2)
         assert a[1:] != b[1:]
 
+    def test_any_test_is_generated_on_its_own(self):
+        tests = generate_tests(self.TASK_ID, n=200, seed=11)
+        for i in (0, 1, 3, 199):
+            assert generate_test(self.TASK_ID, i, seed=11) == tests[i]
+
     def test_unknown_task_raises(self):
         with pytest.raises(ValueError, match="No test generator"):
             generate_tests("nonexistent_task", n=5)
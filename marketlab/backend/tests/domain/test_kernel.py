@@ -0,0 +1,95 @@
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from marketlab.domain import (
+    DomainError,
+    LinearDemand,
+    LinearSupply,
+    MarketPolicy,
+    NoEquilibriumError,
+)
+from marketlab.domain.kernel import (
+    MODE_CODES,
+    equilibrium,
+    equilibrium_batch,
+    mode_code,
+    mode_codes,
+)
+
+EDGE_VALUES = (-1.0, 0.0, 1e-300, 0.5, 3.0, 120.0, 1e300, math.inf, math.nan)
+MODES = ("none", "tax", "subsidy", "bogus")
+
+
+def _reference(a, b, c, d, mode, t):
+    """The object-API solve with per-mode branches, as before the kernel existed."""
+    demand = LinearDemand(a=a, b=b)
+    LinearSupply(c=c, d=d)
+    policy = MarketPolicy(mode=mode, t=t)
+    if policy.mode == "none":
+        p = (a - c) / (b + d)
+    elif policy.mode == "tax":
+        p = (a - c + d * t) / (b + d)
+    else:
+        p = (a - c - d * t) / (b + d)
+    q = demand.quantity(p)
+    if p <= 0 or q <= 0:
+        raise NoEquilibriumError("Equilibrium must satisfy P*>0 and Q*>0 for this task family.")
+    return p, q
+
+
+def _outcome(fn, *args):
+    try:
+        return fn(*args)
+    except DomainError as e:
+        return type(e), str(e)
+
+
+def _same(x, y):
+    if isinstance(x[0], type) or isinstance(y[0], type):
+        return x == y
+    return all(u == v or (math.isnan(u) and math.isnan(v)) for u, v in zip(x, y, strict=True))
+
+
+def _cases():
+    rng = np.random.default_rng(0)
+    for _ in range(3000):
+        a, b, c, d, t = (float(v) for v in rng.choice(EDGE_VALUES, size=5))
+        yield a, b, c if rng.random() < 0.5 else -c, d, str(rng.choice(MODES)), t
+    for _ in range(3000):
+        a, b, d = rng.uniform(0.1, 300, size=3)
+        c, t = rng.uniform(-100, 100), rng.uniform(0, 30)
+        mode = str(rng.choice(MODES[:3]))
+        yield float(a), float(b), float(c), float(d), mode, 0.0 if mode == "none" else float(t)
+
+
+def test_kernel_matches_object_api_exactly():
+    for a, b, c, d, mode, t in _cases():
+        expected = _outcome(_reference, a, b, c, d, mode, t)
+        got = _outcome(equilibrium, a, b, c, d, mode_code(mode), t)
+        assert _same(got, expected), (a, b, c, d, mode, t)
+
+
+def test_batch_matches_scalar_kernel_bit_for_bit():
+    cases = list(itertools.islice(_cases(), 6000))
+    cols = [np.array(col) for col in zip(*cases, strict=True)]
+    a, b, c, d, mode, t = cols
+    p, q, params_ok, has_equilibrium = equilibrium_batch(a, b, c, d, mode_codes(mode), t)
+
+    for i, case in enumerate(cases):
+        outcome = _outcome(equilibrium, *case[:4], mode_code(case[4]), case[5])
+        if isinstance(outcome[0], type):
+            ok = outcome[0] is NoEquilibriumError
+            assert params_ok[i] == ok and (not ok or not has_equilibrium[i]), case
+        else:
+            assert params_ok[i] and has_equilibrium[i], case
+            assert _same((float(p[i]), float(q[i])), outcome), case
+
+
+def test_mode_codes():
+    assert mode_codes(np.array(["tax", "x", "none", "subsidy"])).tolist() == [1, -1, 0, 2]
+    assert {m: mode_code(m) for m in MODE_CODES} == MODE_CODES
+    with pytest.raises(DomainError, match="Policy mode"):
+        equilibrium(1.0, 1.0, 0.0, 1.0, mode_code("bogus"), 0.0)
@@ -0,0 +1,96 @@
+"""Tests for the declarative generator engine."""
+
+import numpy as np
+
+from marketlab.domain.generator import generate_columns, generate_tests
+from marketlab.domain.sampling import (
+    Choice,
+    Const,
+    Constraint,
+    GeneratorSpec,
+    Uniform,
+    Where,
+    columns_to_tests,
+    conform,
+    sample_columns,
+)
+
+SPEC = GeneratorSpec(
+    params=(
+        ("kind", Choice(("low", "high"))),
+        ("x", Uniform(0, 10, decimals=1)),
+        ("y", Uniform(lambda cols: cols["x"], 20)),
+        ("z", Where(lambda cols: cols["kind"] == "low", then=Const(0.0), otherwise=Uniform(1, 2))),
+    ),
+    constraints=(Constraint("x above 5", lambda cols: cols["x"] > 5),),
+    cover="kind",
+)
+
+
+def test_constraints_and_dependent_bounds_hold():
+    cols = sample_columns(SPEC, n=5_000, seed=1)
+    assert len(cols["x"]) == 5_000
+    assert (cols["x"] > 5).all()
+    assert (cols["y"] >= cols["x"]).all()
+    assert np.array_equal(cols["x"], np.round(cols["x"], 1))
+    low = cols["kind"] == "low"
+    assert (cols["z"][low] == 0).all()
+    assert (cols["z"][~low] >= 1).all()
+
+
+def test_every_cover_value_present_even_for_tiny_sets():
+    for seed in range(20):
+        cols = sample_columns(SPEC, n=2, seed=seed)
+        assert set(cols["kind"].tolist()) == {"low", "high"}
+
+
+def test_conform_keeps_a_row_inside_the_spec():
+    row = {"kind": "high", "x": 6.0, "y": 7.0, "z": 1.5}
+    assert conform(SPEC, row) == row
+    # The dependent field follows: "low" fixes z at 0.
+    assert conform(SPEC, {**row, "kind": "low"}) == {**row, "kind": "low", "z": 0.0}
+    assert conform(SPEC, {**row, "y": 5.0}) is None  # below its bound x
+    assert conform(SPEC, {**row, "x": 4.0, "y": 4.0}) is None  # constraint
+    assert conform(SPEC, {**row, "kind": "mid"}) is None
+
+
+def test_public_tests_come_first():
+    public = {"kind": "low", "x": 1.0, "y": 2.0, "z": 0.0}
+    spec = GeneratorSpec(params=SPEC.params, public_tests=(public,))
+    rows = columns_to_tests(sample_columns(spec, n=3, seed=0))
+    assert rows[0] == public
+
+
+def test_infeasible_spec_gives_up_with_fewer_tests():
+    spec = GeneratorSpec(
+        params=(("x", Uniform(0, 1)),),
+        constraints=(Constraint("never", lambda cols: cols["x"] > 2),),
+    )
+    assert len(sample_columns(spec, n=10, seed=0)["x"]) == 0
+
+
+def test_rows_hold_plain_python_values():
+    (row,) = columns_to_tests(sample_columns(SPEC, n=1, seed=0))
+    assert type(row["kind"]) is str
+    assert type(row["x"]) is float
+
+
+def test_columns_and_rows_of_a_task_agree():
+    cols = generate_columns("equilibrium_linear_v1", n=50, seed=4)
+    rows = generate_tests("equilibrium_linear_v1", n=50, seed=4)
+    assert rows == columns_to_tests({name: cols[name] for name in rows[0]})
+
+
+def test_shards_concatenate_to_the_full_set():
+    full = sample_columns(SPEC, n=1_000, seed=5)
+    shards = [sample_columns(SPEC, n=n, seed=5, start=s) for s, n in ((0, 1), (1, 299), (300, 700))]
+    for name in SPEC.fields:
+        assert np.array_equal(np.concatenate([s[name] for s in shards]), full[name])
+
+
+def test_a_test_does_not_depend_on_the_set_size():
+    small = columns_to_tests(sample_columns(SPEC, n=3, seed=9))
+    large = columns_to_tests(sample_columns(SPEC, n=10_000, seed=9))
+    assert large[:3] == small
+    (row,) = columns_to_tests(sample_columns(SPEC, n=1, seed=9, start=7_654))
+    assert row == large[7_654]
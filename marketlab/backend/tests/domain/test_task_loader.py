@@ -0,0 +1,105 @@
+import subprocess
+import sys
+from dataclasses import replace
+
+import pytest
+
+from marketlab.domain.task_loader import TASK_MANIFEST, TASKS, TaskEntry, TaskLoader
+from marketlab.usecases.registry import TASK_REGISTRY
+
+# Modules every API process and judge worker imports at startup.
+ENTRY_MODULES = (
+    "marketlab.api.main",
+    "marketlab.usecases.submit_solution",
+    "marketlab.usecases.stress",
+    "marketlab.infra.judge.runner_pool",
+)
+
+# Import time of marketlab's own modules (not third-party ones) at startup.
+IMPORT_BUDGET_SEC = 0.5
+
+
+def _run(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stderr
+
+
+def _own_import_seconds(importtime_log: str) -> float:
+    total_us = 0
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _cumulative, module = line.removeprefix("import time:").split("|")
+        if module.strip().startswith("marketlab") and self_us.strip().isdigit():
+            total_us += int(self_us)
+    return total_us / 1e6
+
+
+def test_startup_imports_no_task_module_and_stays_within_budget():
+    imports = "; ".join(f"import {m}" for m in ENTRY_MODULES)
+    log = _run(
+        f"{imports}; import sys; "
+        "assert not [m for m in sys.modules if m.startswith('marketlab.tasks.')], 'eager task import'"
+    )
+    assert _own_import_seconds(log) < IMPORT_BUDGET_SEC
+
+
+def test_task_module_is_imported_on_first_use():
+    _run(
+        "import sys\n"
+        "from marketlab.usecases.registry import TASK_REGISTRY\n"
+        "assert 'equilibrium_linear_v1' in TASK_REGISTRY and list(TASK_REGISTRY)\n"
+        "assert 'marketlab.tasks.equilibrium_linear' not in sys.modules\n"
+        "spec, _oracle = TASK_REGISTRY['equilibrium_linear_v1']\n"
+        "assert 'marketlab.tasks.equilibrium_linear' in sys.modules\n"
+    )
+
+
+def test_manifest_modules_define_their_task():
+    for task_id, entry in TASK_MANIFEST.items():
+        spec = TASKS[task_id].spec
+        assert spec.id == task_id
+        assert TASK_REGISTRY[task_id][0] is spec
+        assert (entry.title, entry.topic) == (spec.title, spec.topic)
+
+
+def test_task_list_and_task_rows_import_no_task_module(tmp_path):
+    _run(
+        "import sys\n"
+        "from sqlalchemy import create_engine\n"
+        "from marketlab.api.catalogue import get_task_catalogue\n"
+        "from marketlab.infra.db.seed import prepare_database\n"
+        f"prepare_database(create_engine('sqlite:///{tmp_path / 'tasks.db'}'))\n"
+        "get_task_catalogue()\n"
+        "assert not [m for m in sys.modules if m.startswith('marketlab.tasks.')]\n"
+    )
+
+
+def test_unknown_and_mismatched_tasks():
+    entry = TASK_MANIFEST["equilibrium_linear_v1"]
+    loader = TaskLoader({"wrong_id": entry})
+    with pytest.raises(KeyError):
+        loader["missing"]
+    with pytest.raises(ValueError, match="not 'wrong_id'"):
+        loader["wrong_id"]
+
+
+def test_registering_a_task_without_a_module():
+    loader = TaskLoader(TASK_MANIFEST)
+    base = TASKS["equilibrium_linear_v1"]
+    extra = replace(base, spec=replace(base.spec, id="extra_v1"))
+
+    loader["extra_v1"] = extra
+
+    assert list(loader) == [*TASK_MANIFEST, "extra_v1"]
+    assert loader["extra_v1"] is extra
+    assert loader.loaded() == {"extra_v1"}
+    assert loader.entry("extra_v1") == TaskEntry(
+        module=None, title=base.spec.title, topic=base.spec.topic
+    )
+    del loader["extra_v1"]
+    assert "extra_v1" not in loader
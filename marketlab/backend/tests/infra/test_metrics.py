@@ -0,0 +1,132 @@
+import os
+
+import pytest
+
+from marketlab.infra import metrics
+from marketlab.infra.metrics import RETIRED_FILE, MetricsRegistry, publish, read_published
+
+
+@pytest.fixture()
+def registry():
+    return MetricsRegistry()
+
+
+def test_counter_renders_per_label_set(registry):
+    verdicts = registry.counter("verdicts_total", "Verdicts.", ("task_id", "verdict"))
+    verdicts.labels("t1", "AC").inc()
+    verdicts.labels("t1", "AC").inc()
+    verdicts.labels("t1", "WA").inc()
+
+    text = registry.render()
+    assert "# TYPE verdicts_total counter" in text
+    assert 'verdicts_total{task_id="t1",verdict="AC"} 2.0' in text
+    assert 'verdicts_total{task_id="t1",verdict="WA"} 1.0' in text
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    latency = registry.histogram("latency_seconds", "Latency.", ("op",), buckets=(0.1, 1.0))
+    child = latency.labels("x")
+    for value in (0.05, 0.5, 0.5, 3.0):
+        child.observe(value)
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{op="x",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{op="x",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{op="x",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{op="x"} 4' in text
+    assert 'latency_seconds_sum{op="x"} 4.05' in text
+
+
+def test_gauge_reads_callback_at_render(registry):
+    depth = registry.gauge("queue_depth", "Depth.")
+    assert "queue_depth" not in registry.render()
+
+    items = [1, 2, 3]
+    depth.set_function(lambda: len(items))
+    assert "queue_depth 3.0" in registry.render()
+
+
+def test_label_values_are_escaped(registry):
+    registry.counter("c_total", "C.", ("task_id",)).labels('a"b\\c').inc()
+    assert 'c_total{task_id="a\\"b\\\\c"} 1.0' in registry.render()
+
+
+def test_wrong_label_count_rejected(registry):
+    with pytest.raises(ValueError):
+        registry.counter("c_total", "C.", ("task_id",)).labels("a", "b")
+
+
+def test_reregistering_returns_existing_metric(registry):
+    first = registry.counter("c_total", "C.", ("task_id",))
+    assert registry.counter("c_total", "C.", ("task_id",)) is first
+    with pytest.raises(ValueError):
+        registry.histogram("c_total", "C.", ("task_id",))
+
+
+def test_drain_and_merge_move_samples_between_registries(registry):
+    worker = MetricsRegistry()
+    for r in (registry, worker):
+        r.counter("c_total", "C.", ("task_id",))
+        r.histogram("h_seconds", "H.", (), buckets=(1.0,))
+    worker.counter("c_total", "C.", ("task_id",)).labels("t1").inc(3)
+    worker.histogram("h_seconds", "H.", (), buckets=(1.0,)).observe(0.5)
+
+    registry.merge(worker.drain())
+    registry.merge(worker.drain())  # already drained: nothing is counted twice
+
+    text = registry.render()
+    assert 'c_total{task_id="t1"} 3.0' in text
+    assert "h_seconds_count 1" in text
+    assert worker.drain() == {}
+
+
+def test_render_adds_totals_published_by_other_processes(registry, tmp_path):
+    other = MetricsRegistry()
+    for r in (registry, other):
+        r.counter("c_total", "C.", ("task_id",)).labels("t1").inc(2)
+        r.histogram("h_seconds", "H.", (), buckets=(1.0,)).observe(0.5)
+    registry.gauge("depth", "Depth.").set_function(lambda: 7)
+    publish(tmp_path, other)
+    assert read_published(tmp_path) == []  # this process's own file
+    (tmp_path / next(tmp_path.glob("*.json")).name).rename(tmp_path / "4242.json")
+
+    text = registry.render(read_published(tmp_path))
+    assert 'c_total{task_id="t1"} 4.0' in text
+    assert 'h_seconds_bucket{le="1.0"} 2' in text
+    assert "depth 7" in text
+    # Rendering the merged view leaves this process's own totals alone.
+    assert 'c_total{task_id="t1"} 2.0' in registry.render()
+
+
+def _publish_in_child(directory, registry):
+    pid = os.fork()
+    if pid == 0:
+        try:
+            publish(directory, registry)
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+
+def test_exited_processes_are_retired_without_losing_totals(registry, tmp_path):
+    other = MetricsRegistry()
+    for r in (registry, other):
+        r.counter("c_total", "C.", ("task_id",)).labels("t1").inc(2)
+        r.histogram("h_seconds", "H.", (), buckets=(1.0,)).observe(0.5)
+    _publish_in_child(tmp_path, other)
+    _publish_in_child(tmp_path, other)
+    # The second child retired the first one's file and left its own.
+    assert len(list(tmp_path.glob("*-*.json"))) == 1
+    assert (tmp_path / RETIRED_FILE).exists()
+    before = registry.render(read_published(tmp_path))
+
+    publish(tmp_path, registry)
+
+    assert {p.name for p in tmp_path.glob("*.json")} == {
+        RETIRED_FILE,
+        f"{os.getpid()}-{metrics._process_id}.json",
+    }
+    after = registry.render(read_published(tmp_path))
+    assert after == before
+    assert 'c_total{task_id="t1"} 6.0' in after
+    assert 'h_seconds_bucket{le="1.0"} 3' in after
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from marketlab.infra.db.models import Base
+from marketlab.infra.rate_limit import BucketLimit, MemoryBucketStore, RateLimiter, SQLBucketStore
+
+LIMIT = BucketLimit(rate=1.0, burst=2)
+
+
+@pytest.fixture()
+def sql_store(tmp_path):
+    path = tmp_path / "rl.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    yield SQLBucketStore(async_sessionmaker(bind=async_engine))
+    asyncio.run(async_engine.dispose())
+
+
+def _takes(store, key, times):
+    async def scenario():
+        return [await store.take(key, LIMIT, now) for now in times]
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("store_name", ["memory", "sql"])
+def test_bucket_grants_burst_then_refills(store_name, request):
+    store = MemoryBucketStore() if store_name == "memory" else request.getfixturevalue("sql_store")
+
+    waits = _takes(store, "k", [100.0, 100.0, 100.0, 100.5, 101.0, 101.0])
+
+    assert waits[:2] == [0.0, 0.0]  # the burst
+    assert waits[2] == pytest.approx(1.0)  # empty, a token needs a second
+    assert waits[3] == pytest.approx(0.5)
+    assert waits[4] == 0.0  # refilled
+    assert waits[5] == pytest.approx(1.0)
+    assert _takes(store, "other", [101.0]) == [0.0]  # buckets are independent
+
+
+def test_memory_store_forgets_least_recently_used_buckets():
+    store = MemoryBucketStore(max_buckets=2)
+    _takes(store, "a", [0.0, 0.0])
+    _takes(store, "b", [0.0])
+    _takes(store, "c", [0.0])
+
+    assert _takes(store, "a", [0.0]) == [0.0]  # "a" was dropped: a full bucket again
+
+
+def test_limiter_reports_scope():
+    limiter = RateLimiter(
+        MemoryBucketStore(),
+        per_client=BucketLimit(rate=1.0, burst=1),
+        total=BucketLimit(rate=1.0, burst=2),
+    )
+
+    async def scenario():
+        return [
+            await limiter.check("1.1.1.1", now=0.0),
+            await limiter.check("1.1.1.1", now=0.0),
+            await limiter.check("2.2.2.2", now=0.0),
+            await limiter.check("3.3.3.3", now=0.0),
+        ]
+
+    first, same_client, second, third = asyncio.run(scenario())
+
+    assert first is None and second is None
+    assert same_client.scope == "client" and same_client.retry_after == pytest.approx(1.0)
+    assert third.scope == "global"
+
+
+@pytest.mark.parametrize("store_name", ["memory", "sql"])
+def test_global_rejection_does_not_cost_the_client_a_token(store_name, request):
+    store = MemoryBucketStore() if store_name == "memory" else request.getfixturevalue("sql_store")
+    limiter = RateLimiter(
+        store,
+        per_client=BucketLimit(rate=0.0, burst=1),
+        total=BucketLimit(rate=1.0, burst=1),
+    )
+
+    async def scenario():
+        return [
+            await limiter.check("1.1.1.1", now=0.0),
+            await limiter.check("2.2.2.2", now=0.0),
+            await limiter.check("2.2.2.2", now=1.0),
+        ]
+
+    first, rejected, retried = asyncio.run(scenario())
+
+    assert first is None
+    assert rejected.scope == "global"
+    # The client bucket never refills: only the token given back admits the retry.
+    assert retried is None
@@ -0,0 +1,148 @@
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from marketlab.infra.judge.runner_inprocess import TimeoutError
+from marketlab.infra.judge.runner_pool import JudgeWorkerPool, PoolSettings, WorkerCrashedError
+from marketlab.usecases.submit_solution import SubmitSolutionInput, submit_solution
+
+SWALLOWS_TIMEOUT = """
+def solve(params):
+    while True:
+        try:
+            while True:
+                pass
+        except:
+            pass
+"""
+
+GOOD_CODE = """
+def solve(params):
+    a, b, c, d = params["a"], params["b"], params["c"], params["d"]
+    p = (a - c) / (b + d)
+    return {"p_eq": p, "q_eq": a - b * p}
+"""
+
+TESTS = [{"a": 120, "b": 3, "c": -10, "d": 2, "mode": "none", "t": 0}]
+
+
+def _pid() -> int:
+    return os.getpid()
+
+
+def _sleep(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def _fail() -> None:
+    raise ValueError("boom")
+
+
+@pytest.fixture()
+def pool():
+    with JudgeWorkerPool(PoolSettings(size=1, max_jobs_per_worker=3)) as p:
+        yield p
+
+
+def test_runs_in_separate_process(pool):
+    assert pool.run(_pid, timeout=5) != os.getpid()
+
+
+def test_worker_reused_then_recycled(pool):
+    pids = [pool.run(_pid, timeout=5) for _ in range(4)]
+    assert pids[0] == pids[1] == pids[2]
+    assert pids[3] != pids[0]
+
+
+def test_worker_metrics_are_merged_into_parent(pool):
+    from marketlab.usecases.judge_v1 import SOLVE_SECONDS
+
+    solve_seconds = SOLVE_SECONDS.labels("equilibrium_linear_v1")
+    before = sum(solve_seconds.counts)
+    submit_solution(
+        SubmitSolutionInput(task_id="equilibrium_linear_v1", user_code=GOOD_CODE, tests=TESTS),
+        pool=pool,
+    )
+    assert sum(solve_seconds.counts) == before + len(TESTS)
+
+
+def test_wall_clock_deadline_kills_worker(pool):
+    first = pool.run(_pid, timeout=5)
+    with pytest.raises(TimeoutError):
+        pool.run(_sleep, 10, timeout=0.3)
+    assert pool.run(_pid, timeout=5) != first
+
+
+def test_job_exception_is_reported(pool):
+    with pytest.raises(WorkerCrashedError, match="boom"):
+        pool.run(_fail, timeout=5)
+
+
+def test_submission_that_swallows_alarm_is_killed(pool):
+    report = submit_solution(
+        SubmitSolutionInput(
+            task_id="equilibrium_linear_v1", user_code=SWALLOWS_TIMEOUT, tests=TESTS
+        ),
+        pool=pool,
+    )
+    assert report.verdict == "TLE"
+
+
+def test_submission_accepted_through_pool(pool):
+    report = submit_solution(
+        SubmitSolutionInput(task_id="equilibrium_linear_v1", user_code=GOOD_CODE, tests=TESTS),
+        pool=pool,
+    )
+    assert report.verdict == "AC"
+
+
+def test_full_report_sharded_across_workers(monkeypatch):
+    import marketlab.usecases.submit_solution as usecase
+
+    monkeypatch.setattr(usecase, "FULL_REPORT_SHARD_SIZE", 2)
+    tests = [dict(TESTS[0], a=100 + i) for i in range(5)]
+    with JudgeWorkerPool(PoolSettings(size=2)) as pool:
+        report = submit_solution(
+            SubmitSolutionInput(task_id="equilibrium_linear_v1", user_code=GOOD_CODE, tests=tests),
+            pool=pool,
+            full_report=True,
+        )
+    assert report.verdict == "AC"
+    assert [o.index for o in report.tests] == [0, 1, 2, 3, 4]
+
+
+def test_shared_test_set_is_judged_in_shards(monkeypatch):
+    import marketlab.usecases.submit_solution as usecase
+    from marketlab.infra.judge.test_set import TestSet
+    from marketlab.usecases.registry import get_task_spec
+
+    monkeypatch.setattr(usecase, "FULL_REPORT_SHARD_SIZE", 2)
+    tests = [dict(TESTS[0], a=100 + i) for i in range(5)]
+    packed = TestSet.from_tests(get_task_spec("equilibrium_linear_v1").input_fields, tests).share()
+    with JudgeWorkerPool(PoolSettings(size=2)) as pool:
+        report = submit_solution(
+            SubmitSolutionInput(task_id="equilibrium_linear_v1", user_code=GOOD_CODE, tests=packed),
+            pool=pool,
+            full_report=True,
+        )
+    assert report.verdict == "AC"
+    assert [o.index for o in report.tests] == [0, 1, 2, 3, 4]
+
+
+def test_slow_wall_clock_under_load_is_not_a_time_limit():
+    with JudgeWorkerPool(PoolSettings(size=1)) as pool:
+        worker_pid = pool._idle.queue[0].process.pid
+        # A descheduled worker: well past the CPU budget in wall-clock time,
+        # without using any CPU.
+        os.kill(worker_pid, signal.SIGSTOP)
+        resume = threading.Timer(2.5, os.kill, (worker_pid, signal.SIGCONT))
+        resume.start()
+        report = submit_solution(
+            SubmitSolutionInput(task_id="equilibrium_linear_v1", user_code=GOOD_CODE, tests=TESTS),
+            pool=pool,
+        )
+        resume.join()
+    assert report.verdict == "AC"
@@ -0,0 +1,99 @@
+from dataclasses import replace
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from marketlab.domain.task_loader import TASKS
+from marketlab.infra.db import seed
+from marketlab.infra.db.models import Base, SubmissionRow, TaskRow
+from marketlab.usecases.registry import TASK_REGISTRY
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _record_statements(engine) -> list[str]:
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_sync_inserts_then_skips_on_matching_fingerprint(engine):
+    with Session(engine) as db:
+        assert seed.sync_tasks_to_db(db) == len(TASK_REGISTRY)
+        assert set(db.scalars(select(TaskRow.id))) == set(TASK_REGISTRY)
+
+    statements = _record_statements(engine)
+    with Session(engine) as db:
+        assert seed.sync_tasks_to_db(db) == 0
+    assert len(statements) == 1  # just the fingerprint lookup
+
+
+def test_sync_rewrites_only_changed_tasks(engine, monkeypatch):
+    task = next(iter(TASKS.values()))
+    extra = replace(task, spec=replace(task.spec, id="extra_v1", title="Extra"))
+    monkeypatch.setitem(TASKS, extra.spec.id, extra)
+    with Session(engine) as db:
+        assert seed.sync_tasks_to_db(db) == 2
+
+    renamed = replace(task, spec=replace(task.spec, title="Renamed"))
+    monkeypatch.setitem(TASKS, task.spec.id, renamed)
+    with Session(engine) as db:
+        assert seed.sync_tasks_to_db(db) == 1
+        assert db.get(TaskRow, task.spec.id).title == "Renamed"
+        assert db.get(TaskRow, extra.spec.id).title == "Extra"
+
+
+def test_prepare_database_runs_once_per_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(seed, "_prepared", False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+
+    assert seed.prepare_database(engine) is True
+    with Session(engine) as db:
+        assert set(db.scalars(select(TaskRow.id))) == set(TASK_REGISTRY)
+
+    # A forked worker inherits the flag and leaves the database alone.
+    assert seed.prepare_database(engine) is False
+    engine.dispose()
+
+
+def test_prepare_database_releases_only_expired_claims(tmp_path, monkeypatch):
+    monkeypatch.setattr(seed, "_prepared", False)
+    engine = create_engine(f"sqlite:///{tmp_path / 'claims.db'}")
+    Base.metadata.create_all(engine)
+    now = datetime.now(UTC)
+    claims = {
+        "stale": now - timedelta(seconds=seed.settings.judge_claim_ttl_sec + 60),
+        "unknown": None,  # claimed before claims were timestamped
+        "live": now - timedelta(seconds=5),
+    }
+    with Session(engine) as db:
+        for sid, claimed_at in claims.items():
+            db.add(
+                SubmissionRow(
+                    id=sid,
+                    task_id="t",
+                    user_code="",
+                    verdict="JUDGING",
+                    passed=0,
+                    total=1,
+                    claimed_at=claimed_at,
+                )
+            )
+        db.commit()
+
+    seed.prepare_database(engine)
+
+    with Session(engine) as db:
+        assert db.get(SubmissionRow, "stale").verdict == "PENDING"
+        assert db.get(SubmissionRow, "unknown").verdict == "PENDING"
+        # Another host (or a running server) may be judging it right now.
+        assert db.get(SubmissionRow, "live").verdict == "JUDGING"
+    engine.dispose()
@@ -0,0 +1,22 @@
+import pytest
+
+from marketlab.infra.db.session import to_async_url
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("sqlite:///./app.db", "sqlite+aiosqlite:///./app.db"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+        (
+            "postgresql://user:secret@db:5432/marketlab",
+            "postgresql+psycopg://user:secret@db:5432/marketlab",
+        ),
+        (
+            "postgresql+psycopg://user:secret@db/marketlab",
+            "postgresql+psycopg://user:secret@db/marketlab",
+        ),
+    ],
+)
+def test_to_async_url(url, expected):
+    assert to_async_url(url) == expected
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from marketlab.infra.db.models import Base, SubmissionRow
+from marketlab.infra.db.repos import SubmissionCursor, SubmissionRepo
+from marketlab.infra.db.repos.submission_repo import _claim_stmt
+
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture()
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _add(db, submission_id, *, task_id="t1", created_at=T0):
+    db.add(
+        SubmissionRow(
+            id=submission_id,
+            task_id=task_id,
+            user_code="x" * 1000,
+            verdict="AC",
+            passed=1,
+            total=1,
+            created_at=created_at,
+        )
+    )
+
+
+def _walk(fetch, limit):
+    ids, after = [], None
+    while True:
+        page = fetch(limit=limit, after=after)
+        ids.extend(s.id for s in page)
+        if len(page) < limit:
+            return ids
+        after = SubmissionCursor.after(page[-1])
+
+
+def test_recent_pages_cover_history_newest_first(db):
+    for i in range(7):
+        _add(db, f"s{i}", created_at=T0 + timedelta(seconds=i))
+    db.commit()
+
+    repo = SubmissionRepo(db)
+    assert _walk(repo.list_recent, limit=3) == [f"s{i}" for i in reversed(range(7))]
+
+
+def test_equal_timestamps_are_split_by_id(db):
+    for i in range(5):
+        _add(db, f"s{i}")
+    db.commit()
+
+    repo = SubmissionRepo(db)
+    assert _walk(repo.list_recent, limit=2) == ["s4", "s3", "s2", "s1", "s0"]
+
+
+def test_by_task_filters_and_paginates(db):
+    for i in range(4):
+        _add(db, f"a{i}", task_id="a", created_at=T0 + timedelta(seconds=i))
+        _add(db, f"b{i}", task_id="b", created_at=T0 + timedelta(seconds=i))
+    db.commit()
+
+    repo = SubmissionRepo(db)
+    ids = _walk(lambda **kw: repo.list_by_task("a", **kw), limit=3)
+    assert ids == ["a3", "a2", "a1", "a0"]
+
+
+def test_history_does_not_load_user_code(db):
+    _add(db, "s0")
+    db.commit()
+
+    (summary,) = SubmissionRepo(db).list_recent()
+    assert not hasattr(summary, "user_code")
+
+
+def test_claims_are_released_once_expired(db):
+    row = SubmissionRow(id="s1", task_id="t1", user_code="", verdict="PENDING", passed=0, total=1)
+    db.add(row)
+    db.commit()
+    assert db.execute(_claim_stmt("s1")).rowcount == 1
+    db.commit()
+    assert row.verdict == "JUDGING" and row.claimed_at is not None
+
+    repo = SubmissionRepo(db)
+    assert repo.release_claims(ttl_sec=60) == 0
+    assert repo.release_claims(ttl_sec=0) == 1
+    db.commit()
+    db.refresh(row)
+    assert row.verdict == "PENDING" and row.claimed_at is None
+
+
+def test_cursor_round_trip():
+    cursor = SubmissionCursor(created_at=T0, id="abc|def")
+    assert SubmissionCursor.decode(cursor.encode()) == cursor
+
+
+@pytest.mark.parametrize("token", ["", "!!!", "bm90LWEtY3Vyc29y"])
+def test_malformed_cursor_raises_value_error(token):
+    with pytest.raises(ValueError):
+        SubmissionCursor.decode(token)
@@ -0,0 +1,65 @@
+import gc
+import os
+import pickle
+
+import numpy as np
+
+from marketlab.domain.generator import generate_tests
+from marketlab.infra.judge.test_set import TestSet
+from marketlab.usecases.registry import expected_results, get_task_spec
+
+TASK_ID = "equilibrium_linear_v1"
+TESTS = generate_tests(TASK_ID, n=40, seed=2)
+
+
+def _pack(tests=TESTS) -> TestSet:
+    return TestSet.from_tests(get_task_spec(TASK_ID).input_fields, tests)
+
+
+def test_columns_are_typed_and_rows_round_trip():
+    packed = _pack()
+    assert packed.categories == {"mode": ("none", "subsidy", "tax")}
+    assert packed.to_columns()["a"].dtype == np.float64
+    assert packed.to_tests() == TESTS
+    assert packed[3].copy() == TESTS[3]
+    assert packed[-1]["mode"] == TESTS[-1]["mode"]
+    assert expected_results(TASK_ID, packed) == expected_results(TASK_ID, TESTS)
+
+
+def test_row_copies_are_independent():
+    row = _pack()[0]
+    params = row.copy()
+    params["a"] = -1.0
+    assert row["a"] == TESTS[0]["a"]
+
+
+def test_shared_set_pickles_by_reference():
+    shared = _pack().share()
+    assert shared.shared
+    shard = pickle.loads(pickle.dumps(shared[10:20]))
+    assert shard.to_tests() == TESTS[10:20]
+    assert len(pickle.dumps(shared)) < len(pickle.dumps(TESTS)) / 4
+
+
+def test_block_is_unlinked_once_the_set_and_its_slices_are_gone():
+    shared = _pack().share()
+    path = f"/dev/shm/{shared._block.name}"
+    shard = shared[:5]
+    del shared
+    gc.collect()
+    assert os.path.exists(path)
+    del shard
+    gc.collect()
+    assert not os.path.exists(path)
+
+
+def test_forked_process_dropping_the_set_leaves_the_block():
+    shared = _pack().share()
+    pid = os.fork()
+    if pid == 0:  # e.g. a marketlab.serve worker evicting the set from its cache
+        del shared
+        gc.collect()
+        os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert pickle.loads(pickle.dumps(shared)).to_tests() == TESTS
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from marketlab.infra.judge.runner_inprocess import TimeoutError, time_limit
+
+
+def _spin(seconds: float) -> None:
+    end = time.process_time() + seconds
+    while time.process_time() < end:
+        pass
+
+
+def test_fractional_cpu_limit_interrupts_quickly():
+    start = time.process_time()
+    with pytest.raises(TimeoutError), time_limit(0.02):
+        _spin(5)
+    assert time.process_time() - start < 0.5
+
+
+def test_limit_counts_cpu_not_wall_time():
+    with time_limit(0.02):
+        time.sleep(0.1)
+
+
+def test_inner_limit_never_outlasts_outer():
+    start = time.process_time()
+    with pytest.raises(TimeoutError), time_limit(0.05):
+        with time_limit(10):
+            _spin(5)
+    assert time.process_time() - start < 0.5
+
+
+def test_outer_budget_continues_after_inner_block():
+    start = time.process_time()
+    with pytest.raises(TimeoutError), time_limit(0.1):
+        for _ in range(100):
+            with time_limit(0.05):
+                _spin(0.01)
+    assert 0.09 < time.process_time() - start < 0.5
+
+
+def test_inner_timeout_leaves_outer_armed():
+    with time_limit(5):
+        with pytest.raises(TimeoutError), time_limit(0.02):
+            _spin(5)
+        _spin(0.01)  # the outer limit is still far away
+
+
+def test_other_threads_check_cpu_time_at_the_end():
+    errors = []
+
+    def run(seconds):
+        try:
+            with time_limit(0.02):
+                _spin_thread(seconds)
+        except TimeoutError as e:
+            errors.append(e)
+
+    for seconds in (0.0, 0.1):
+        thread = threading.Thread(target=run, args=(seconds,))
+        thread.start()
+        thread.join()
+    assert len(errors) == 1
+
+
+def _spin_thread(seconds: float) -> None:
+    end = time.thread_time() + seconds
+    while time.thread_time() < end:
+        pass
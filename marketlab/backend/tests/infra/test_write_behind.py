@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import uuid
+from datetime import UTC, datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from marketlab.infra.db.models import Base, SubmissionRow
+from marketlab.infra.db.write_behind import SubmissionWriteBehind, _to_values
+
+
+@pytest.fixture()
+def db_path(tmp_path):
+    path = tmp_path / "wb.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return path
+
+
+def _session_factory(db_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    return async_sessionmaker(bind=engine, expire_on_commit=False)
+
+
+def _row(verdict="AC"):
+    return SubmissionRow(
+        task_id="t1", user_code="code", verdict=verdict, passed=1, total=1, message=""
+    )
+
+
+def _row_values(verdict):
+    row = _row(verdict)
+    row.id, row.created_at = str(uuid.uuid4()), datetime.now(UTC)
+    return _to_values(row)
+
+
+async def _count(session_factory):
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).select_from(SubmissionRow))
+
+
+def test_rows_are_visible_before_and_after_flush(db_path, tmp_path):
+    async def scenario():
+        factory = _session_factory(db_path)
+        writer = SubmissionWriteBehind(
+            factory, batch_size=1000, flush_interval_ms=10_000, spool_path=tmp_path / "spool"
+        )
+        await writer.start()
+        row = _row()
+        writer.add(row)
+        assert row.id is not None and row.created_at is not None
+        assert writer.get_pending(row.id).verdict == "AC"
+        assert await _count(factory) == 0
+
+        await writer.close()
+        assert writer.get_pending(row.id) is None
+        assert await _count(factory) == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_batch_is_flushed_without_waiting_for_interval(db_path, tmp_path):
+    async def scenario():
+        factory = _session_factory(db_path)
+        writer = SubmissionWriteBehind(
+            factory, batch_size=5, flush_interval_ms=10_000, spool_path=tmp_path / "spool"
+        )
+        await writer.start()
+        for _ in range(5):
+            writer.add(_row())
+        for _ in range(100):
+            if await _count(factory) == 5:
+                break
+            await asyncio.sleep(0.01)
+        assert await _count(factory) == 5
+        await writer.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_is_spooled_and_replayed(db_path, tmp_path):
+    spool = tmp_path / "spool.jsonl"
+
+    async def failing_run():
+        # No tables in this database: the INSERT fails.
+        writer = SubmissionWriteBehind(_session_factory(tmp_path / "empty.db"), spool_path=spool)
+        await writer.start()
+        writer.add(_row("WA"))
+        writer.add(_row("AC"))
+        await writer.close()
+
+    async def next_run():
+        factory = _session_factory(db_path)
+        writer = SubmissionWriteBehind(factory, spool_path=spool)
+        await writer.start()
+        await writer.close()
+        return await _count(factory)
+
+    asyncio.run(failing_run())
+    assert len(spool.read_text().splitlines()) == 2
+    assert asyncio.run(next_run()) == 2
+    assert not spool.exists()
+
+
+def test_replay_blocks_other_processes_spooling_until_done(db_path, tmp_path):
+    spool = tmp_path / "spool.jsonl"
+    factory = _session_factory(db_path)
+    # Another API process sharing the spool file.
+    other = SubmissionWriteBehind(factory, spool_path=spool)
+    other._append_spool([_row_values("WA")])
+    late = threading.Thread(target=other._append_spool, args=([_row_values("RE")],))
+
+    async def scenario():
+        writer = SubmissionWriteBehind(factory, spool_path=spool)
+        real_insert = writer._insert
+
+        async def insert_while_other_spools(batch, **kwargs):
+            late.start()
+            await asyncio.sleep(0.2)
+            assert late.is_alive()  # waiting for the lock, not appending to a doomed file
+            await real_insert(batch, **kwargs)
+
+        writer._insert = insert_while_other_spools
+        await writer.start()
+        await writer.close()
+
+    asyncio.run(scenario())
+    late.join()
+    assert [line.count('"RE"') for line in spool.read_text().splitlines()] == [1]
+
+
+def test_close_during_a_slow_flush_keeps_the_batch(db_path, tmp_path):
+    spool = tmp_path / "spool.jsonl"
+
+    async def scenario():
+        factory = _session_factory(db_path)
+        writer = SubmissionWriteBehind(factory, flush_interval_ms=1, spool_path=spool)
+        real_insert = writer._insert
+        inserting = asyncio.Event()
+
+        async def slow_insert(batch, **kwargs):
+            inserting.set()
+            await asyncio.sleep(0.2)
+            await real_insert(batch, **kwargs)
+
+        writer._insert = slow_insert
+        await writer.start()
+        writer.add(_row())
+        await inserting.wait()
+        await writer.close()  # shutting down while the batch is being inserted
+        return await _count(factory)
+
+    assert asyncio.run(scenario()) == 1
+    assert not spool.exists()
+
+
+def test_cancelled_flush_spools_its_batch(db_path, tmp_path):
+    spool = tmp_path / "spool.jsonl"
+
+    async def scenario():
+        writer = SubmissionWriteBehind(_session_factory(db_path), spool_path=spool)
+
+        async def hanging_insert(batch, **kwargs):
+            await asyncio.sleep(3600)
+
+        writer._insert = hanging_insert
+        writer.add(_row())
+        flush = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0.05)
+        flush.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flush
+
+    asyncio.run(scenario())
+    assert len(spool.read_text().splitlines()) == 1
@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from marketlab.domain.generator import generate_tests
+from marketlab.infra.db.models import Base
+from marketlab.usecases.registry import solve_task
+from marketlab.usecases.test_sets import HiddenTestSetCache, build_test_set
+
+TASK_ID = "equilibrium_linear_v1"
+
+
+@pytest.fixture()
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    yield session
+    session.close()
+
+
+def test_build_is_reproducible_and_carries_oracle_answers():
+    first = build_test_set(TASK_ID, seed=3, n=10)
+    second = build_test_set(TASK_ID, seed=3, n=10)
+
+    assert first == second
+    assert first.tests == generate_tests(TASK_ID, n=10, seed=3)
+    for params, expected in zip(first.tests, first.expected, strict=True):
+        assert expected == solve_task(TASK_ID, params)
+
+
+def test_key_depends_on_seed_and_size():
+    keys = {
+        build_test_set(TASK_ID, seed=1, n=10).key,
+        build_test_set(TASK_ID, seed=2, n=10).key,
+        build_test_set(TASK_ID, seed=1, n=11).key,
+    }
+    assert len(keys) == 3
+
+
+def test_cache_serves_from_memory():
+    cache = HiddenTestSetCache(max_entries=4)
+    assert cache.get(TASK_ID, seed=5, n=10) is cache.get(TASK_ID, seed=5, n=10)
+
+
+def test_cache_persists_and_reloads_from_db(db):
+    built = HiddenTestSetCache().get(TASK_ID, seed=7, n=10, db=db)
+    db.commit()
+
+    fresh = HiddenTestSetCache()  # e.g. another worker process
+    loaded = fresh.get_by_key(built.key, db)
+
+    assert loaded == built
+    assert fresh.get_by_key("missing", db) is None
+
+
+def test_lru_evicts_oldest_entry():
+    cache = HiddenTestSetCache(max_entries=1)
+    old = cache.get(TASK_ID, seed=1, n=5)
+    cache.get(TASK_ID, seed=2, n=5)
+    assert cache.get_by_key(old.key) is None
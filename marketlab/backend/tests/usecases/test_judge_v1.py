@@ -1,6 +1,10 @@
 import pytest
 
+from marketlab.infra.judge.runner_pool import JudgeWorkerPool, PoolSettings
+from marketlab.infra.judge.usage import reset_peak_rss
+from marketlab.usecases.judge_v1 import JudgeSettings
 from marketlab.usecases.submit_solution import SubmitSolutionInput, submit_solution
+from marketlab.usecases.test_order import FAILURE_STATS
 
 
 GOOD_CODE = """
@@ -116,3 +120,173 @@ def test_judge_timeout():
         )
     )
     assert report.verdict == "TLE"
+
+
+def test_identical_code_is_compiled_once():
+    import marketlab.infra.judge.runner_inprocess as runner
+
+    code = GOOD_CODE + "\n# compile-cache probe\n"
+    assert runner.code_hash(code) not in runner._compiled_code
+
+    first = runner.compile_user_solve(code)
+    second = runner.compile_user_solve(code)
+
+    assert runner.code_hash(code) in runner._compiled_code
+    assert first is not second  # fresh function / globals every time
+    assert first.__code__ is second.__code__
+
+
+def test_duplicate_submission_reuses_cached_verdict(monkeypatch):
+    import marketlab.usecases.submit_solution as usecase
+
+    usecase.clear_verdict_cache()
+    judged = []
+    real_job = usecase._judge_job
+    monkeypatch.setattr(usecase, "_judge_job", lambda *a: judged.append(a) or real_job(*a))
+
+    inp = SubmitSolutionInput(
+        task_id="equilibrium_linear_v1",
+        user_code=BAD_IGNORES_MODE,
+        tests=make_tests_pack(),
+        test_set_digest="pack-v1",
+    )
+    first = submit_solution(inp)
+    second = submit_solution(inp)
+
+    assert first == second
+    assert first.verdict == "WA"
+    assert len(judged) == 1
+
+
+def test_timeouts_are_not_cached():
+    import marketlab.usecases.submit_solution as usecase
+
+    usecase.clear_verdict_cache()
+    inp = SubmitSolutionInput(
+        task_id="equilibrium_linear_v1",
+        user_code=TLE_CODE,
+        tests=make_tests_pack()[:1],
+        test_set_digest="pack-v1",
+    )
+    assert submit_solution(inp).verdict == "TLE"
+    assert len(usecase._verdicts) == 0
+
+
+def test_full_report_runs_every_test():
+    report = submit_solution(
+        SubmitSolutionInput(
+            task_id="equilibrium_linear_v1",
+            user_code=BAD_IGNORES_MODE,
+            tests=make_tests_pack(),
+        ),
+        full_report=True,
+    )
+    assert report.verdict == "WA"
+    assert report.passed == 1
+    assert report.failed_test_index == 1
+    assert [o.verdict for o in report.tests] == ["AC", "WA", "WA"]
+    assert report.tests[1].expected["p_eq"] == pytest.approx(30.0)
+    assert report.tests[1].got["p_eq"] == pytest.approx(26.0)
+
+
+def test_full_report_marks_unreached_tests_tle():
+    report = submit_solution(
+        SubmitSolutionInput(
+            task_id="equilibrium_linear_v1",
+            user_code=TLE_CODE,
+            tests=make_tests_pack(),
+        ),
+        full_report=True,
+    )
+    assert report.verdict == "TLE"
+    assert [o.verdict for o in report.tests] == ["TLE", "TLE", "TLE"]
+
+
+MEMORY_HOG = """
+def solve(params: dict) -> dict:
+    hog = [0.5] * 4_000_000
+    return {"p_eq": hog[0], "q_eq": hog[1]}
+"""
+
+HUGE_ALLOCATION = """
+def solve(params: dict) -> dict:
+    return [0] * 10**18
+"""
+
+
+def test_report_carries_resource_usage():
+    report = submit_solution(
+        SubmitSolutionInput(
+            task_id="equilibrium_linear_v1",
+            user_code=GOOD_CODE,
+            tests=make_tests_pack(),
+        ),
+        full_report=True,
+    )
+    usage = report.usage
+    assert usage is not None
+    assert usage.cpu_time_ms >= 0
+    assert usage.wall_time_ms >= usage.max_test_time_ms > 0
+    assert usage.max_test_time_ms == max(o.time_ms for o in report.tests)
+    assert usage.peak_rss_kb is None or usage.peak_rss_kb > 0
+
+
+def test_memory_error_is_mle():
+    FAILURE_STATS.clear()  # canonical test order
+    report = submit_solution(
+        SubmitSolutionInput(
+            task_id="equilibrium_linear_v1",
+            user_code=HUGE_ALLOCATION,
+            tests=make_tests_pack(),
+        )
+    )
+    assert report.verdict == "MLE"
+    assert report.failed_test_index == 0
+
+
+@pytest.mark.skipif(not reset_peak_rss(), reason="peak RSS cannot be reset on this platform")
+def test_run_outgrowing_memory_limit_is_mle():
+    with JudgeWorkerPool(PoolSettings(size=1)) as pool:
+        report = submit_solution(
+            SubmitSolutionInput(
+                task_id="equilibrium_linear_v1",
+                user_code=MEMORY_HOG,
+                tests=make_tests_pack(),
+            ),
+            JudgeSettings(memory_limit_mb=8),
+            pool=pool,
+        )
+    assert report.verdict == "MLE"
+    assert report.usage.peak_rss_kb > 8 * 1024
+
+
+def test_memory_limit_is_not_checked_outside_pool_workers():
+    # Other threads of this process may be judging: its peak RSS is not this run's.
+    report = submit_solution(
+        SubmitSolutionInput(
+            task_id="equilibrium_linear_v1",
+            user_code=MEMORY_HOG,
+            tests=make_tests_pack(),
+        ),
+        JudgeSettings(memory_limit_mb=8),
+    )
+    assert report.verdict != "MLE"
+    assert report.usage.peak_rss_kb is None or report.usage.peak_rss_kb > 0
+
+
+def test_submission_budget_caps_total_cpu_time():
+    slow_but_correct = GOOD_CODE.replace(
+        "    q = a - b * p\n", "    q = a - b * p\n    for _ in range(200_000):\n        pass\n"
+    )
+    FAILURE_STATS.clear()  # canonical test order
+    report = submit_solution(
+        SubmitSolutionInput(
+            task_id="equilibrium_linear_v1",
+            user_code=slow_but_correct,
+            tests=make_tests_pack() * 100,
+        ),
+        JudgeSettings(time_limit_sec=0.5, submission_time_limit_sec=0.2),
+    )
+    assert report.verdict == "TLE"
+    assert 0 < report.passed < report.total
+    assert report.failed_test_index == report.passed
@@ -1,6 +1,12 @@
 import pytest
 
-from marketlab.usecases.registry import get_task_spec, solve_task
+from marketlab.domain.generator import generate_tests
+from marketlab.usecases.registry import (
+    expected_results,
+    get_task_spec,
+    solve_task,
+    solve_task_batch,
+)
 
 
 def test_registry_returns_spec():
@@ -24,3 +30,31 @@ def test_solver_returns_multiple_outputs():
     )
     assert result["p_eq"] == pytest.approx(30.0)
     assert result["q_eq"] == pytest.approx(30.0)
+
+
+def test_batch_oracle_agrees_with_scalar_solver():
+    tests = generate_tests("equilibrium_linear_v1", n=50, seed=7)
+    tests.append({"a": 1, "b": 10, "c": 100, "d": 1, "mode": "none"})  # no equilibrium
+
+    expected = expected_results("equilibrium_linear_v1", tests)
+
+    assert expected[-1] is None
+    for params, exp in zip(tests[:-1], expected[:-1], strict=True):
+        assert exp == solve_task("equilibrium_linear_v1", params)
+
+
+def test_solve_task_batch_returns_columns():
+    result = solve_task_batch(
+        "equilibrium_linear_v1",
+        {
+            "a": [120, 120],
+            "b": [3, 3],
+            "c": [-10, -10],
+            "d": [2, 2],
+            "mode": ["tax", "none"],
+            "t": [10, None],
+        },
+    )
+    assert result.valid.tolist() == [True, True]
+    assert result.values["p_eq"].tolist() == pytest.approx([30.0, 26.0])
+    assert result.values["q_eq"].tolist() == pytest.approx([30.0, 42.0])
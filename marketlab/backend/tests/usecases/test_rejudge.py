@@ -0,0 +1,180 @@
+import json
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from marketlab.infra.db.models import AppStateRow, Base, SubmissionRow, TestSetRow
+from marketlab.infra.db.repos import SubmissionRepo
+from marketlab.usecases import test_sets
+from marketlab.usecases.rejudge import (
+    RejudgeAlreadyRunning,
+    RejudgeJobs,
+    acquire_rejudge_lease,
+    rejudge_task,
+)
+from marketlab.usecases.test_sets import HIDDEN_TEST_SETS, HiddenTestSetCache
+
+TASK_ID = "equilibrium_linear_v1"
+T0 = datetime(2026, 1, 1, 12, 0, 0)
+
+GOOD_CODE = """\
+def solve(params):
+    a, b, c, d = params["a"], params["b"], params["c"], params["d"]
+    t = {"none": 0.0, "tax": params["t"], "subsidy": -params["t"]}[params["mode"]]
+    p = (a - c + d * t) / (b + d)
+    return {"p_eq": p, "q_eq": a - b * p}
+"""
+
+BAD_CODE = """\
+def solve(params):
+    return {"p_eq": 1.0, "q_eq": 1.0}
+"""
+
+
+@pytest.fixture()
+def sessions(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rejudge.db'}")
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    HIDDEN_TEST_SETS.clear()
+    yield factory
+    HIDDEN_TEST_SETS.clear()
+    engine.dispose()
+
+
+def _store(sessions, codes, *, verdict="WA", test_set_id=None):
+    with sessions() as db:
+        for i, code in enumerate(codes):
+            db.add(
+                SubmissionRow(
+                    id=f"s{i:03d}",
+                    task_id=TASK_ID,
+                    user_code=code,
+                    verdict=verdict,
+                    passed=0,
+                    total=25,
+                    test_set_id=test_set_id,
+                    created_at=T0 + timedelta(seconds=i),
+                )
+            )
+        db.commit()
+
+
+def _verdicts(sessions):
+    with sessions() as db:
+        return {row.id: row.verdict for row in db.query(SubmissionRow).order_by(SubmissionRow.id)}
+
+
+def test_rejudge_updates_stale_verdicts_judging_identical_code_once(sessions):
+    _store(sessions, [GOOD_CODE, BAD_CODE, GOOD_CODE, GOOD_CODE, BAD_CODE])
+    with sessions() as db:
+        db.add(
+            SubmissionRow(
+                task_id=TASK_ID, user_code=BAD_CODE, verdict="PENDING", passed=0, total=25
+            )
+        )
+        db.commit()
+
+    progress = rejudge_task(sessions, TASK_ID, batch_size=2)
+
+    assert progress.done
+    assert progress.scanned == 5
+    assert progress.judged == 2
+    verdicts = _verdicts(sessions)
+    assert [verdicts[f"s{i:03d}"] for i in range(5)] == ["AC", "WA", "AC", "AC", "WA"]
+    assert list(verdicts.values()).count("PENDING") == 1
+    with sessions() as db:
+        assert SubmissionRepo(db).get_rejudge_checkpoint(TASK_ID) is None
+
+    # Judging again changes nothing.
+    assert rejudge_task(sessions, TASK_ID, batch_size=2).updated == 0
+
+
+def test_interrupted_rejudge_resumes_after_last_batch(sessions):
+    _store(sessions, [GOOD_CODE] * 5)
+    stop = threading.Event()
+
+    first = rejudge_task(
+        sessions, TASK_ID, batch_size=2, on_progress=lambda p: stop.set(), stop=stop
+    )
+    assert not first.done and first.scanned == 2
+    assert list(_verdicts(sessions).values()) == ["AC", "AC", "WA", "WA", "WA"]
+
+    seen = []
+    final = rejudge_task(sessions, TASK_ID, batch_size=2, on_progress=seen.append)
+    assert final.done and final.scanned == 5 and final.updated == 5
+    assert [p.scanned for p in seen] == [4, 5]
+    assert set(_verdicts(sessions).values()) == {"AC"}
+
+
+def test_rejudge_recomputes_stale_oracle_answers(sessions):
+    with sessions() as db:
+        test_set = HIDDEN_TEST_SETS.get(TASK_ID, seed=0, n=25, db=db)
+        # The answers an earlier, wrong oracle stored.
+        row = db.get(TestSetRow, test_set.key)
+        payload = json.loads(row.payload)
+        payload["expected"] = [{"p_eq": 1.0, "q_eq": 1.0} for _ in payload["expected"]]
+        row.payload = json.dumps(payload)
+        row.digest = "stale"
+        db.commit()
+    HIDDEN_TEST_SETS.clear()
+    _store(sessions, [GOOD_CODE, BAD_CODE], verdict="AC", test_set_id=test_set.key)
+
+    rejudge_task(sessions, TASK_ID)
+
+    assert _verdicts(sessions) == {"s000": "AC", "s001": "WA"}
+    with sessions() as db:
+        assert db.get(TestSetRow, test_set.key).digest == test_set.digest
+
+
+def test_refreshed_answers_reach_other_processes_caches(sessions, monkeypatch):
+    monkeypatch.setattr(test_sets, "VERSION_CHECK_INTERVAL_SEC", 0.0)
+    with sessions() as db:
+        good = HIDDEN_TEST_SETS.get(TASK_ID, seed=0, n=25, db=db)
+        row = db.get(TestSetRow, good.key)
+        payload = json.loads(row.payload)
+        payload["expected"] = [{"p_eq": 1.0, "q_eq": 1.0} for _ in payload["expected"]]
+        row.payload = json.dumps(payload)
+        row.digest = "stale"
+        db.commit()
+    other = HiddenTestSetCache()  # e.g. another API process, judging on the stale set
+    with sessions() as db:
+        assert other.get_by_key(good.key, db).digest == "stale"
+
+    _store(sessions, [GOOD_CODE], verdict="WA", test_set_id=good.key)
+    rejudge_task(sessions, TASK_ID)
+
+    with sessions() as db:
+        assert other.get_by_key(good.key, db).expected == good.expected
+
+
+def test_task_is_rejudged_by_one_process_at_a_time(sessions):
+    _store(sessions, [GOOD_CODE])
+    lease = acquire_rejudge_lease(sessions, TASK_ID)  # e.g. the CLI in another process
+    assert lease is not None
+
+    with pytest.raises(RejudgeAlreadyRunning):
+        rejudge_task(sessions, TASK_ID)
+    jobs = RejudgeJobs(sessions)
+    assert jobs.start(TASK_ID) is None
+    assert jobs.status(TASK_ID).state == "running"
+    assert _verdicts(sessions) == {"s000": "WA"}
+
+    # The holder is done; its lease is released and the next run may go.
+    rejudge_task(sessions, TASK_ID, lease=lease)
+    assert rejudge_task(sessions, TASK_ID).done
+    assert jobs.status(TASK_ID) is None
+
+
+def test_lease_of_a_dead_run_is_taken_over(sessions):
+    _store(sessions, [GOOD_CODE])
+    assert acquire_rejudge_lease(sessions, TASK_ID) is not None
+    with sessions() as db:
+        lease = db.get(AppStateRow, f"rejudge-lease:{TASK_ID}")
+        lease.updated_at = T0  # not renewed since
+        db.commit()
+
+    assert rejudge_task(sessions, TASK_ID).updated == 1
@@ -0,0 +1,133 @@
+from marketlab.domain.generator import generate_tests, stress_profiles
+from marketlab.domain.judge.models import TestOutcome
+from marketlab.domain.sampling import conform
+from marketlab.infra.judge.runner_pool import JudgeWorkerPool, PoolSettings
+from marketlab.usecases.stress import StressSettings, run_stress, shrink, stress_solution
+from marketlab.usecases.submit_solution import SubmitSolutionInput, submit_solution
+from tests.usecases.test_judge_v1 import GOOD_CODE, RUNTIME_ERROR
+
+TASK_ID = "equilibrium_linear_v1"
+
+# Correct except that a tiny equilibrium quantity is clamped away from zero.
+CLAMPS_SMALL_QUANTITY = GOOD_CODE.replace(
+    'return {"p_eq": p, "q_eq": q}', 'return {"p_eq": p, "q_eq": max(q, 0.01)}'
+)
+
+# Off by 0.1% only for inputs in the millions.
+WRONG_FOR_HUGE_INPUTS = GOOD_CODE.replace(
+    'return {"p_eq": p, "q_eq": q}',
+    'return {"p_eq": p if a < 1e6 else p * 1.001, "q_eq": q}',
+)
+
+# Applies the tax wedge whatever the mode.
+IGNORES_MODE = GOOD_CODE.replace('elif mode == "tax":', "elif True:")
+
+
+def test_correct_solution_survives_all_cases():
+    report = run_stress(
+        TASK_ID, GOOD_CODE, StressSettings(max_cases=1200, cpu_budget_sec=30), seed=3
+    )
+
+    assert report.verdict == "AC"
+    assert report.cases == 1200
+    assert report.counterexample is None
+    assert not report.budget_exhausted
+
+
+def test_edge_case_bug_passes_hidden_tests_but_not_stress():
+    regular = submit_solution(
+        SubmitSolutionInput(
+            task_id=TASK_ID, user_code=CLAMPS_SMALL_QUANTITY, tests=generate_tests(TASK_ID, seed=3)
+        )
+    )
+    assert regular.verdict == "AC"
+
+    report = run_stress(TASK_ID, CLAMPS_SMALL_QUANTITY, StressSettings(cpu_budget_sec=30), seed=3)
+
+    assert report.verdict == "WA"
+    ce = report.counterexample
+    assert ce is not None
+    assert ce.failed_field == "q_eq"
+    assert ce.got["q_eq"] == 0.01 and ce.expected["q_eq"] < 0.01
+    assert ce.profile == "near_zero_quantity"
+
+
+def test_counterexample_is_minimised():
+    report = run_stress(TASK_ID, WRONG_FOR_HUGE_INPUTS, StressSettings(cpu_budget_sec=30), seed=3)
+
+    ce = report.counterexample
+    assert ce is not None and ce.verdict == "WA"
+    assert ce.shrink_steps > 0
+    assert ce.params["mode"] == "none" and ce.params["t"] == 0.0
+    # Still at least a million (the bug needs it), but a round number.
+    assert ce.params["a"] >= 1e6 and ce.params["a"] == float(f"{ce.params['a']:.1g}")
+    assert ce.params["b"] == ce.params["d"] == 1.0
+
+
+def test_shrunk_counterexample_is_a_valid_test():
+    report = run_stress(TASK_ID, IGNORES_MODE, StressSettings(cpu_budget_sec=30), seed=3)
+
+    ce = report.counterexample
+    assert ce is not None and ce.verdict == "WA"
+    assert ce.shrink_steps > 0
+    # The bug needs a wedge, so "none" (which forces t = 0) is out of reach.
+    assert ce.params["mode"] != "none" and ce.params["t"] != 0.0
+    assert any(conform(gen, ce.params) == ce.params for _name, gen in stress_profiles(TASK_ID))
+
+
+def test_shrink_moves_towards_simple_values():
+    def fails(params):
+        if params["x"] > 100 and params["mode"] != "none":
+            return TestOutcome(index=0, verdict="WA")
+        return None
+
+    params, _outcome, steps = shrink(
+        {"x": 123456.789, "mode": "subsidy"},
+        TestOutcome(index=0, verdict="WA"),
+        fails,
+        {"mode": ("none", "tax", "subsidy")},
+    )
+
+    assert params["mode"] == "tax"
+    assert 100 < params["x"] < 1000 and params["x"] == float(f"{params['x']:.1g}")
+    assert steps > 0
+
+
+def test_runtime_error_is_reported_on_first_case():
+    report = run_stress(TASK_ID, RUNTIME_ERROR, seed=3)
+
+    assert report.verdict == "RE"
+    assert report.cases == 1
+    assert "division by zero" in report.counterexample.message
+
+
+# Swallows the per-test time limit and never returns.
+SWALLOWS_TIMEOUT = """\
+def solve(params):
+    while True:
+        try:
+            while True:
+                pass
+        except:  # noqa: E722
+            pass
+"""
+
+
+def test_cpu_budget_bounds_the_run():
+    report = stress_solution(
+        TASK_ID, GOOD_CODE, StressSettings(max_cases=10**7, cpu_budget_sec=0.05), seed=3
+    )
+
+    assert report.verdict == "AC"
+    assert report.budget_exhausted
+    assert 0 < report.cases < 10**7
+
+
+def test_killed_stress_worker_is_not_accepted():
+    with JudgeWorkerPool(PoolSettings(size=1)) as pool:
+        report = stress_solution(
+            TASK_ID, SWALLOWS_TIMEOUT, StressSettings(cpu_budget_sec=0.2), pool=pool, seed=1
+        )
+
+    assert report.verdict == "TLE"
+    assert report.cases == 0 and not report.budget_exhausted
@@ -0,0 +1,121 @@
+import random
+
+from marketlab.domain.generator import generate_tests
+from marketlab.usecases.judge_v1 import run_judge_v1
+from marketlab.usecases.registry import TASK_REGISTRY
+from marketlab.usecases.submit_solution import SubmitSolutionInput, submit_solution
+from marketlab.usecases.test_order import FAILURE_STATS, FailureStats, classify_tests
+
+TASK_ID = "equilibrium_linear_v1"
+
+# Wrong only for subsidies.
+SUBSIDY_SIGN_BUG = """
+def solve(params):
+    a, b, c, d, t = params["a"], params["b"], params["c"], params["d"], params["t"]
+    wedge = d * t if params["mode"] != "none" else 0.0
+    p = (a - c + wedge) / (b + d)
+    return {"p_eq": p, "q_eq": a - b * p}
+"""
+
+
+def test_failure_prone_classes_run_first():
+    stats = FailureStats()
+    classes = ("none/c<0", "tax/c<0", "subsidy/c<0", "tax/c<0", "subsidy/c<0")
+    assert stats.order(TASK_ID, classes) is None
+    for _ in range(3):
+        stats.record(TASK_ID, classes, "subsidy/c<0")
+    stats.record(TASK_ID, classes, None)
+    assert stats.order(TASK_ID, classes) == [2, 4, 0, 1, 3]
+
+
+def test_failed_test_index_counts_in_canonical_order():
+    spec, oracle = TASK_REGISTRY[TASK_ID]
+    tests = generate_tests(TASK_ID, n=30, seed=5)
+    subsidies = [i for i, t in enumerate(tests) if t["mode"] == "subsidy"]
+    report = run_judge_v1(
+        spec=spec,
+        oracle=oracle,
+        user_code=SUBSIDY_SIGN_BUG,
+        tests=tests,
+        order=list(reversed(range(len(tests)))),
+    )
+    assert report.verdict == "WA"
+    assert report.failed_test_index == subsidies[0]
+    assert report.passed == subsidies[0]
+
+
+def verdict_of(report):
+    return report.verdict, report.failed_test_index, report.failed_field, report.passed
+
+
+# WA on every subsidy test, RE on every tax test.
+WA_THEN_RE = """
+def solve(params):
+    a, b, c, d, t = params["a"], params["b"], params["c"], params["d"], params["t"]
+    if params["mode"] == "tax":
+        raise ValueError("no taxes")
+    wedge = d * t if params["mode"] != "none" else 0.0
+    p = (a - c + wedge) / (b + d)
+    return {"p_eq": p, "q_eq": a - b * p}
+"""
+
+
+def test_the_report_is_the_same_in_any_order():
+    spec, oracle = TASK_REGISTRY[TASK_ID]
+    tests = generate_tests(TASK_ID, n=30, seed=5)
+    modes = [t["mode"] for t in tests]
+    assert "tax" in modes and "subsidy" in modes
+    canonical = run_judge_v1(spec=spec, oracle=oracle, user_code=WA_THEN_RE, tests=tests)
+    rng = random.Random(3)
+    orders = [list(reversed(range(len(tests))))]
+    for _ in range(10):
+        orders.append(rng.sample(range(len(tests)), len(tests)))
+    for order in orders:
+        report = run_judge_v1(
+            spec=spec, oracle=oracle, user_code=WA_THEN_RE, tests=tests, order=order
+        )
+        assert verdict_of(report) == verdict_of(canonical)
+
+
+def test_judged_submissions_teach_the_order():
+    from marketlab.usecases.judge_v1 import SOLVE_SECONDS
+
+    FAILURE_STATS.clear()
+    tests = generate_tests(TASK_ID, n=25, seed=8)
+    classes = classify_tests(TASK_ID, tests)
+    assert classes is not None
+    assert FAILURE_STATS.order(TASK_ID, classes) is None
+
+    inp = SubmitSolutionInput(task_id=TASK_ID, user_code=SUBSIDY_SIGN_BUG, tests=tests)
+    solves = SOLVE_SECONDS.labels(TASK_ID)
+    before = sum(solves.counts)
+    first = submit_solution(inp)
+    first_run = sum(solves.counts) - before
+
+    order = FAILURE_STATS.order(TASK_ID, classes)
+    assert order is not None
+    assert classes[order[0]] == classes[first.failed_test_index]
+    before = sum(solves.counts)
+    second = submit_solution(inp)
+    assert verdict_of(second) == verdict_of(first)
+    # The tests before the failure are confirmed, so nothing is saved on a WA.
+    assert sum(solves.counts) - before >= first_run
+    FAILURE_STATS.clear()
+
+
+def test_only_classes_that_ran_are_counted():
+    FAILURE_STATS.clear()
+    tests = generate_tests(TASK_ID, n=25, seed=8)
+    classes = classify_tests(TASK_ID, tests)
+    assert classes is not None
+
+    report = submit_solution(
+        SubmitSolutionInput(task_id=TASK_ID, user_code=SUBSIDY_SIGN_BUG, tests=tests)
+    )
+    ran = set(classes[: report.failed_test_index + 1])
+    never_ran = set(classes) - ran
+    assert never_ran
+    # Judging stopped before these: no evidence that they pass.
+    assert all(FAILURE_STATS.failure_rate(TASK_ID, cls) == 0.5 for cls in never_ran)
+    assert all(FAILURE_STATS.failure_rate(TASK_ID, cls) != 0.5 for cls in ran)
+    FAILURE_STATS.clear()
@@ -87,7 +87,7 @@ export default function SolvePage() {
   function verdictColor(v: string) {
     if (v === "AC") return "text-green-600 bg-green-50 border-green-200";
     if (v === "WA") return "text-red-600 bg-red-50 border-red-200";
-    if (v === "TLE") return "text-yellow-600 bg-yellow-50 border-yellow-200";
+    if (v === "TLE" || v === "MLE") return "text-yellow-600 bg-yellow-50 border-yellow-200";
     return "text-red-600 bg-red-50 border-red-200";
   }
 
@@ -95,6 +95,7 @@ export default function SolvePage() {
     if (v === "AC") return "Accepted!";
     if (v === "WA") return "Wrong Answer";
     if (v === "TLE") return "Time Limit Exceeded";
+    if (v === "MLE") return "Memory Limit Exceeded";
     if (v === "RE") return "Runtime Error";
     return "Connection Error";
   }